@@ -29,7 +29,6 @@ from .describe import (
     StreamShape,
     UnsupportedMetricError,
     describe_mirror,
-    flatten_for_plot,
     require_sweep_renderable,
 )
 
@@ -41,6 +40,9 @@ __all__ = ["ShmemSweepWidget"]
 # to match.
 DEFAULT_POLL_HZ: float = 60.0
 
+# How many poll intervals' worth of samples the read buffer holds.
+SCRATCH_TICKS: float = 4.0
+
 
 class ShmemSweepWidget(QtWidgets.QWidget):
     """Mirrors a shmem ring and draws it, building the plot on first data.
@@ -90,6 +92,9 @@ class ShmemSweepWidget(QtWidgets.QWidget):
         self._mirror = EZShmMirror(shmem_name)
 
         poll_hz = self._effective_poll_hz(poll_hz, max_fps)
+        self._poll_hz = poll_hz
+        # Reused read buffer; see _drain.
+        self._scratch: np.ndarray | None = None
         self._timer = QtCore.QTimer(self)
         self._timer.setInterval(max(1, int(1000.0 / poll_hz)))
         self._timer.timeout.connect(self._on_tick)
@@ -208,7 +213,10 @@ class ShmemSweepWidget(QtWidgets.QWidget):
                 logger.exception("closing the sweep figure raised; continuing teardown")
 
     def _on_tick(self) -> None:
-        samples, _overflow = self._mirror.auto_view()
+        if not self._mirror.connected:
+            # Not attached yet; the mirror throttles its own retries. (Not
+            # ``meta``: that is a copy of the header, made on every access.)
+            self._mirror.connect(self._shmem_name)
 
         shape = describe_mirror(self._mirror, label_fields=self._label_fields)
         if shape is None or shape.srate <= 0:
@@ -230,11 +238,29 @@ class ShmemSweepWidget(QtWidgets.QWidget):
             return
 
         self._apply_shape(shape)
+        self._drain(shape)
+        self.on_frame(shape)
 
-        if samples is not None and samples.size:
-            self._sweep.push_data(np.ascontiguousarray(flatten_for_plot(samples, shape), dtype=np.float32))
+    def _drain(self, shape: StreamShape) -> None:
+        """Push everything new in the ring to the plot, without allocating.
 
-        self.on_frame(shape)
+        Samples are read straight into a float32 scratch block already in the
+        plot's layout (the one flatten_for_plot produces), so the read is the
+        only copy and nothing is allocated per tick. The block holds a few
+        ticks' worth; a backlog larger than that is pushed in several pieces.
+        """
+        # The trailing shape flatten_for_plot would produce.
+        width = len(shape.metric.labels) if shape.metric is not None else None
+        tail = (shape.n_channels,) if width is None else (shape.n_channels, width)
+        if self._scratch is None or self._scratch.shape[1:] != tail:
+            n_rows = max(1, int(np.ceil(SCRATCH_TICKS * shape.srate / self._poll_hz)))
+            self._scratch = np.empty((n_rows,) + tail, dtype=np.float32)
+        while True:
+            n, _overflow, _n_lost = self._mirror.read_into(self._scratch)
+            if n:
+                self._sweep.push_data(self._scratch[:n])
+            if n < self._scratch.shape[0]:
+                break
 
     def _apply_shape(self, shape: StreamShape) -> None:
         """Build the plot, or reconfigure it if the stream changed underneath."""
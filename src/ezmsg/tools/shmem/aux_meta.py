@@ -168,7 +168,18 @@ def _axis_equal(a: typing.Any, b: typing.Any) -> bool:
     return bool(np.array_equal(a_data, b_data))
 
 
-def axes_equal(a: typing.Mapping[str, typing.Any], b: typing.Mapping[str, typing.Any]) -> bool:
+def _axis_static_equal(a: typing.Any, b: typing.Any) -> bool:
+    """Equality of just what :func:`axis_to_plain` keeps with ``static_only``."""
+    if hasattr(a, "data") != hasattr(b, "data") or getattr(a, "unit", "") != getattr(b, "unit", ""):
+        return False
+    return list(a.dims) == list(b.dims) if hasattr(a, "data") else a.gain == b.gain
+
+
+def axes_equal(
+    a: typing.Mapping[str, typing.Any],
+    b: typing.Mapping[str, typing.Any],
+    static_axis: typing.Optional[str] = None,
+) -> bool:
     """Cheap "have the axes changed?" test, for the per-message hot path.
 
     Identity is checked before value at every level, which is what makes this
@@ -176,6 +187,10 @@ def axes_equal(a: typing.Mapping[str, typing.Any], b: typing.Mapping[str, typing
     the *same object* through, so the common case costs one pointer comparison
     per axis. An element-wise comparison happens only when a producer rebuilt an
     axis -- rare, and precisely the case we must not get wrong.
+
+    ``static_axis`` names an axis compared only on what :func:`encode_aux` keeps
+    of it -- the buffered axis, which is rebuilt with a new offset (or new
+    coordinates) every message and would otherwise never compare equal.
     """
     if a is b:
         return True
@@ -187,7 +202,10 @@ def axes_equal(a: typing.Mapping[str, typing.Any], b: typing.Mapping[str, typing
             continue
         if type(av) is not type(bv):
             return False
-        if not _axis_equal(av, bv):
+        if name == static_axis:
+            if not _axis_static_equal(av, bv):
+                return False
+        elif not _axis_equal(av, bv):
             return False
     return True
 
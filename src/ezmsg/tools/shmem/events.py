@@ -0,0 +1,298 @@
+"""A shared-memory ring of sparse, timestamped events: markers, spike times, annotations.
+
+ShMemCircBuff's ring holds a fixed frame per sample at a known rate, which is
+the wrong shape for a stream of occasional events with a label each. This sink
+holds them as fixed-size records instead -- ``(time, code, label)``, see
+``EVENT_RECORD_DTYPE`` -- so a reader in another process gets thousands per
+second without a pickle per event.
+
+Labels are interned: each distinct label is written once to an append-only
+string table, and a record carries the label's byte offset there. A message
+whose data is numeric (spike channel indices, trigger codes) puts its values in
+``code`` and no label; one whose data is text gets each label's intern index as
+its code, so a reader can compare codes without decoding strings.
+
+Segments: the header at ``shorten_shmem_name(shmem_name)``, then per
+generation the record ring at ``.../events{generation}`` and the table at
+``.../labels{generation}``. The generation changes only when the settings do,
+and a new one starts empty. Ring updates use the same ``write_seq`` protocol as
+ShMemCircBuff (see .shmem), with ``records_written`` in place of
+``samples_written``. The table needs no protection: it only grows, and an
+offset is written to a record only after the label's bytes and ``table_used``.
+
+Read it with :class:`.events_mirror.EventMirror`.
+"""
+
+import ctypes
+import typing
+from multiprocessing.shared_memory import SharedMemory
+
+import ezmsg.core as ez
+import numpy as np
+import numpy.typing as npt
+from ezmsg.util.messages.axisarray import AxisArray
+
+from .notify import Ringer
+from .shmem import CACHE_LINE, _persist_create_shmem, _unlink_shmem, shorten_shmem_name, store_wrapped
+
+# "EZEV", in the same place as ShmemArrMeta's magic, so neither header is ever
+# mistaken for the other.
+EVENT_META_MAGIC = 0x455A4556
+
+# Bumped on any change to EventRingMeta._fields_, EVENT_RECORD_DTYPE or the table format.
+EVENT_META_STRUCT_VERSION = 1
+
+# One record per event. ``label`` is the byte offset of the event's label in the
+# string table, or NO_LABEL.
+EVENT_RECORD_DTYPE = np.dtype([("time", "<f8"), ("code", "<i8"), ("label", "<i8")])
+NO_LABEL = -1
+
+# Each table entry is the label's UTF-8 length as a little-endian u16, then its
+# bytes. Longer labels are truncated.
+LABEL_LEN_BYTES = 2
+MAX_LABEL_BYTES = 0xFFFF
+
+
+def events_shmem_name(shmem_name: str, generation: int) -> str:
+    return f"{shmem_name}/events{generation}"
+
+
+def labels_shmem_name(shmem_name: str, generation: int) -> str:
+    return f"{shmem_name}/labels{generation}"
+
+
+class EventRingMeta(ctypes.Structure):
+    """Header of an event ring. Laid out like ShmemArrMeta: identification, then the hot line alone."""
+
+    _pack_ = 1
+    _fields_ = [
+        ("magic", ctypes.c_uint32),
+        ("struct_version", ctypes.c_uint32),
+        # False until the first generation's segments exist.
+        ("bvalid", ctypes.c_bool),
+        # Records the ring holds, and bytes the string table holds.
+        ("capacity", ctypes.c_uint32),
+        ("table_bytes", ctypes.c_uint32),
+        ("generation", ctypes.c_uint32),
+        ("_pad0", ctypes.c_byte * (CACHE_LINE - 21)),
+        # -- Line 1: written per message.
+        ("write_seq", ctypes.c_uint64),
+        # Total records written this generation; the next goes in slot
+        # records_written % capacity.
+        ("records_written", ctypes.c_uint64),
+        # Bytes of the string table in use. Entries below it are complete.
+        ("table_used", ctypes.c_uint32),
+        # Events whose label did not fit in the table, and were written without one.
+        # Their code is NO_LABEL too.
+        ("labels_dropped", ctypes.c_uint64),
+        ("_pad1", ctypes.c_byte * (CACHE_LINE - 28)),
+    ]
+
+
+class EventRingSettings(ez.Settings):
+    shmem_name: typing.Optional[str]
+    # Records held; the oldest are overwritten first.
+    capacity: int = 65536
+    # Size of the string table. Labels are interned, so this bounds the number
+    # of *distinct* labels per generation, not events.
+    table_bytes: int = 1 << 20
+    # The axis giving each event's time. Every sample along it is one event,
+    # whose first value is its code or label.
+    axis: str = "time"
+    # Wake readers blocked in EventMirror.wait after every write (see .notify).
+    notify: bool = True
+
+
+class EventRingState(ez.State):
+    meta_shmem: typing.Optional[SharedMemory] = None
+    meta_struct: typing.Optional[EventRingMeta] = None
+    records_shmem: typing.Optional[SharedMemory] = None
+    records_arr: typing.Optional[npt.NDArray] = None
+    table_shmem: typing.Optional[SharedMemory] = None
+    table_arr: typing.Optional[npt.NDArray] = None
+    # label -> (code, offset) of each label interned this generation.
+    interned: typing.Optional[typing.Dict[str, typing.Tuple[int, int]]] = None
+    # Whether we have said that the table is full, so we say it once.
+    warned_table_full: bool = False
+    ringer: typing.Optional[Ringer] = None
+
+
+class EventRing(ez.Unit):
+    """Publish a stream of events to shared memory. See module docstring."""
+
+    SETTINGS = EventRingSettings
+    STATE = EventRingState
+
+    INPUT_SIGNAL = ez.InputStream(AxisArray)
+    INPUT_SETTINGS = ez.InputStream(EventRingSettings)
+
+    async def initialize(self) -> None:
+        self._cleanup_rings()
+        self._cleanup_meta()
+        self._reset_meta()
+        self._reset_rings()
+
+    @ez.subscriber(INPUT_SETTINGS)
+    def on_settings(self, msg: EventRingSettings) -> None:
+        b_reset_meta = msg.shmem_name != self.SETTINGS.shmem_name
+        b_reset_rings = b_reset_meta or (msg.capacity, msg.table_bytes) != (
+            self.SETTINGS.capacity,
+            self.SETTINGS.table_bytes,
+        )
+        b_reset_ringer = msg.notify != self.SETTINGS.notify
+        self.apply_settings(msg)
+        if b_reset_rings:
+            self._cleanup_rings()
+        if b_reset_meta:
+            self._cleanup_meta()
+            self._reset_meta()
+        elif b_reset_ringer:
+            if self.STATE.ringer is not None:
+                self.STATE.ringer.close()
+            self.STATE.ringer = Ringer(shorten_shmem_name(self.SETTINGS.shmem_name)) if msg.notify else None
+        if b_reset_rings:
+            self._reset_rings()
+
+    async def shutdown(self) -> None:
+        self._cleanup_rings()
+        self._cleanup_meta()
+
+    def _reset_meta(self) -> None:
+        short_name = shorten_shmem_name(self.SETTINGS.shmem_name)
+        self.STATE.meta_shmem = _persist_create_shmem(
+            short_name, ctypes.sizeof(EventRingMeta), purpose="event ring header"
+        )
+        meta = self.STATE.meta_struct = EventRingMeta.from_buffer(self.STATE.meta_shmem.buf)
+        meta.magic = EVENT_META_MAGIC
+        meta.struct_version = EVENT_META_STRUCT_VERSION
+        meta.bvalid = False
+        meta.generation = 0
+        if self.SETTINGS.notify:
+            self.STATE.ringer = Ringer(short_name)
+
+    def _cleanup_meta(self) -> None:
+        self.STATE.meta_struct = None
+        if self.STATE.ringer is not None:
+            self.STATE.ringer.close()
+            self.STATE.ringer = None
+        if self.STATE.meta_shmem is not None:
+            _unlink_shmem(self.STATE.meta_shmem)
+        self.STATE.meta_shmem = None
+
+    def _reset_rings(self) -> None:
+        """Start a new, empty generation of the record ring and string table."""
+        meta = self.STATE.meta_struct
+        generation = meta.generation + 1
+        name = self.SETTINGS.shmem_name
+        self.STATE.records_shmem = _persist_create_shmem(
+            shorten_shmem_name(events_shmem_name(name, generation)),
+            self.SETTINGS.capacity * EVENT_RECORD_DTYPE.itemsize,
+            purpose=f"event ring gen {generation} ({self.SETTINGS.capacity} records)",
+        )
+        self.STATE.records_arr = np.ndarray(
+            (self.SETTINGS.capacity,), dtype=EVENT_RECORD_DTYPE, buffer=self.STATE.records_shmem.buf[:]
+        )
+        self.STATE.table_shmem = _persist_create_shmem(
+            shorten_shmem_name(labels_shmem_name(name, generation)),
+            self.SETTINGS.table_bytes,
+            purpose=f"event label table gen {generation}",
+        )
+        self.STATE.table_arr = np.ndarray(
+            (self.SETTINGS.table_bytes,), dtype=np.uint8, buffer=self.STATE.table_shmem.buf[:]
+        )
+        self.STATE.interned = {}
+        self.STATE.warned_table_full = False
+
+        meta.bvalid = False
+        meta.capacity = self.SETTINGS.capacity
+        meta.table_bytes = self.SETTINGS.table_bytes
+        meta.write_seq += 1
+        meta.records_written = 0
+        meta.table_used = 0
+        meta.labels_dropped = 0
+        meta.generation = generation
+        meta.write_seq += 1
+        meta.bvalid = True
+        self._notify()
+
+    def _cleanup_rings(self) -> None:
+        if self.STATE.meta_struct is not None:
+            self.STATE.meta_struct.bvalid = False
+        self.STATE.records_arr = None
+        self.STATE.table_arr = None
+        for shm in (self.STATE.records_shmem, self.STATE.table_shmem):
+            if shm is not None:
+                _unlink_shmem(shm)
+        self.STATE.records_shmem = None
+        self.STATE.table_shmem = None
+        self.STATE.interned = None
+
+    def _notify(self) -> None:
+        if self.STATE.ringer is not None:
+            self.STATE.ringer.ring()
+
+    def _intern(self, label: str) -> typing.Tuple[int, int]:
+        """``(code, offset)`` of ``label``, appending it to the table on first sight."""
+        entry = self.STATE.interned.get(label)
+        if entry is not None:
+            return entry
+        meta = self.STATE.meta_struct
+        encoded = label.encode("utf-8")[:MAX_LABEL_BYTES]
+        offset = int(meta.table_used)
+        end = offset + LABEL_LEN_BYTES + len(encoded)
+        if end > self.STATE.table_arr.shape[0]:
+            # Not interned, so a later occurrence tries again -- and fails again
+            # until the generation changes.
+            meta.labels_dropped += 1
+            if not self.STATE.warned_table_full:
+                self.STATE.warned_table_full = True
+                ez.logger.warning(
+                    f"EventRing {self.SETTINGS.shmem_name!r}: label table full ({meta.table_bytes} bytes); "
+                    "new labels are written without one. Raise table_bytes."
+                )
+            return NO_LABEL, NO_LABEL
+        self.STATE.table_arr[offset : offset + LABEL_LEN_BYTES] = np.frombuffer(
+            len(encoded).to_bytes(LABEL_LEN_BYTES, "little"), np.uint8
+        )
+        self.STATE.table_arr[offset + LABEL_LEN_BYTES : end] = np.frombuffer(encoded, np.uint8)
+        # Published only once the bytes are in place.
+        meta.table_used = end
+        entry = self.STATE.interned[label] = (len(self.STATE.interned), offset)
+        return entry
+
+    @ez.subscriber(INPUT_SIGNAL)
+    async def on_message(self, msg: AxisArray):
+        self._write_events(msg)
+
+    def _write_events(self, msg: AxisArray) -> None:
+        if self.STATE.records_arr is None:
+            return
+        axis = msg.axes[self.SETTINGS.axis]
+        values = np.moveaxis(np.asarray(msg.data), msg.get_axis_idx(self.SETTINGS.axis), 0)
+        n = values.shape[0]
+        if not n:
+            return
+        values = values.reshape(n, -1)[:, 0]
+
+        records = np.empty(n, dtype=EVENT_RECORD_DTYPE)
+        if hasattr(axis, "data"):
+            records["time"] = axis.data
+        else:
+            records["time"] = axis.offset + axis.gain * np.arange(n)
+        if values.dtype.kind in "biuf":
+            records["code"] = values
+            records["label"] = NO_LABEL
+        else:
+            records["code"], records["label"] = zip(*(self._intern(str(v)) for v in values))
+
+        meta = self.STATE.meta_struct
+        ring = self.STATE.records_arr
+        capacity = ring.shape[0]
+        # Only the newest capacity's worth can be held.
+        kept = records[-capacity:]
+        first = meta.records_written + n - kept.shape[0]
+        meta.write_seq += 1
+        store_wrapped(ring, first % capacity, kept)
+        meta.records_written += n
+        meta.write_seq += 1
+        self._notify()
@@ -0,0 +1,257 @@
+"""Read an :class:`.events.EventRing` from another process."""
+
+import bisect
+import time
+import typing
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import numpy.typing as npt
+
+from .events import (
+    EVENT_META_MAGIC,
+    EVENT_META_STRUCT_VERSION,
+    EVENT_RECORD_DTYPE,
+    LABEL_LEN_BYTES,
+    NO_LABEL,
+    EventRingMeta,
+    events_shmem_name,
+    labels_shmem_name,
+)
+from .notify import Doorbell
+from .shmem import ShmemVersionError, shorten_shmem_name
+from .shmem_mirror import CONNECT_RETRY_INTERVAL, POLL_INTERVAL, WAIT_SLICE, seqlock_read
+
+
+class EventMirror:
+    """A reader of one event ring: consuming reads, time-range queries and label lookup.
+
+    Connects lazily and reconnects by itself, like EZShmMirror: every call
+    first (re)maps whatever the writer has published, and returns nothing
+    until there is something to read. A new writer generation restarts the
+    consuming position. Records are always returned as copies, checked for
+    tearing: any the writer overwrote while they were being copied are dropped.
+    """
+
+    def __init__(self, shmem_name: typing.Optional[str] = None):
+        self._shmem_name: typing.Optional[str] = None
+        self._meta_shmem: typing.Optional[SharedMemory] = None
+        self._meta: typing.Optional[EventRingMeta] = None
+        self._records_shmem: typing.Optional[SharedMemory] = None
+        self._records: typing.Optional[npt.NDArray] = None
+        self._table_shmem: typing.Optional[SharedMemory] = None
+        self._table: typing.Optional[npt.NDArray] = None
+        # The generation the segments above belong to.
+        self._generation: typing.Optional[int] = None
+        # Decoded labels by table offset. The table only grows within a
+        # generation, so an entry never goes stale.
+        self._labels: typing.Dict[int, str] = {}
+        # Position of the consuming read, as an absolute record count.
+        self._read_pos: typing.Optional[int] = None
+        self._n_lost = 0
+        self._doorbell: typing.Optional[Doorbell] = None
+        self._doorbell_ok = True
+        self._last_connect_try = 0.0
+        if shmem_name is not None:
+            self.connect(shmem_name)
+
+    def __del__(self):
+        self.disconnect()
+
+    def connect(self, name: str) -> None:
+        if name != self._shmem_name:
+            self.disconnect()
+        self._shmem_name = name
+        if name is None or self._meta is not None:
+            return
+        if (time.time() - self._last_connect_try) <= CONNECT_RETRY_INTERVAL:
+            return
+        self._last_connect_try = time.time()
+        try:
+            self._meta_shmem = SharedMemory(shorten_shmem_name(name), create=False)
+        except FileNotFoundError:
+            return
+        self._meta = EventRingMeta.from_buffer(self._meta_shmem.buf)
+        magic, version = int(self._meta.magic), int(self._meta.struct_version)
+        if magic != EVENT_META_MAGIC or version != EVENT_META_STRUCT_VERSION:
+            self._cleanup_meta()
+            raise ShmemVersionError(
+                f"Shared memory segment for {name!r} is not an event ring this build can read "
+                f"(magic 0x{magic:08X}, version {version}; expected 0x{EVENT_META_MAGIC:08X}, version "
+                f"{EVENT_META_STRUCT_VERSION}). The writer and reader must be the same ezmsg-tools version."
+            )
+
+    def disconnect(self) -> None:
+        self._cleanup_rings()
+        self._cleanup_meta()
+        if self._doorbell is not None:
+            self._doorbell.close()
+            self._doorbell = None
+        self._shmem_name = None
+
+    def _cleanup_meta(self) -> None:
+        self._meta = None
+        if self._meta_shmem is not None:
+            try:
+                self._meta_shmem.close()
+            except Exception as e:
+                print(f"Error closing event ring header: {e}")
+        self._meta_shmem = None
+
+    def _cleanup_rings(self) -> None:
+        self._records = None
+        self._table = None
+        for shm in (self._records_shmem, self._table_shmem):
+            if shm is not None:
+                try:
+                    shm.close()
+                except Exception as e:
+                    print(f"Error closing event ring: {e}")
+        self._records_shmem = None
+        self._table_shmem = None
+        self._generation = None
+        self._labels = {}
+        self._read_pos = None
+
+    def _ensure_rings(self) -> bool:
+        """(Re)connect as needed. True once we hold the current generation's segments."""
+        if self._meta is None:
+            self.connect(self._shmem_name)
+        if self._meta is None or not self._meta.bvalid:
+            return False
+        generation = int(self._meta.generation)
+        if generation == self._generation:
+            return True
+        self._cleanup_rings()
+        try:
+            self._records_shmem = SharedMemory(
+                shorten_shmem_name(events_shmem_name(self._shmem_name, generation)), create=False
+            )
+            self._table_shmem = SharedMemory(
+                shorten_shmem_name(labels_shmem_name(self._shmem_name, generation)), create=False
+            )
+        except FileNotFoundError:
+            # Replaced again already; the next call retries.
+            self._cleanup_rings()
+            return False
+        capacity, table_bytes = int(self._meta.capacity), int(self._meta.table_bytes)
+        self._records = np.ndarray((capacity,), dtype=EVENT_RECORD_DTYPE, buffer=self._records_shmem.buf[:])
+        self._table = np.ndarray((table_bytes,), dtype=np.uint8, buffer=self._table_shmem.buf[:])
+        self._generation = generation
+        return True
+
+    def _snapshot(self) -> typing.Optional[typing.Tuple[int, int, int]]:
+        """A consistent ``(generation, records written, oldest held)``; see EZShmMirror._snapshot."""
+
+        def read(meta: EventRingMeta) -> typing.Tuple[int, int, int]:
+            generation, total = int(meta.generation), int(meta.records_written)
+            return generation, total, max(0, total - int(meta.capacity))
+
+        return seqlock_read(self._meta, read)
+
+    def _copy(self, start: int, stop: int) -> npt.NDArray:
+        """Records ``start`` to ``stop`` (absolute), less any overwritten during the copy."""
+        out = np.take(self._records, np.arange(start, stop), mode="wrap")
+        snap = self._snapshot()
+        if snap is None or snap[0] != self._generation:
+            return out[:0]
+        return out[max(0, snap[2] - start) :]
+
+    @property
+    def records_written(self) -> int:
+        """Events written this generation, held or not. 0 if not connected."""
+        if not self._ensure_rings():
+            return 0
+        snap = self._snapshot()
+        return 0 if snap is None else snap[1]
+
+    @property
+    def n_lost(self) -> int:
+        """Events the most recent :meth:`read` skipped because the writer had overwritten them."""
+        return self._n_lost
+
+    def read(self, n: typing.Optional[int] = None) -> typing.Tuple[npt.NDArray, bool]:
+        """The next ``n`` unread events (all of them if None), and whether any were lost.
+
+        The first read after connecting starts from the oldest event held.
+        """
+        self._n_lost = 0
+        empty = np.empty(0, dtype=EVENT_RECORD_DTYPE)
+        if not self._ensure_rings():
+            return empty, False
+        snap = self._snapshot()
+        if snap is None or snap[0] != self._generation:
+            return empty, False
+        _, total, oldest = snap
+        if self._read_pos is None:
+            self._read_pos = oldest
+        if self._read_pos < oldest:
+            self._n_lost += oldest - self._read_pos
+            self._read_pos = oldest
+        stop = total if n is None else min(total, self._read_pos + n)
+        out = self._copy(self._read_pos, stop)
+        self._n_lost += (stop - self._read_pos) - out.shape[0]
+        self._read_pos = stop
+        return out, self._n_lost > 0
+
+    def between(self, t_start: float, t_stop: float) -> npt.NDArray:
+        """Held events with ``t_start <= time < t_stop``. Does not move the consuming position.
+
+        Found by bisecting the ring, so it costs O(log capacity) plus the copy of
+        the result, and assumes the writer's timestamps never decrease.
+        """
+        if not self._ensure_rings():
+            return np.empty(0, dtype=EVENT_RECORD_DTYPE)
+        snap = self._snapshot()
+        if snap is None or snap[0] != self._generation:
+            return np.empty(0, dtype=EVENT_RECORD_DTYPE)
+        _, total, oldest = snap
+        times, capacity = self._records["time"], self._records.shape[0]
+        held = range(oldest, total)
+        start = oldest + bisect.bisect_left(held, t_start, key=lambda i: times[i % capacity])
+        stop = oldest + bisect.bisect_left(held, t_stop, key=lambda i: times[i % capacity])
+        out = self._copy(start, stop)
+        # Events torn from the front may have been replaced by later ones.
+        return out[out["time"] >= t_start]
+
+    def labels(self, records: npt.NDArray) -> typing.List[typing.Optional[str]]:
+        """The label of each record (None for a record without one), from the current generation's table."""
+        result = []
+        for offset in records["label"].tolist():
+            if offset == NO_LABEL or self._table is None:
+                result.append(None)
+                continue
+            label = self._labels.get(offset)
+            if label is None:
+                n = int.from_bytes(self._table[offset : offset + LABEL_LEN_BYTES].tobytes(), "little")
+                start = offset + LABEL_LEN_BYTES
+                label = self._labels[offset] = self._table[start : start + n].tobytes().decode("utf-8", "replace")
+            result.append(label)
+        return result
+
+    def wait(self, timeout: typing.Optional[float] = None) -> bool:
+        """Block until there is an unread event. Returns False if ``timeout`` seconds pass first.
+
+        Sleeps on a doorbell (see .notify) where the platform has them, and
+        polls every POLL_INTERVAL elsewhere.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self._ensure_rings():
+                snap = self._snapshot()
+                if snap is not None and snap[1] > (snap[2] if self._read_pos is None else self._read_pos):
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            if self._doorbell is None and self._doorbell_ok and self._shmem_name is not None:
+                try:
+                    self._doorbell = Doorbell(shorten_shmem_name(self._shmem_name))
+                except OSError as e:
+                    print(f"Could not create a doorbell, falling back to polling: {e}")
+                    self._doorbell_ok = False
+            limit = POLL_INTERVAL if self._doorbell is None or self._meta is None else WAIT_SLICE
+            wait = limit if deadline is None else max(0.0, min(limit, deadline - time.monotonic()))
+            if self._doorbell is None:
+                time.sleep(wait)
+            else:
+                self._doorbell.wait(wait)
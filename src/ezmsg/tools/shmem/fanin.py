@@ -0,0 +1,285 @@
+"""Merge several time-aligned streams into one shmem link, concatenated along their channel axis.
+
+Two headstages recorded as separate ezmsg streams otherwise reach a reader as
+two links, which it has to map, read and align itself on every update.
+ShMemFanIn does that once, in the writer: each input's samples wait in a
+pending buffer until every input has caught up, and the aligned frames are
+written to a single ShMemCircBuff ring as one stream with ``n_inputs`` channel
+groups side by side. The combined channel axis is published through the usual
+metadata blob (see .aux_meta), so an EZShmMirror needs nothing new.
+
+Frames are paired either by sample index (FanInAlign.INDEX) or by position
+along the buffered axis (FanInAlign.TIME). The merged message takes its
+buffered axis, other axes, attrs and key from input 0.
+"""
+
+import asyncio
+import typing
+from enum import Enum
+
+import ezmsg.core as ez
+import numpy as np
+import numpy.typing as npt
+from ezmsg.util.messages.axisarray import AxisArray, CoordinateAxis, LinearAxis
+
+from .shmem import OverflowPolicy, ShMemCircBuff, ShMemCircBuffSettings, ShMemCircBuffState
+
+# Inputs a ShMemFanIn can have; one INPUT_SIGNAL_<i> stream each.
+MAX_INPUTS = 4
+
+
+class FanInAlign(str, Enum):
+    """How ShMemFanIn decides which samples of its inputs make up one frame."""
+
+    # Sample k of every input, counted from the first message of each. Right
+    # for inputs clocked together that never drop samples.
+    INDEX = "index"
+    # Samples at the same position along the buffered axis, to within
+    # time_tolerance. Leading samples with no partner in another input -- a
+    # late start, or a gap -- are dropped.
+    TIME = "time"
+
+
+class ShMemFanInSettings(ShMemCircBuffSettings):
+    # Inputs to merge, on INPUT_SIGNAL_0 onward; at most MAX_INPUTS.
+    n_inputs: int = 2
+    align: FanInAlign = FanInAlign.INDEX
+    # Axis to concatenate along. Every input must have it; all other
+    # dimensions must match input 0's.
+    ch_axis: str = "ch"
+    # FanInAlign.TIME: how far apart two samples may be and still be paired.
+    # None uses half of input 0's sample period.
+    time_tolerance: typing.Optional[float] = None
+    # Most samples held for one input while waiting on the others. Beyond it the
+    # oldest are dropped, so a stalled input costs data rather than memory.
+    max_pending: int = 1 << 16
+
+
+class ShMemFanInState(ShMemCircBuffState):
+    # Per input: its unmerged samples, buffered axis first in input 0's dim
+    # order, with their positions along the buffered axis.
+    pending_data: typing.Optional[list] = None
+    pending_times: typing.Optional[list] = None
+    # Per input: the newest message, for its channel axis and (input 0) everything else.
+    templates: typing.Optional[list] = None
+    # The per-input channel axes last combined and the result, reused while they
+    # are unchanged -- which keeps the ring's metadata check an identity compare.
+    ch_sources: typing.Optional[tuple] = None
+    ch_combined: typing.Optional[CoordinateAxis] = None
+    # Inputs we have warned about, so each warning is said once.
+    warned_inputs: typing.Optional[set] = None
+    # Taken around each merged write, so frames merged first are written first.
+    write_lock: typing.Optional[asyncio.Lock] = None
+
+
+class ShMemFanIn(ShMemCircBuff):
+    """A ShMemCircBuff fed by several inputs merged along ``ch_axis``. See module docstring.
+
+    INPUT_SIGNAL still writes its messages as they are, bypassing the merge.
+    """
+
+    SETTINGS = ShMemFanInSettings
+    STATE = ShMemFanInState
+
+    INPUT_SIGNAL_0 = ez.InputStream(AxisArray)
+    INPUT_SIGNAL_1 = ez.InputStream(AxisArray)
+    INPUT_SIGNAL_2 = ez.InputStream(AxisArray)
+    INPUT_SIGNAL_3 = ez.InputStream(AxisArray)
+
+    async def initialize(self) -> None:
+        if not 1 <= self.SETTINGS.n_inputs <= MAX_INPUTS:
+            raise ValueError(f"n_inputs must be between 1 and {MAX_INPUTS}, got {self.SETTINGS.n_inputs}")
+        await super().initialize()
+        self._reset_pending()
+
+    @ez.subscriber(ShMemCircBuff.INPUT_SETTINGS)
+    def on_settings(self, msg: ShMemFanInSettings) -> None:
+        fields = ("n_inputs", "align", "ch_axis", "axis")
+        b_reset_pending = any(getattr(msg, f) != getattr(self.SETTINGS, f) for f in fields)
+        super().on_settings(msg)
+        if b_reset_pending:
+            self._reset_pending()
+
+    def _reset_pending(self) -> None:
+        n = self.SETTINGS.n_inputs
+        self.STATE.pending_data = [None] * n
+        self.STATE.pending_times = [None] * n
+        self.STATE.templates = [None] * n
+        self.STATE.ch_sources = None
+        self.STATE.ch_combined = None
+        self.STATE.warned_inputs = set()
+
+    @ez.subscriber(INPUT_SIGNAL_0)
+    async def on_input_0(self, msg: AxisArray) -> None:
+        await self._on_input(0, msg)
+
+    @ez.subscriber(INPUT_SIGNAL_1)
+    async def on_input_1(self, msg: AxisArray) -> None:
+        await self._on_input(1, msg)
+
+    @ez.subscriber(INPUT_SIGNAL_2)
+    async def on_input_2(self, msg: AxisArray) -> None:
+        await self._on_input(2, msg)
+
+    @ez.subscriber(INPUT_SIGNAL_3)
+    async def on_input_3(self, msg: AxisArray) -> None:
+        await self._on_input(3, msg)
+
+    async def _on_input(self, index: int, msg: AxisArray) -> None:
+        if index >= self.SETTINGS.n_inputs or not self._add_pending(index, msg):
+            return
+        merged = self._merge()
+        if merged is None:
+            return
+        if self.STATE.write_lock is None:
+            self.STATE.write_lock = asyncio.Lock()
+        # Nothing awaits between the merge and here, and the lock is fair, so
+        # frames reach the ring in the order they were merged.
+        async with self.STATE.write_lock:
+            if self.SETTINGS.overflow == OverflowPolicy.BLOCK:
+                await self._wait_for_room(merged)
+            await self._run_writer(self._write_message, merged)
+
+    def _warn_once(self, index: int, text: str) -> None:
+        if index not in self.STATE.warned_inputs:
+            self.STATE.warned_inputs.add(index)
+            ez.logger.warning(f"ShMemFanIn {self.SETTINGS.shmem_name!r} input {index}: {text}")
+
+    @staticmethod
+    def _sample_times(axis: typing.Any, n: int) -> npt.NDArray:
+        if hasattr(axis, "data"):
+            return np.asarray(axis.data, dtype=np.float64)[:n]
+        return axis.offset + np.arange(n) * axis.gain
+
+    def _add_pending(self, index: int, msg: AxisArray) -> bool:
+        """Queue ``msg``'s samples for input ``index``. False if it cannot be merged."""
+        axis, ch_axis = self.SETTINGS.axis, self.SETTINGS.ch_axis
+        if not isinstance(msg, AxisArray) or axis not in msg.dims or ch_axis not in msg.dims:
+            self._warn_once(index, f"messages need both {axis!r} and {ch_axis!r} dims; ignoring them.")
+            return False
+        reference = msg if index == 0 else self.STATE.templates[0]
+        if reference is None:
+            # Nothing to check the layout against until input 0 has spoken.
+            reference = msg
+        if sorted(msg.dims) != sorted(reference.dims):
+            self._warn_once(index, f"dims {msg.dims} do not match input 0's {reference.dims}; ignoring them.")
+            return False
+        # Buffered axis first, then input 0's order.
+        order = [axis] + [d for d in reference.dims if d != axis]
+        data = np.moveaxis(msg.data, [msg.get_axis_idx(d) for d in order], range(len(order)))
+        ch_idx = order.index(ch_axis)
+
+        frame_shape = data.shape[1:ch_idx] + data.shape[ch_idx + 1 :]
+        pending = self.STATE.pending_data[index]
+        ref = pending if index == 0 else self.STATE.pending_data[0]
+        if ref is not None and ref.shape[1:ch_idx] + ref.shape[ch_idx + 1 :] != frame_shape:
+            if index != 0:
+                self._warn_once(index, f"frame shape {data.shape[1:]} does not match input 0's; ignoring it.")
+                return False
+            # Input 0 changed shape: whatever the others queued no longer fits it.
+            self.STATE.pending_data = [None] * self.SETTINGS.n_inputs
+            self.STATE.pending_times = [None] * self.SETTINGS.n_inputs
+            pending = None
+        if pending is not None and pending.shape[ch_idx] != data.shape[ch_idx]:
+            # This input's channel count changed; start it over.
+            pending = None
+
+        times = self._sample_times(msg.axes.get(axis, LinearAxis(gain=1.0, offset=0.0)), data.shape[0])
+        if pending is None:
+            # Copied: on_message's data is only ours until we return.
+            pending, pending_t = data.copy(), times
+        else:
+            pending = np.concatenate((pending, data))
+            pending_t = np.concatenate((self.STATE.pending_times[index], times))
+        excess = pending.shape[0] - self.SETTINGS.max_pending
+        if excess > 0:
+            self._warn_once(index, f"more than {self.SETTINGS.max_pending} samples ahead of the others; dropping.")
+            pending, pending_t = pending[excess:], pending_t[excess:]
+        self.STATE.pending_data[index] = pending
+        self.STATE.pending_times[index] = pending_t
+        self.STATE.templates[index] = msg
+        return True
+
+    def _tolerance(self) -> float:
+        if self.SETTINGS.time_tolerance is not None:
+            return self.SETTINGS.time_tolerance
+        axis = self.STATE.templates[0].axes.get(self.SETTINGS.axis)
+        if axis is not None and not hasattr(axis, "data"):
+            return 0.5 * axis.gain
+        t = self.STATE.pending_times[0]
+        return 0.5 * float(np.median(np.diff(t))) if t.shape[0] > 1 else 0.0
+
+    def _align_heads(self) -> bool:
+        """FanInAlign.TIME: drop leading samples until every input starts at the same time. False if one runs out."""
+        data, times = self.STATE.pending_data, self.STATE.pending_times
+        tol = self._tolerance()
+        while True:
+            if any(t is None or not t.shape[0] for t in times):
+                return False
+            heads = [t[0] for t in times]
+            t_ref = max(heads)
+            if max(heads) - min(heads) <= tol:
+                return True
+            for i, t in enumerate(times):
+                n = int(np.searchsorted(t, t_ref - tol))
+                data[i], times[i] = data[i][n:], t[n:]
+
+    def _combined_ch(self, ch_idx: int) -> CoordinateAxis:
+        """The channel axis of a merged frame, rebuilt only when an input's changed."""
+        sources = tuple(msg.axes.get(self.SETTINGS.ch_axis) for msg in self.STATE.templates)
+        cached = self.STATE.ch_sources
+        if cached is not None and all(a is b for a, b in zip(sources, cached)):
+            return self.STATE.ch_combined
+        groups = []
+        for source, data in zip(sources, self.STATE.pending_data):
+            if source is not None and hasattr(source, "data"):
+                groups.append(np.asarray(source.data)[: data.shape[ch_idx]])
+            else:
+                groups.append(np.arange(data.shape[ch_idx]))
+        labels = np.concatenate(groups)
+        if len(groups) != sum(hasattr(s, "data") for s in sources) or len(np.unique(labels)) != len(labels):
+            # Label each channel with its input, so two headstages' "ch0" (or
+            # two inputs without labels) stay apart.
+            labels = np.array([f"{i}:{label}" for i, group in enumerate(groups) for label in group])
+        previous = self.STATE.ch_combined
+        if previous is None or not np.array_equal(previous.data, labels):
+            unit = next((getattr(s, "unit", "") for s in sources if s is not None), "")
+            self.STATE.ch_combined = CoordinateAxis(data=labels, dims=[self.SETTINGS.ch_axis], unit=unit)
+        self.STATE.ch_sources = sources
+        return self.STATE.ch_combined
+
+    def _merge(self) -> typing.Optional[AxisArray]:
+        """The frames every input now has, as one message, removed from the pending buffers. None if there are none."""
+        data, times = self.STATE.pending_data, self.STATE.pending_times
+        if any(d is None or not d.shape[0] for d in data):
+            return None
+        if self.SETTINGS.align == FanInAlign.TIME:
+            if not self._align_heads():
+                return None
+            n = min(d.shape[0] for d in data)
+            tol = self._tolerance()
+            for t in times[1:]:
+                # Stop at the first gap; the next merge realigns after it.
+                apart = np.flatnonzero(np.abs(t[:n] - times[0][:n]) > tol)
+                n = int(apart[0]) if apart.shape[0] else n
+        else:
+            n = min(d.shape[0] for d in data)
+
+        reference = self.STATE.templates[0]
+        axis, ch_axis = self.SETTINGS.axis, self.SETTINGS.ch_axis
+        order = [axis] + [d for d in reference.dims if d != axis]
+        ch_idx = order.index(ch_axis)
+        frames = np.concatenate([d[:n] for d in data], axis=ch_idx)
+        t = times[0][:n]
+        source = reference.axes.get(axis)
+        if source is not None and hasattr(source, "data"):
+            time_axis = CoordinateAxis(data=t, dims=[axis], unit=source.unit)
+        else:
+            gain = 1.0 if source is None else source.gain
+            time_axis = LinearAxis(gain=gain, offset=float(t[0]), unit=getattr(source, "unit", "s"))
+        axes = {**reference.axes, axis: time_axis, ch_axis: self._combined_ch(ch_idx)}
+        for i in range(len(data)):
+            data[i], times[i] = data[i][n:], times[i][n:]
+        # Back in input 0's dim order.
+        frames = np.moveaxis(frames, 0, reference.get_axis_idx(axis))
+        return AxisArray(frames, dims=list(reference.dims), axes=axes, attrs=reference.attrs, key=reference.key)
@@ -0,0 +1,324 @@
+"""Publish only the newest message -- a spectrum, a decoder's class probabilities -- for readers that want nothing else.
+
+ShMemCircBuff suits streams a reader consumes in order. For "latest frame
+wins" data that is the wrong contract: a plot of the current spectrum has no
+use for the ones it missed, yet with a ring it must keep a cursor and skip to
+the end. Here the writer keeps ``n_slots`` copies of the frame (three by
+default) and publishes each new one by advancing a counter, so a reader takes
+the newest complete frame in O(1) and can tell at once whether it has seen it.
+
+Frame k goes in slot ``k % n_slots``, and the writer starts on a slot only
+after publishing the frame before it. So slot ``c % n_slots`` is rewritten no
+sooner than once ``published`` reaches ``c + n_slots - 1``, and a reader that
+copied frame c and then finds ``published <= c + n_slots - 2`` has a whole
+frame. With three slots that gives a reader a full frame period to copy in;
+with two, none.
+
+Each slot holds a small header (``SLOT_HEADER_DTYPE``), the frame's metadata
+blob (see .aux_meta) and its data. The blob is rewritten only when the metadata
+changes, and the header's ``aux_generation`` tells a reader whether it can
+reuse what it decoded last time. The buffered axis, if the message has one,
+travels as its static descriptors in the blob and its position as the header's
+``time``.
+
+Segments: the header at ``shorten_shmem_name(shmem_name)``, the slots at
+``.../slots{generation}``. A new data shape or dtype starts a new generation.
+Read it with :class:`.latest_mirror.LatestMirror`.
+"""
+
+import ctypes
+import typing
+from multiprocessing.shared_memory import SharedMemory
+
+import ezmsg.core as ez
+import numpy as np
+import numpy.typing as npt
+from ezmsg.util.messages.axisarray import AxisArray
+
+from .aux_meta import attrs_equal, axes_equal, encode_aux
+from .notify import Ringer
+from .shmem import (
+    CACHE_LINE,
+    MAXDTYPELEN,
+    _persist_create_shmem,
+    _unlink_shmem,
+    dtype_descr,
+    dtype_from_descr,
+    shorten_shmem_name,
+)
+
+# "EZLT"; see SHMEM_META_MAGIC.
+LATEST_META_MAGIC = 0x455A4C54
+
+# Bumped on any change to LatestMeta._fields_, SLOT_HEADER_DTYPE or the slot layout.
+LATEST_META_STRUCT_VERSION = 1
+
+# Most data dimensions the header can describe.
+MAX_NDIM = 8
+
+# Per-slot header, padded to a cache line. ``frame`` is the published count of
+# the frame the slot holds.
+SLOT_HEADER_DTYPE = np.dtype(
+    {
+        "names": ["frame", "time", "aux_generation", "aux_nbytes"],
+        "formats": ["<u8", "<f8", "<u8", "<u8"],
+        "itemsize": CACHE_LINE,
+    }
+)
+
+
+def latest_slots_name(shmem_name: str, generation: int) -> str:
+    return f"{shmem_name}/slots{generation}"
+
+
+class LatestMeta(ctypes.Structure):
+    """Header of a latest-value publisher. Laid out like ShmemArrMeta: the per-frame counter alone on its line."""
+
+    _pack_ = 1
+    _fields_ = [
+        ("magic", ctypes.c_uint32),
+        ("struct_version", ctypes.c_uint32),
+        # False while there is no slots segment for the current layout.
+        ("bvalid", ctypes.c_bool),
+        ("generation", ctypes.c_uint32),
+        ("n_slots", ctypes.c_uint32),
+        ("ndim", ctypes.c_uint32),
+        # Bytes per slot, and where in a slot the blob and the data start.
+        ("slot_bytes", ctypes.c_uint64),
+        ("aux_bytes", ctypes.c_uint64),
+        ("data_offset", ctypes.c_uint64),
+        ("_pad0", ctypes.c_byte * (CACHE_LINE - 45)),
+        # -- Line 1: written per frame.
+        # Frames published this generation; the newest is in slot published % n_slots. 0: none yet.
+        ("published", ctypes.c_uint64),
+        ("_pad1", ctypes.c_byte * (CACHE_LINE - 8)),
+        ("shape", ctypes.c_uint64 * MAX_NDIM),
+        ("_dtype_bytes", ctypes.c_byte * MAXDTYPELEN),
+        ("_dtype_len", ctypes.c_uint32),
+    ]
+
+    @property
+    def dtype(self) -> np.dtype:
+        return dtype_from_descr(ctypes.string_at(self._dtype_bytes, self._dtype_len).decode("ascii"))
+
+    @dtype.setter
+    def dtype(self, value: npt.DTypeLike) -> None:
+        descr = dtype_descr(np.dtype(value)).encode("ascii")
+        if len(descr) > MAXDTYPELEN:
+            raise ValueError(f"dtype {value} needs a {len(descr)}-byte descriptor; the header holds {MAXDTYPELEN}")
+        self._dtype_len = len(descr)
+        ctypes.memmove(self._dtype_bytes, descr, len(descr))
+
+
+class ShMemLatestSettings(ez.Settings):
+    shmem_name: typing.Optional[str]
+    # Copies of the frame kept. 3 lets a reader copy for up to a frame period
+    # without tearing; 2 saves memory, but any new frame tears a copy of the
+    # last one in progress, and the reader has to retry.
+    n_slots: int = 3
+    # Room for each frame's metadata blob (see .aux_meta). A blob that does not
+    # fit is left out, and readers get the frame without axes.
+    aux_bytes: int = 1 << 16
+    # The axis whose position is carried per frame (as SLOT_HEADER_DTYPE's
+    # time) rather than in the blob. Need not be present.
+    axis: str = "time"
+    # Wake readers blocked in LatestMirror.wait after every frame (see .notify).
+    notify: bool = True
+
+
+class ShMemLatestState(ez.State):
+    meta_shmem: typing.Optional[SharedMemory] = None
+    meta_struct: typing.Optional[LatestMeta] = None
+    slots_shmem: typing.Optional[SharedMemory] = None
+    # Slot headers, as (n_slots,) SLOT_HEADER_DTYPE views, and the slots as raw bytes.
+    slot_headers: typing.Optional[npt.NDArray] = None
+    slot_bytes: typing.Optional[npt.NDArray] = None
+    # (dtype, shape) the slots are laid out for.
+    layout: typing.Optional[tuple] = None
+    # (dims, axes, attrs, key) last encoded and the blob they encoded to; see
+    # ShMemCircBuff._update_aux_if_needed.
+    last_aux_src: typing.Optional[tuple] = None
+    last_aux_blob: typing.Optional[bytes] = None
+    aux_generation: int = 0
+    # attrs keys dropped as non-plain, remembered so we warn once, not per message.
+    warned_dropped_attrs: typing.Optional[frozenset] = None
+    # Whether we have said that a blob did not fit aux_bytes, so we say it once.
+    warned_aux_full: bool = False
+    ringer: typing.Optional[Ringer] = None
+
+
+class ShMemLatest(ez.Unit):
+    """Publish the newest message to shared memory. See module docstring."""
+
+    SETTINGS = ShMemLatestSettings
+    STATE = ShMemLatestState
+
+    INPUT_SIGNAL = ez.InputStream(AxisArray)
+    INPUT_SETTINGS = ez.InputStream(ShMemLatestSettings)
+
+    async def initialize(self) -> None:
+        self._cleanup_slots()
+        self._cleanup_meta()
+        self._reset_meta()
+
+    @ez.subscriber(INPUT_SETTINGS)
+    def on_settings(self, msg: ShMemLatestSettings) -> None:
+        b_reset_meta = msg.shmem_name != self.SETTINGS.shmem_name
+        b_reset_slots = b_reset_meta or (msg.n_slots, msg.aux_bytes, msg.axis) != (
+            self.SETTINGS.n_slots,
+            self.SETTINGS.aux_bytes,
+            self.SETTINGS.axis,
+        )
+        b_reset_ringer = msg.notify != self.SETTINGS.notify
+        self.apply_settings(msg)
+        if b_reset_slots:
+            # Laid out again for the next frame, with the metadata encoded afresh.
+            self._cleanup_slots()
+            self.STATE.last_aux_src = None
+            self.STATE.last_aux_blob = None
+        if b_reset_meta:
+            self._cleanup_meta()
+            self._reset_meta()
+        elif b_reset_ringer:
+            if self.STATE.ringer is not None:
+                self.STATE.ringer.close()
+            self.STATE.ringer = Ringer(shorten_shmem_name(self.SETTINGS.shmem_name)) if msg.notify else None
+
+    async def shutdown(self) -> None:
+        self._cleanup_slots()
+        self._cleanup_meta()
+
+    def _reset_meta(self) -> None:
+        if self.SETTINGS.n_slots < 2:
+            raise ValueError(f"n_slots must be at least 2, got {self.SETTINGS.n_slots}")
+        short_name = shorten_shmem_name(self.SETTINGS.shmem_name)
+        self.STATE.meta_shmem = _persist_create_shmem(
+            short_name, ctypes.sizeof(LatestMeta), purpose="latest-frame header"
+        )
+        meta = self.STATE.meta_struct = LatestMeta.from_buffer(self.STATE.meta_shmem.buf)
+        meta.magic = LATEST_META_MAGIC
+        meta.struct_version = LATEST_META_STRUCT_VERSION
+        meta.bvalid = False
+        meta.generation = 0
+        if self.SETTINGS.notify:
+            self.STATE.ringer = Ringer(short_name)
+
+    def _cleanup_meta(self) -> None:
+        self.STATE.meta_struct = None
+        if self.STATE.ringer is not None:
+            self.STATE.ringer.close()
+            self.STATE.ringer = None
+        if self.STATE.meta_shmem is not None:
+            _unlink_shmem(self.STATE.meta_shmem)
+        self.STATE.meta_shmem = None
+
+    def _reset_slots(self, data: npt.NDArray) -> None:
+        """Lay the slots out for frames like ``data``, as a new generation."""
+        if data.ndim > MAX_NDIM:
+            raise ValueError(f"ShMemLatest holds data of at most {MAX_NDIM} dimensions, got {data.ndim}")
+        self._cleanup_slots()
+        meta = self.STATE.meta_struct
+        generation = meta.generation + 1
+        aux_bytes = -(-self.SETTINGS.aux_bytes // CACHE_LINE) * CACHE_LINE
+        data_offset = SLOT_HEADER_DTYPE.itemsize + aux_bytes
+        slot_bytes = data_offset + -(-data.nbytes // CACHE_LINE) * CACHE_LINE
+        self.STATE.slots_shmem = _persist_create_shmem(
+            shorten_shmem_name(latest_slots_name(self.SETTINGS.shmem_name, generation)),
+            self.SETTINGS.n_slots * slot_bytes,
+            purpose=f"latest-frame slots gen {generation} ({'x'.join(str(d) for d in data.shape)})",
+        )
+        slots = np.ndarray((self.SETTINGS.n_slots, slot_bytes), dtype=np.uint8, buffer=self.STATE.slots_shmem.buf[:])
+        self.STATE.slot_bytes = slots
+        self.STATE.slot_headers = slots[:, : SLOT_HEADER_DTYPE.itemsize].view(SLOT_HEADER_DTYPE)[:, 0]
+        self.STATE.layout = (data.dtype, data.shape)
+        # Every slot needs the blob written afresh.
+        self.STATE.slot_headers["aux_generation"] = 0
+
+        meta.dtype = data.dtype
+        meta.ndim = data.ndim
+        meta.shape[: data.ndim] = data.shape
+        meta.n_slots = self.SETTINGS.n_slots
+        meta.slot_bytes = slot_bytes
+        meta.aux_bytes = aux_bytes
+        meta.data_offset = data_offset
+        meta.published = 0
+        meta.generation = generation
+        meta.bvalid = True
+
+    def _cleanup_slots(self) -> None:
+        if self.STATE.meta_struct is not None:
+            self.STATE.meta_struct.bvalid = False
+        self.STATE.slot_headers = None
+        self.STATE.slot_bytes = None
+        self.STATE.layout = None
+        if self.STATE.slots_shmem is not None:
+            _unlink_shmem(self.STATE.slots_shmem)
+        self.STATE.slots_shmem = None
+
+    def _aux_blob(self, msg: AxisArray) -> bytes:
+        """The metadata blob for ``msg``, bumping STATE.aux_generation when it changed."""
+        last = self.STATE.last_aux_src
+        if last is not None:
+            last_dims, last_axes, last_attrs, last_key = last
+            if (
+                msg.key == last_key
+                and msg.dims == last_dims
+                and axes_equal(msg.axes, last_axes, static_axis=self.SETTINGS.axis)
+                and attrs_equal(msg.attrs, last_attrs)
+            ):
+                return self.STATE.last_aux_blob
+        blob, dropped = encode_aux(msg.dims, msg.axes, msg.attrs, msg.key, self.SETTINGS.axis)
+        if dropped and self.STATE.warned_dropped_attrs != frozenset(dropped):
+            self.STATE.warned_dropped_attrs = frozenset(dropped)
+            ez.logger.warning(f"ShMemLatest dropped non-plain attrs from the frame metadata: {sorted(dropped)}.")
+        self.STATE.last_aux_src = (msg.dims, msg.axes, msg.attrs, msg.key)
+        if blob != self.STATE.last_aux_blob:
+            self.STATE.last_aux_blob = blob
+            self.STATE.aux_generation += 1
+        return blob
+
+    @staticmethod
+    def _frame_time(axis: typing.Any) -> float:
+        if axis is None:
+            return float("nan")
+        if hasattr(axis, "data"):
+            return float(axis.data[0]) if len(axis.data) else float("nan")
+        return float(axis.offset)
+
+    @ez.subscriber(INPUT_SIGNAL)
+    async def on_message(self, msg: AxisArray):
+        self._write_frame(msg)
+
+    def _write_frame(self, msg: AxisArray) -> None:
+        if self.STATE.meta_struct is None:
+            return
+        data = np.ascontiguousarray(msg.data)
+        if self.STATE.layout != (data.dtype, data.shape):
+            self._reset_slots(data)
+        blob = self._aux_blob(msg)
+
+        meta = self.STATE.meta_struct
+        frame = meta.published + 1
+        index = frame % meta.n_slots
+        header = self.STATE.slot_headers[index]
+        slot = self.STATE.slot_bytes[index]
+        header["frame"] = frame
+        header["time"] = self._frame_time(msg.axes.get(self.SETTINGS.axis))
+        if header["aux_generation"] != self.STATE.aux_generation:
+            if len(blob) > meta.aux_bytes:
+                blob = b""
+                if not self.STATE.warned_aux_full:
+                    self.STATE.warned_aux_full = True
+                    ez.logger.warning(
+                        f"ShMemLatest {self.SETTINGS.shmem_name!r}: frame metadata does not fit "
+                        f"{meta.aux_bytes} bytes; publishing frames without it. Raise aux_bytes."
+                    )
+            start = SLOT_HEADER_DTYPE.itemsize
+            slot[start : start + len(blob)] = np.frombuffer(blob, np.uint8)
+            header["aux_nbytes"] = len(blob)
+            header["aux_generation"] = self.STATE.aux_generation
+        slot[meta.data_offset : meta.data_offset + data.nbytes] = data.reshape(-1).view(np.uint8)
+        # Publish only once the whole slot is written.
+        meta.published = frame
+        if self.STATE.ringer is not None:
+            self.STATE.ringer.ring()
@@ -0,0 +1,248 @@
+"""Read a :class:`.latest.ShMemLatest` from another process."""
+
+import time
+import typing
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import numpy.typing as npt
+from ezmsg.util.messages.axisarray import AxisArray
+
+from .aux_meta import decode_aux
+from .latest import (
+    LATEST_META_MAGIC,
+    LATEST_META_STRUCT_VERSION,
+    SLOT_HEADER_DTYPE,
+    LatestMeta,
+    latest_slots_name,
+)
+from .msgqueue import axis_from_plain
+from .notify import Doorbell
+from .shmem import ShmemVersionError, shorten_shmem_name
+from .shmem_mirror import CONNECT_RETRY_INTERVAL, POLL_INTERVAL, WAIT_SLICE
+
+# How many times latest() retries a copy the writer tore before giving up for
+# this call. Each retry starts from a newer frame, so needing more than one means
+# the writer publishes faster than a frame can be copied.
+MAX_RETRIES = 8
+
+
+class LatestMirror:
+    """A reader of one latest-frame publisher.
+
+    Connects lazily and reconnects by itself, like EZShmMirror. :meth:`latest`
+    returns the newest complete frame as an AxisArray; :meth:`poll` the same,
+    but only if it is one this mirror has not returned before. Frames are
+    copies: a view would be torn by the writer within ``n_slots - 1`` frames.
+    """
+
+    def __init__(self, shmem_name: typing.Optional[str] = None):
+        self._shmem_name: typing.Optional[str] = None
+        self._meta_shmem: typing.Optional[SharedMemory] = None
+        self._meta: typing.Optional[LatestMeta] = None
+        self._slots_shmem: typing.Optional[SharedMemory] = None
+        self._slots: typing.Optional[npt.NDArray] = None
+        self._headers: typing.Optional[npt.NDArray] = None
+        # The generation the segment above belongs to, with its frame dtype and shape.
+        self._generation: typing.Optional[int] = None
+        self._layout: typing.Optional[typing.Tuple[np.dtype, typing.Tuple[int, ...]]] = None
+        # (aux_generation, dims, axes, (buffered axis name, its static descriptors), attrs, key)
+        # last decoded, reused while the writer's aux_generation is unchanged.
+        self._aux: typing.Optional[tuple] = None
+        # Published count of the frame last returned.
+        self._last_frame = 0
+        self._doorbell: typing.Optional[Doorbell] = None
+        self._doorbell_ok = True
+        self._last_connect_try = 0.0
+        if shmem_name is not None:
+            self.connect(shmem_name)
+
+    def __del__(self):
+        self.disconnect()
+
+    def connect(self, name: str) -> None:
+        if name != self._shmem_name:
+            self.disconnect()
+        self._shmem_name = name
+        if name is None or self._meta is not None:
+            return
+        if (time.time() - self._last_connect_try) <= CONNECT_RETRY_INTERVAL:
+            return
+        self._last_connect_try = time.time()
+        try:
+            self._meta_shmem = SharedMemory(shorten_shmem_name(name), create=False)
+        except FileNotFoundError:
+            return
+        self._meta = LatestMeta.from_buffer(self._meta_shmem.buf)
+        magic, version = int(self._meta.magic), int(self._meta.struct_version)
+        if magic != LATEST_META_MAGIC or version != LATEST_META_STRUCT_VERSION:
+            self._cleanup_meta()
+            raise ShmemVersionError(
+                f"Shared memory segment for {name!r} is not a latest-frame publisher this build can read "
+                f"(magic 0x{magic:08X}, version {version}; expected 0x{LATEST_META_MAGIC:08X}, version "
+                f"{LATEST_META_STRUCT_VERSION}). The writer and reader must be the same ezmsg-tools version."
+            )
+
+    def disconnect(self) -> None:
+        self._cleanup_slots()
+        self._cleanup_meta()
+        if self._doorbell is not None:
+            self._doorbell.close()
+            self._doorbell = None
+        self._shmem_name = None
+
+    def _cleanup_meta(self) -> None:
+        self._meta = None
+        if self._meta_shmem is not None:
+            try:
+                self._meta_shmem.close()
+            except Exception as e:
+                print(f"Error closing latest-frame header: {e}")
+        self._meta_shmem = None
+
+    def _cleanup_slots(self) -> None:
+        self._slots = None
+        self._headers = None
+        if self._slots_shmem is not None:
+            try:
+                self._slots_shmem.close()
+            except Exception as e:
+                print(f"Error closing latest-frame slots: {e}")
+        self._slots_shmem = None
+        self._generation = None
+        self._layout = None
+        self._aux = None
+        self._last_frame = 0
+
+    def _ensure_slots(self) -> bool:
+        """(Re)connect as needed. True once we hold the current generation's slots."""
+        if self._meta is None:
+            self.connect(self._shmem_name)
+        if self._meta is None or not self._meta.bvalid:
+            return False
+        meta = self._meta
+        generation = int(meta.generation)
+        if generation == self._generation:
+            return True
+        self._cleanup_slots()
+        try:
+            self._slots_shmem = SharedMemory(
+                shorten_shmem_name(latest_slots_name(self._shmem_name, generation)), create=False
+            )
+        except FileNotFoundError:
+            # Replaced again already; the next call retries.
+            return False
+        n_slots, slot_bytes = int(meta.n_slots), int(meta.slot_bytes)
+        self._slots = np.ndarray((n_slots, slot_bytes), dtype=np.uint8, buffer=self._slots_shmem.buf[:])
+        self._headers = self._slots[:, : SLOT_HEADER_DTYPE.itemsize].view(SLOT_HEADER_DTYPE)[:, 0]
+        self._layout = (meta.dtype, tuple(int(d) for d in meta.shape[: meta.ndim]))
+        self._generation = generation
+        return True
+
+    @property
+    def frames_published(self) -> int:
+        """Frames the writer has published in its current layout. 0 if not connected."""
+        if not self._ensure_slots():
+            return 0
+        return int(self._meta.published)
+
+    def _copy(self, frame: int) -> typing.Optional[AxisArray]:
+        """Frame ``frame`` rebuilt, or None if the writer overwrote it during the copy."""
+        meta = self._meta
+        n_slots = self._slots.shape[0]
+        header = self._headers[frame % n_slots].copy()
+        slot = self._slots[frame % n_slots]
+        dtype, shape = self._layout
+        data_offset = int(meta.data_offset)
+        data = slot[data_offset : data_offset + dtype.itemsize * int(np.prod(shape))].copy()
+        aux_generation = int(header["aux_generation"])
+        blob = None
+        if self._aux is None or self._aux[0] != aux_generation:
+            start = SLOT_HEADER_DTYPE.itemsize
+            blob = slot[start : start + int(header["aux_nbytes"])].tobytes()
+        # See the module docstring of .latest.
+        if (
+            int(meta.generation) != self._generation
+            or int(header["frame"]) != frame
+            or int(meta.published) > frame + n_slots - 2
+        ):
+            return None
+
+        if blob is not None:
+            if blob:
+                payload = decode_aux(blob)
+                axes, buffered = {}, None
+                for name, plain in payload["axes"].items():
+                    if self._is_static(plain):
+                        buffered = (name, plain)
+                    else:
+                        axes[name] = axis_from_plain(plain)
+                self._aux = (aux_generation, payload["dims"], axes, buffered, payload["attrs"], payload["key"])
+            else:
+                self._aux = (aux_generation, None, {}, None, {}, "")
+        _, dims, axes, buffered, attrs, key = self._aux
+        data = data.view(dtype).reshape(shape)
+        if dims is None or len(dims) != data.ndim:
+            dims = [f"dim_{i}" for i in range(data.ndim)]
+        if buffered is not None:
+            # The buffered axis, placed at this frame's time.
+            name, plain = buffered
+            t = float(header["time"])
+            if plain["kind"] == "coord":
+                full = dict(plain, data=np.array([t]))
+            else:
+                full = dict(plain, offset=0.0 if np.isnan(t) else t)
+            axes = {**axes, name: axis_from_plain(full)}
+        return AxisArray(data, dims=list(dims), axes=axes, attrs=attrs, key=key)
+
+    @staticmethod
+    def _is_static(plain: dict) -> bool:
+        """Whether ``plain`` is the buffered axis, encoded with only its static descriptors."""
+        return ("data" if plain["kind"] == "coord" else "offset") not in plain
+
+    def latest(self) -> typing.Optional[AxisArray]:
+        """The newest complete frame, or None if there is none yet."""
+        if not self._ensure_slots():
+            return None
+        for _ in range(MAX_RETRIES):
+            frame = int(self._meta.published)
+            if frame == 0:
+                return None
+            msg = self._copy(frame)
+            if msg is not None:
+                self._last_frame = frame
+                return msg
+            if not self._ensure_slots():
+                return None
+        return None
+
+    def poll(self) -> typing.Optional[AxisArray]:
+        """:meth:`latest`, but None unless the writer has published since the last frame returned."""
+        if not self._ensure_slots() or int(self._meta.published) == self._last_frame:
+            return None
+        return self.latest()
+
+    def wait(self, timeout: typing.Optional[float] = None) -> bool:
+        """Block until there is a frame :meth:`poll` would return. False if ``timeout`` seconds pass first.
+
+        Sleeps on a doorbell (see .notify) where the platform has them, and
+        polls every POLL_INTERVAL elsewhere.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self._ensure_slots() and int(self._meta.published) != self._last_frame:
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            if self._doorbell is None and self._doorbell_ok and self._shmem_name is not None:
+                try:
+                    self._doorbell = Doorbell(shorten_shmem_name(self._shmem_name))
+                except OSError as e:
+                    print(f"Could not create a doorbell, falling back to polling: {e}")
+                    self._doorbell_ok = False
+            limit = POLL_INTERVAL if self._doorbell is None or self._meta is None else WAIT_SLICE
+            wait = limit if deadline is None else max(0.0, min(limit, deadline - time.monotonic()))
+            if self._doorbell is None:
+                time.sleep(wait)
+            else:
+                self._doorbell.wait(wait)
@@ -0,0 +1,95 @@
+"""Streaming min/max decimation for ShMemCircBuff's level-of-detail rings.
+
+A sweep plot showing minutes of a fast stream draws, per pixel column, the
+extremes of every sample that falls in it. Reading and reducing all those
+samples on each redraw is the cost that grows with zoom; but the reduction is
+associative -- the min of mins is the min -- so the writer can do most of it
+once, as data arrives, and publish the result at a few fixed factors. A reader
+then reads the coarsest level that still gives it at least one bucket per
+column. See ``ShMemCircBuffSettings.lod_factors``.
+
+Each level is a ring of ``(min, max)`` pairs along a trailing ``metric`` axis,
+the convention :func:`ezmsg.tools.plot.describe.metric_axis` already recognises
+as an envelope.
+"""
+
+import typing
+
+import numpy as np
+import numpy.typing as npt
+
+METRIC_AXIS = "metric"
+METRIC_LABELS = ("min", "max")
+
+
+class MinMaxDecimator:
+    """Reduce a stream of (min, max) pairs by a fixed factor, across message boundaries.
+
+    Feeding it raw samples is feeding it ``lo = hi = x``. Buckets are aligned to
+    the first sample pushed since the last :meth:`reset`, and a bucket split
+    across messages is carried until it is complete, so output never depends on
+    how the input happened to be chunked.
+    """
+
+    def __init__(self, factor: int):
+        if factor < 2:
+            raise ValueError(f"decimation factor must be at least 2, got {factor}")
+        self.factor = factor
+        self.reset()
+
+    def reset(self) -> None:
+        self._carry_lo: typing.Optional[npt.NDArray] = None
+        self._carry_hi: typing.Optional[npt.NDArray] = None
+        self._carry_t = 0.0
+        self._carry_n = 0
+
+    def push(
+        self, lo: npt.NDArray, hi: npt.NDArray, t: npt.NDArray
+    ) -> typing.Tuple[npt.NDArray, npt.NDArray, npt.NDArray]:
+        """Add samples; return the buckets they completed.
+
+        Args:
+            lo, hi: ``(n, *frame)`` lower and upper bounds of each input sample.
+            t: ``(n,)`` time of each input sample.
+
+        Returns:
+            ``(lo, hi, t)`` of each completed bucket, ``t`` being the time of
+            its first sample. Possibly empty.
+        """
+        f = self.factor
+        n = lo.shape[0]
+        out_lo, out_hi, out_t = [], [], []
+
+        i = 0
+        if self._carry_n:
+            i = min(f - self._carry_n, n)
+            if i:
+                np.minimum(self._carry_lo, lo[:i].min(axis=0), out=self._carry_lo)
+                np.maximum(self._carry_hi, hi[:i].max(axis=0), out=self._carry_hi)
+                self._carry_n += i
+            if self._carry_n == f:
+                out_lo.append(self._carry_lo[None])
+                out_hi.append(self._carry_hi[None])
+                out_t.append([self._carry_t])
+                self._carry_n = 0
+
+        m = (n - i) // f
+        if m:
+            stop = i + m * f
+            out_lo.append(lo[i:stop].reshape((m, f) + lo.shape[1:]).min(axis=1))
+            out_hi.append(hi[i:stop].reshape((m, f) + hi.shape[1:]).max(axis=1))
+            out_t.append(t[i:stop:f])
+            i = stop
+
+        if i < n:
+            # As arrays even for a 1-D stream, whose reduction is a numpy scalar
+            # the next push could not reduce into in place.
+            self._carry_lo = np.array(lo[i:].min(axis=0))
+            self._carry_hi = np.array(hi[i:].max(axis=0))
+            self._carry_t = float(t[i])
+            self._carry_n = n - i
+
+        if not out_lo:
+            frame = lo.shape[1:]
+            return np.empty((0,) + frame, lo.dtype), np.empty((0,) + frame, hi.dtype), np.empty(0)
+        return np.concatenate(out_lo), np.concatenate(out_hi), np.concatenate(out_t).astype(np.float64)
@@ -0,0 +1,129 @@
+"""Map a ring's pages twice, back to back, so no read ever wraps.
+
+A read that crosses the end of a circular buffer normally has to be stitched
+together -- :meth:`~.shmem_mirror.EZShmMirror.auto_view` used to
+``np.concatenate`` it, allocating and copying the whole result, which at large
+read sizes shows up as periodic latency spikes. If instead the same physical
+pages appear twice in a row in virtual memory, slot ``capacity + i`` *is* slot
+``i``, and any window of up to ``capacity`` frames starting anywhere in the first
+copy is one plain strided view.
+
+The trick needs two things the stdlib ``mmap`` module does not offer: mapping at
+a chosen address (``MAP_FIXED``), and a ring whose byte size is a whole number
+of pages, since the second copy must start on a page boundary. The first is done
+here through libc; the second is the writer's job -- see
+``ShMemCircBuffSettings.page_align``.
+
+POSIX only; :func:`supported` says whether this process can do it at all.
+"""
+
+import ctypes
+import ctypes.util
+import mmap
+import os
+import sys
+import typing
+
+import numpy as np
+import numpy.typing as npt
+
+PAGESIZE = mmap.PAGESIZE
+
+# Same values on Linux and macOS; the stdlib exposes the others but not these.
+_MAP_FIXED = 0x10
+_PROT_NONE = 0
+
+_libc = None
+
+
+def _get_libc():
+    global _libc
+    if _libc is None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        libc.mmap.restype = ctypes.c_void_p
+        libc.mmap.argtypes = [
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+            ctypes.c_int,
+            ctypes.c_int,
+            ctypes.c_int,
+            ctypes.c_long,
+        ]
+        libc.munmap.restype = ctypes.c_int
+        libc.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+        _libc = libc
+    return _libc
+
+
+def supported() -> bool:
+    """Whether this platform can double-map a shared memory segment."""
+    return os.name == "posix" and hasattr(mmap, "MAP_ANONYMOUS")
+
+
+def page_aligned_frames(n_frames: int, frame_bytes: int) -> int:
+    """The smallest frame count >= ``n_frames`` whose byte size is a whole number of pages."""
+    if frame_bytes <= 0:
+        return n_frames
+    step = PAGESIZE // np.gcd(PAGESIZE, frame_bytes)
+    return int(-(-n_frames // step) * step)
+
+
+def _check(result: typing.Optional[int], what: str) -> int:
+    if result is None or result == ctypes.c_void_p(-1).value:
+        err = ctypes.get_errno()
+        raise OSError(err, f"{what}: {os.strerror(err)}")
+    return result
+
+
+class DoubleMapping:
+    """One shared memory segment mapped at ``address`` and again at ``address + size``.
+
+    The segment is identified by an open file descriptor: the one a
+    ``SharedMemory`` already holds, so there is no name to resolve per platform.
+    The descriptor is only needed while mapping; the mapping outlives it.
+    """
+
+    def __init__(self, fd: int, size: int):
+        if size <= 0 or size % PAGESIZE:
+            raise ValueError(f"ring of {size} bytes is not a whole number of {PAGESIZE}-byte pages")
+        libc = _get_libc()
+        self.size = size
+        # Reserve the whole span first, so nothing else can land in the second
+        # half between the two fixed mappings.
+        self.address = _check(
+            libc.mmap(None, 2 * size, _PROT_NONE, mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS, -1, 0),
+            "reserving address space",
+        )
+        try:
+            prot = mmap.PROT_READ | mmap.PROT_WRITE
+            for half in (0, size):
+                _check(
+                    libc.mmap(self.address + half, size, prot, mmap.MAP_SHARED | _MAP_FIXED, fd, 0),
+                    "mapping ring",
+                )
+        except OSError:
+            libc.munmap(self.address, 2 * size)
+            raise
+        self._raw = (ctypes.c_byte * (2 * size)).from_address(self.address)
+
+    def array(self, dtype: npt.DTypeLike, frame_shape: typing.Sequence[int]) -> npt.NDArray:
+        """The doubled ring as ``(2 * capacity, *frame_shape)``."""
+        return np.frombuffer(self._raw, dtype=dtype).reshape((-1,) + tuple(frame_shape))
+
+    def close(self) -> bool:
+        """Unmap, unless something still holds a view into the mapping.
+
+        Unmapping under a live view would turn the next access to it into a
+        segfault, where ``SharedMemory.close`` raises ``BufferError`` instead.
+        Every array from :meth:`array` keeps ``_raw`` alive, so its refcount
+        says whether any remain. Returns whether the mapping was released; if
+        not, call again later.
+        """
+        if self._raw is None:
+            return True
+        # One for self._raw, one for getrefcount's own argument.
+        if sys.getrefcount(self._raw) > 2:
+            return False
+        self._raw = None
+        _get_libc().munmap(self.address, 2 * self.size)
+        return True
@@ -0,0 +1,303 @@
+"""A shared-memory queue of whole AxisArray messages, for streams whose shape does not hold still.
+
+ShMemCircBuff's ring has one frame shape per buffer generation, so a stream
+whose non-buffered shape changes -- a window whose length varies, a spectrum
+whose bins are reselected, a channel count that follows a selector -- starts a
+new generation on every change, and every reader starts over with it. This
+queue instead stores each message whole: its own dims, axes and attrs, encoded
+as :func:`.aux_meta.encode_aux` does, followed by its data bytes. Any message
+may differ from the last in every respect.
+
+Storage is two segments per generation:
+
+* an arena of bytes at ``.../arena{generation}``, allocated in order, wrapping:
+  each message takes the next ``[metadata blob][dtype descriptor][data]`` span,
+  the span and its data each starting on an ARENA_ALIGN boundary, and a span
+  that would run past the end starts again at 0 instead. Positions are
+  absolute byte counts, like the ring's sample counts, so a span at ``start``
+  is intact while ``bytes_written - start <= arena_bytes``.
+* a ring of ``max_messages`` fixed slots (``SLOT_DTYPE``) at
+  ``.../slots{generation}``, one per message, saying where its span is and
+  what shape its data has.
+
+The writer claims a span and fills it inside the same ``write_seq`` section as
+data-ring writes (see .shmem), so a reader that copied a message and then finds
+it still inside both windows knows the copy is intact. The generation changes
+only when the settings do. Read it with :class:`.msgqueue_mirror.MsgQueueMirror`.
+"""
+
+import ctypes
+import typing
+from multiprocessing.shared_memory import SharedMemory
+
+import ezmsg.core as ez
+import numpy as np
+import numpy.typing as npt
+from ezmsg.util.messages.axisarray import AxisArray, CoordinateAxis, LinearAxis
+
+from .aux_meta import encode_aux
+from .notify import Ringer
+from .shmem import CACHE_LINE, _persist_create_shmem, _unlink_shmem, dtype_descr, shorten_shmem_name
+
+# "EZMQ"; see SHMEM_META_MAGIC.
+MSGQUEUE_META_MAGIC = 0x455A4D51
+
+# Bumped on any change to MsgQueueMeta._fields_, SLOT_DTYPE or the span layout.
+MSGQUEUE_META_STRUCT_VERSION = 1
+
+# Most data dimensions a slot can describe.
+MAX_NDIM = 8
+
+# Alignment of each message's data within the arena, so a reader's view of it
+# is aligned for any dtype.
+ARENA_ALIGN = 64
+
+# Where message i's span is (absolute byte position, and the offsets within it
+# of the dtype descriptor and the data), and its data's shape.
+SLOT_DTYPE = np.dtype(
+    [
+        ("start", "<u8"),
+        ("aux_nbytes", "<u4"),
+        ("descr_nbytes", "<u4"),
+        ("data_offset", "<u8"),
+        ("data_nbytes", "<u8"),
+        ("ndim", "<u8"),
+        ("shape", "<u8", (MAX_NDIM,)),
+    ]
+)
+
+
+def arena_shmem_name(shmem_name: str, generation: int) -> str:
+    return f"{shmem_name}/arena{generation}"
+
+
+def slots_shmem_name(shmem_name: str, generation: int) -> str:
+    return f"{shmem_name}/slots{generation}"
+
+
+def axis_from_plain(plain: dict) -> typing.Union[LinearAxis, CoordinateAxis]:
+    """Inverse of :func:`.aux_meta.axis_to_plain`, for an axis encoded in full."""
+    if plain["kind"] == "coord":
+        return CoordinateAxis(data=plain["data"], dims=plain["dims"], unit=plain["unit"])
+    return LinearAxis(gain=plain["gain"], offset=plain["offset"], unit=plain["unit"])
+
+
+class MsgQueueMeta(ctypes.Structure):
+    """Header of a message queue. Laid out like ShmemArrMeta: identification, then the hot line alone."""
+
+    _pack_ = 1
+    _fields_ = [
+        ("magic", ctypes.c_uint32),
+        ("struct_version", ctypes.c_uint32),
+        # False until the first generation's segments exist.
+        ("bvalid", ctypes.c_bool),
+        ("arena_bytes", ctypes.c_uint64),
+        ("max_messages", ctypes.c_uint32),
+        ("generation", ctypes.c_uint32),
+        ("_pad0", ctypes.c_byte * (CACHE_LINE - 25)),
+        # -- Line 1: written per message.
+        ("write_seq", ctypes.c_uint64),
+        # Total messages written this generation; the next takes slot
+        # messages_written % max_messages.
+        ("messages_written", ctypes.c_uint64),
+        # Absolute end of the last span claimed in the arena.
+        ("bytes_written", ctypes.c_uint64),
+        # Messages too large for the arena, never written.
+        ("messages_dropped", ctypes.c_uint64),
+        ("_pad1", ctypes.c_byte * (CACHE_LINE - 32)),
+    ]
+
+
+class ShMemMsgQueueSettings(ez.Settings):
+    shmem_name: typing.Optional[str]
+    # Size of the arena. Bounds how much history is held, in bytes; a message
+    # larger than this is dropped.
+    arena_bytes: int = 64 << 20
+    # Slots: bounds how much history is held, in messages.
+    max_messages: int = 1024
+    # Wake readers blocked in MsgQueueMirror.wait after every write (see .notify).
+    notify: bool = True
+
+
+class ShMemMsgQueueState(ez.State):
+    meta_shmem: typing.Optional[SharedMemory] = None
+    meta_struct: typing.Optional[MsgQueueMeta] = None
+    arena_shmem: typing.Optional[SharedMemory] = None
+    arena_arr: typing.Optional[npt.NDArray] = None
+    slots_shmem: typing.Optional[SharedMemory] = None
+    slots_arr: typing.Optional[npt.NDArray] = None
+    # Whether we have said that a message was too large, so we say it once.
+    warned_dropped: bool = False
+    # attrs keys dropped as non-plain, remembered so we warn once, not per message.
+    warned_dropped_attrs: typing.Optional[frozenset] = None
+    ringer: typing.Optional[Ringer] = None
+
+
+class ShMemMsgQueue(ez.Unit):
+    """Publish every message whole to shared memory. See module docstring."""
+
+    SETTINGS = ShMemMsgQueueSettings
+    STATE = ShMemMsgQueueState
+
+    INPUT_SIGNAL = ez.InputStream(AxisArray)
+    INPUT_SETTINGS = ez.InputStream(ShMemMsgQueueSettings)
+
+    async def initialize(self) -> None:
+        self._cleanup_queue()
+        self._cleanup_meta()
+        self._reset_meta()
+        self._reset_queue()
+
+    @ez.subscriber(INPUT_SETTINGS)
+    def on_settings(self, msg: ShMemMsgQueueSettings) -> None:
+        b_reset_meta = msg.shmem_name != self.SETTINGS.shmem_name
+        b_reset_queue = b_reset_meta or (msg.arena_bytes, msg.max_messages) != (
+            self.SETTINGS.arena_bytes,
+            self.SETTINGS.max_messages,
+        )
+        b_reset_ringer = msg.notify != self.SETTINGS.notify
+        self.apply_settings(msg)
+        if b_reset_queue:
+            self._cleanup_queue()
+        if b_reset_meta:
+            self._cleanup_meta()
+            self._reset_meta()
+        elif b_reset_ringer:
+            if self.STATE.ringer is not None:
+                self.STATE.ringer.close()
+            self.STATE.ringer = Ringer(shorten_shmem_name(self.SETTINGS.shmem_name)) if msg.notify else None
+        if b_reset_queue:
+            self._reset_queue()
+
+    async def shutdown(self) -> None:
+        self._cleanup_queue()
+        self._cleanup_meta()
+
+    def _reset_meta(self) -> None:
+        short_name = shorten_shmem_name(self.SETTINGS.shmem_name)
+        self.STATE.meta_shmem = _persist_create_shmem(
+            short_name, ctypes.sizeof(MsgQueueMeta), purpose="message queue header"
+        )
+        meta = self.STATE.meta_struct = MsgQueueMeta.from_buffer(self.STATE.meta_shmem.buf)
+        meta.magic = MSGQUEUE_META_MAGIC
+        meta.struct_version = MSGQUEUE_META_STRUCT_VERSION
+        meta.bvalid = False
+        meta.generation = 0
+        if self.SETTINGS.notify:
+            self.STATE.ringer = Ringer(short_name)
+
+    def _cleanup_meta(self) -> None:
+        self.STATE.meta_struct = None
+        if self.STATE.ringer is not None:
+            self.STATE.ringer.close()
+            self.STATE.ringer = None
+        if self.STATE.meta_shmem is not None:
+            _unlink_shmem(self.STATE.meta_shmem)
+        self.STATE.meta_shmem = None
+
+    def _reset_queue(self) -> None:
+        """Start a new, empty generation of the arena and slots."""
+        meta = self.STATE.meta_struct
+        generation = meta.generation + 1
+        name = self.SETTINGS.shmem_name
+        # A whole number of alignment units, so a span wrapped to 0 stays aligned.
+        arena_bytes = -(-self.SETTINGS.arena_bytes // ARENA_ALIGN) * ARENA_ALIGN
+        self.STATE.arena_shmem = _persist_create_shmem(
+            shorten_shmem_name(arena_shmem_name(name, generation)),
+            arena_bytes,
+            purpose=f"message arena gen {generation}",
+        )
+        self.STATE.arena_arr = np.ndarray((arena_bytes,), dtype=np.uint8, buffer=self.STATE.arena_shmem.buf[:])
+        self.STATE.slots_shmem = _persist_create_shmem(
+            shorten_shmem_name(slots_shmem_name(name, generation)),
+            self.SETTINGS.max_messages * SLOT_DTYPE.itemsize,
+            purpose=f"message slots gen {generation} ({self.SETTINGS.max_messages} slots)",
+        )
+        self.STATE.slots_arr = np.ndarray(
+            (self.SETTINGS.max_messages,), dtype=SLOT_DTYPE, buffer=self.STATE.slots_shmem.buf[:]
+        )
+        self.STATE.warned_dropped = False
+
+        meta.bvalid = False
+        meta.arena_bytes = arena_bytes
+        meta.max_messages = self.SETTINGS.max_messages
+        meta.write_seq += 1
+        meta.messages_written = 0
+        meta.bytes_written = 0
+        meta.messages_dropped = 0
+        meta.generation = generation
+        meta.write_seq += 1
+        meta.bvalid = True
+        self._notify()
+
+    def _cleanup_queue(self) -> None:
+        if self.STATE.meta_struct is not None:
+            self.STATE.meta_struct.bvalid = False
+        self.STATE.arena_arr = None
+        self.STATE.slots_arr = None
+        for shm in (self.STATE.arena_shmem, self.STATE.slots_shmem):
+            if shm is not None:
+                _unlink_shmem(shm)
+        self.STATE.arena_shmem = None
+        self.STATE.slots_shmem = None
+
+    def _notify(self) -> None:
+        if self.STATE.ringer is not None:
+            self.STATE.ringer.ring()
+
+    @ez.subscriber(INPUT_SIGNAL)
+    async def on_message(self, msg: AxisArray):
+        self._write_message(msg)
+
+    def _write_message(self, msg: AxisArray) -> None:
+        if self.STATE.arena_arr is None:
+            return
+        data = np.ascontiguousarray(msg.data)
+        if data.ndim > MAX_NDIM:
+            raise ValueError(f"ShMemMsgQueue holds data of at most {MAX_NDIM} dimensions, got {data.ndim}")
+        # No buffered axis: every axis is encoded in full.
+        blob, dropped = encode_aux(msg.dims, msg.axes, msg.attrs, msg.key, buffered_axis="")
+        if dropped and self.STATE.warned_dropped_attrs != frozenset(dropped):
+            self.STATE.warned_dropped_attrs = frozenset(dropped)
+            ez.logger.warning(f"ShMemMsgQueue dropped non-plain attrs from queued messages: {sorted(dropped)}.")
+        descr = dtype_descr(data.dtype).encode("ascii")
+        data_offset = -(-(len(blob) + len(descr)) // ARENA_ALIGN) * ARENA_ALIGN
+        span = data_offset + data.nbytes
+
+        meta = self.STATE.meta_struct
+        arena = self.STATE.arena_arr
+        if span > arena.shape[0]:
+            meta.messages_dropped += 1
+            if not self.STATE.warned_dropped:
+                self.STATE.warned_dropped = True
+                ez.logger.warning(
+                    f"ShMemMsgQueue {self.SETTINGS.shmem_name!r}: dropping a {span}-byte message, larger than its "
+                    f"{arena.shape[0]}-byte arena. Raise arena_bytes."
+                )
+            return
+
+        # Spans start aligned, so their data, at an aligned offset into them, is too.
+        start = -(-int(meta.bytes_written) // ARENA_ALIGN) * ARENA_ALIGN
+        if start % arena.shape[0] + span > arena.shape[0]:
+            # Spans never wrap: skip the tail, and start this one at 0.
+            start += arena.shape[0] - start % arena.shape[0]
+        at = start % arena.shape[0]
+        slot = self.STATE.slots_arr[meta.messages_written % meta.max_messages]
+
+        meta.write_seq += 1
+        # Claim the span before filling it: a reader re-checking bytes_written
+        # after copying an older message there then knows it was overwritten.
+        meta.bytes_written = start + span
+        arena[at : at + len(blob)] = np.frombuffer(blob, np.uint8)
+        arena[at + len(blob) : at + len(blob) + len(descr)] = np.frombuffer(descr, np.uint8)
+        arena[at + data_offset : at + span] = data.reshape(-1).view(np.uint8)
+        slot["start"] = start
+        slot["aux_nbytes"] = len(blob)
+        slot["descr_nbytes"] = len(descr)
+        slot["data_offset"] = data_offset
+        slot["data_nbytes"] = data.nbytes
+        slot["ndim"] = data.ndim
+        slot["shape"][: data.ndim] = data.shape
+        meta.messages_written += 1
+        meta.write_seq += 1
+        self._notify()
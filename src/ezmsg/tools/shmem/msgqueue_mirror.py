@@ -0,0 +1,260 @@
+"""Read a :class:`.msgqueue.ShMemMsgQueue` from another process."""
+
+import time
+import typing
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import numpy.typing as npt
+from ezmsg.util.messages.axisarray import AxisArray
+
+from .aux_meta import decode_aux
+from .msgqueue import (
+    MSGQUEUE_META_MAGIC,
+    MSGQUEUE_META_STRUCT_VERSION,
+    SLOT_DTYPE,
+    MsgQueueMeta,
+    arena_shmem_name,
+    axis_from_plain,
+    slots_shmem_name,
+)
+from .notify import Doorbell
+from .shmem import ShmemVersionError, dtype_from_descr, shorten_shmem_name
+from .shmem_mirror import CONNECT_RETRY_INTERVAL, POLL_INTERVAL, WAIT_SLICE, seqlock_read
+
+
+class MsgQueueMirror:
+    """A reader of one message queue, rebuilding each message as an AxisArray.
+
+    Connects lazily and reconnects by itself, like EZShmMirror. By default a
+    message's data is a view into the shared arena -- nothing is copied -- and,
+    like a view from :meth:`EZShmMirror.auto_view`, is only as good as the
+    moment you look at it: copy what you need, then :meth:`check_last_read`.
+    With ``copy=True`` the data is copied and checked before it is returned.
+    """
+
+    def __init__(self, shmem_name: typing.Optional[str] = None):
+        self._shmem_name: typing.Optional[str] = None
+        self._meta_shmem: typing.Optional[SharedMemory] = None
+        self._meta: typing.Optional[MsgQueueMeta] = None
+        self._arena_shmem: typing.Optional[SharedMemory] = None
+        self._arena: typing.Optional[npt.NDArray] = None
+        self._slots_shmem: typing.Optional[SharedMemory] = None
+        self._slots: typing.Optional[npt.NDArray] = None
+        # The generation the segments above belong to.
+        self._generation: typing.Optional[int] = None
+        # Index of the next message to read. None until the first read.
+        self._read_pos: typing.Optional[int] = None
+        # (index, arena start) of the message read() last returned, for check_last_read.
+        self._last_read: typing.Optional[typing.Tuple[int, int]] = None
+        self._n_lost = 0
+        self._doorbell: typing.Optional[Doorbell] = None
+        self._doorbell_ok = True
+        self._last_connect_try = 0.0
+        if shmem_name is not None:
+            self.connect(shmem_name)
+
+    def __del__(self):
+        self.disconnect()
+
+    def connect(self, name: str) -> None:
+        if name != self._shmem_name:
+            self.disconnect()
+        self._shmem_name = name
+        if name is None or self._meta is not None:
+            return
+        if (time.time() - self._last_connect_try) <= CONNECT_RETRY_INTERVAL:
+            return
+        self._last_connect_try = time.time()
+        try:
+            self._meta_shmem = SharedMemory(shorten_shmem_name(name), create=False)
+        except FileNotFoundError:
+            return
+        self._meta = MsgQueueMeta.from_buffer(self._meta_shmem.buf)
+        magic, version = int(self._meta.magic), int(self._meta.struct_version)
+        if magic != MSGQUEUE_META_MAGIC or version != MSGQUEUE_META_STRUCT_VERSION:
+            self._cleanup_meta()
+            raise ShmemVersionError(
+                f"Shared memory segment for {name!r} is not a message queue this build can read "
+                f"(magic 0x{magic:08X}, version {version}; expected 0x{MSGQUEUE_META_MAGIC:08X}, version "
+                f"{MSGQUEUE_META_STRUCT_VERSION}). The writer and reader must be the same ezmsg-tools version."
+            )
+
+    def disconnect(self) -> None:
+        self._cleanup_queue()
+        self._cleanup_meta()
+        if self._doorbell is not None:
+            self._doorbell.close()
+            self._doorbell = None
+        self._shmem_name = None
+
+    def _cleanup_meta(self) -> None:
+        self._meta = None
+        if self._meta_shmem is not None:
+            try:
+                self._meta_shmem.close()
+            except Exception as e:
+                print(f"Error closing message queue header: {e}")
+        self._meta_shmem = None
+
+    def _cleanup_queue(self) -> None:
+        self._arena = None
+        self._slots = None
+        for shm in (self._arena_shmem, self._slots_shmem):
+            if shm is not None:
+                try:
+                    shm.close()
+                except BufferError:
+                    # A caller still holds a message viewing the arena. The
+                    # mapping goes when that message does.
+                    pass
+                except Exception as e:
+                    print(f"Error closing message queue: {e}")
+        self._arena_shmem = None
+        self._slots_shmem = None
+        self._generation = None
+        self._read_pos = None
+        self._last_read = None
+
+    def _ensure_queue(self) -> bool:
+        """(Re)connect as needed. True once we hold the current generation's segments."""
+        if self._meta is None:
+            self.connect(self._shmem_name)
+        if self._meta is None or not self._meta.bvalid:
+            return False
+        generation = int(self._meta.generation)
+        if generation == self._generation:
+            return True
+        self._cleanup_queue()
+        try:
+            self._arena_shmem = SharedMemory(
+                shorten_shmem_name(arena_shmem_name(self._shmem_name, generation)), create=False
+            )
+            self._slots_shmem = SharedMemory(
+                shorten_shmem_name(slots_shmem_name(self._shmem_name, generation)), create=False
+            )
+        except FileNotFoundError:
+            # Replaced again already; the next call retries.
+            self._cleanup_queue()
+            return False
+        arena_bytes, max_messages = int(self._meta.arena_bytes), int(self._meta.max_messages)
+        self._arena = np.ndarray((arena_bytes,), dtype=np.uint8, buffer=self._arena_shmem.buf[:])
+        self._slots = np.ndarray((max_messages,), dtype=SLOT_DTYPE, buffer=self._slots_shmem.buf[:])
+        self._generation = generation
+        return True
+
+    def _snapshot(self) -> typing.Optional[typing.Tuple[int, int, int]]:
+        """A consistent ``(generation, messages written, bytes written)``; see EZShmMirror._snapshot."""
+        return seqlock_read(self._meta, lambda m: (int(m.generation), int(m.messages_written), int(m.bytes_written)))
+
+    def _intact(self, index: int, start: int) -> bool:
+        """Whether message ``index``, whose span begins at ``start``, has not been overwritten."""
+        snap = self._snapshot()
+        if snap is None or snap[0] != self._generation:
+            return False
+        _, n_messages, n_bytes = snap
+        return index >= n_messages - self._slots.shape[0] and start >= n_bytes - self._arena.shape[0]
+
+    def _message(self, index: int, copy: bool) -> typing.Optional[typing.Tuple[AxisArray, int]]:
+        """Message ``index`` rebuilt, with the arena start it was checked at; None if it was overwritten first.
+
+        The start is the one read here: by the time the caller looks, the slot
+        may already describe a newer message.
+        """
+        slot = self._slots[index % self._slots.shape[0]].copy()
+        start = int(slot["start"])
+        if not self._intact(index, start):
+            return None
+        at = start % self._arena.shape[0]
+        aux_end = at + int(slot["aux_nbytes"])
+        blob = self._arena[at:aux_end].tobytes()
+        descr = self._arena[aux_end : aux_end + int(slot["descr_nbytes"])].tobytes()
+        data_at = at + int(slot["data_offset"])
+        data = self._arena[data_at : data_at + int(slot["data_nbytes"])]
+        if copy:
+            data = data.copy()
+        # Before decoding anything: a torn blob is not worth unpickling.
+        if not self._intact(index, start):
+            return None
+        payload = decode_aux(blob)
+        data = data.view(dtype_from_descr(descr.decode("ascii"))).reshape(tuple(slot["shape"][: int(slot["ndim"])]))
+        axes = {name: axis_from_plain(plain) for name, plain in payload["axes"].items()}
+        return AxisArray(data, dims=payload["dims"], axes=axes, attrs=payload["attrs"], key=payload["key"]), start
+
+    @property
+    def n_lost(self) -> int:
+        """Messages the most recent :meth:`read` skipped because the writer had overwritten them."""
+        return self._n_lost
+
+    def read(self, copy: bool = False) -> typing.Optional[AxisArray]:
+        """The next unread message, or None if there is none.
+
+        The first read after connecting starts from the oldest message held.
+        Messages overwritten before they could be read are skipped, and counted
+        in :attr:`n_lost`.
+        """
+        self._n_lost = 0
+        if not self._ensure_queue():
+            return None
+        snap = self._snapshot()
+        if snap is None or snap[0] != self._generation:
+            return None
+        n_messages = snap[1]
+        if self._read_pos is None:
+            self._read_pos = max(0, n_messages - self._slots.shape[0])
+        while self._read_pos < n_messages:
+            index = self._read_pos
+            self._read_pos += 1
+            found = self._message(index, copy)
+            if found is not None:
+                msg, start = found
+                self._last_read = (index, start)
+                return msg
+            self._n_lost += 1
+        return None
+
+    def latest(self, copy: bool = False) -> typing.Optional[AxisArray]:
+        """The newest message, or None if there is none. Does not move the read position."""
+        if not self._ensure_queue():
+            return None
+        snap = self._snapshot()
+        if snap is None or snap[0] != self._generation or not snap[1]:
+            return None
+        found = self._message(snap[1] - 1, copy)
+        return None if found is None else found[0]
+
+    def check_last_read(self) -> bool:
+        """Whether the message :meth:`read` last returned is still intact in the arena.
+
+        Call it after copying out of a zero-copy message: True means the copy is good.
+        """
+        if self._last_read is None or self._meta is None:
+            return False
+        return self._intact(*self._last_read)
+
+    def wait(self, timeout: typing.Optional[float] = None) -> bool:
+        """Block until there is an unread message. Returns False if ``timeout`` seconds pass first.
+
+        Sleeps on a doorbell (see .notify) where the platform has them, and
+        polls every POLL_INTERVAL elsewhere.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self._ensure_queue():
+                snap = self._snapshot()
+                if snap is not None and snap[1] > (self._read_pos or 0):
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            if self._doorbell is None and self._doorbell_ok and self._shmem_name is not None:
+                try:
+                    self._doorbell = Doorbell(shorten_shmem_name(self._shmem_name))
+                except OSError as e:
+                    print(f"Could not create a doorbell, falling back to polling: {e}")
+                    self._doorbell_ok = False
+            limit = POLL_INTERVAL if self._doorbell is None or self._meta is None else WAIT_SLICE
+            wait = limit if deadline is None else max(0.0, min(limit, deadline - time.monotonic()))
+            if self._doorbell is None:
+                time.sleep(wait)
+            else:
+                self._doorbell.wait(wait)
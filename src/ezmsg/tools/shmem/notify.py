@@ -0,0 +1,193 @@
+"""Cross-process "new data" doorbells for the shmem ring.
+
+Without these, a reader of :class:`~.shmem.ShMemCircBuff`'s ring can only poll:
+it learns of new samples one poll interval late at best, and spends CPU asking
+while the stream is idle. A doorbell lets it sleep in the kernel instead and be
+woken when the writer publishes.
+
+Mechanism
+---------
+Each reader owns a named FIFO in a per-stream directory (see
+:func:`doorbell_dir`). The writer keeps a write end open on every FIFO it finds
+there and, after each ring update, writes one byte to each. A reader blocks in
+``select`` (or an event loop's ``add_reader``) on its read end and drains
+whatever has accumulated when it wakes -- the bytes carry no information beyond
+"something happened", so a full pipe is as good as a non-empty one and the
+writer never blocks on a slow reader.
+
+A FIFO per reader rather than one shared primitive because every reader must
+wake: a single pipe, eventfd or semaphore hands each wakeup to exactly one
+waiter. FIFOs rather than sockets or semaphores because they need nothing but
+the filesystem -- no handshake, no extra dependency -- and a writer discovers
+readers by listing a directory.
+
+A reader that exits without cleaning up leaves its FIFO behind; the writer
+notices (opening it fails, or a write reports a broken pipe) and unlinks it.
+
+POSIX only. Where ``os.mkfifo`` does not exist (Windows) :data:`AVAILABLE` is
+False, the writer does nothing, and readers fall back to polling.
+"""
+
+import errno
+import os
+import select
+import tempfile
+import time
+import typing
+import uuid
+
+AVAILABLE = hasattr(os, "mkfifo")
+
+# A writer re-lists the doorbell directory when its mtime changes, and also at
+# least this often, in case a filesystem's timestamps are too coarse to show a
+# reader arriving within the same tick as the last listing.
+RESCAN_INTERVAL = 1.0
+
+
+def doorbell_dir(header_name: str) -> str:
+    """Directory holding the doorbell FIFOs of every reader of one stream.
+
+    Keyed on the stream's header segment name -- ``shorten_shmem_name(shmem_name)``
+    -- which is already short and filesystem-safe.
+    """
+    return os.path.join(tempfile.gettempdir(), "ezmsg-shmem", header_name)
+
+
+class Doorbell:
+    """A reader's end: a FIFO the writer rings on every publish.
+
+    Create one per waiting reader, and :meth:`close` it when done -- that is
+    what removes it from the writer's list.
+    """
+
+    def __init__(self, header_name: str):
+        if not AVAILABLE:
+            raise OSError(errno.ENOSYS, "named FIFOs are not available on this platform")
+        directory = doorbell_dir(header_name)
+        self.path = os.path.join(directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        while True:
+            os.makedirs(directory, exist_ok=True)
+            try:
+                os.mkfifo(self.path, 0o600)
+                break
+            except FileNotFoundError:
+                # Another reader's close() removed the directory between our
+                # makedirs and mkfifo.
+                continue
+        self._rfd = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+        # Hold a write end of our own, so the read end never sees EOF when the
+        # writer goes away. Without it a vanished writer would leave the FIFO
+        # permanently "readable" and every wait would return immediately.
+        self._wfd = os.open(self.path, os.O_WRONLY | os.O_NONBLOCK)
+
+    def fileno(self) -> int:
+        """The read end, for ``select`` or ``loop.add_reader``."""
+        return self._rfd
+
+    def wait(self, timeout: typing.Optional[float] = None) -> bool:
+        """Block until rung or ``timeout`` elapses. Returns whether it was rung.
+
+        Clears the doorbell before returning, so the next wait blocks until the
+        next publish.
+        """
+        readable, _, _ = select.select([self._rfd], [], [], timeout)
+        if readable:
+            self.clear()
+        return bool(readable)
+
+    def clear(self) -> None:
+        """Discard pending rings."""
+        try:
+            while os.read(self._rfd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self) -> None:
+        for fd in (self._rfd, self._wfd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._rfd = self._wfd = -1
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        try:
+            # Succeeds only if we were the last reader.
+            os.rmdir(os.path.dirname(self.path))
+        except OSError:
+            pass
+
+
+class Ringer:
+    """The writer's end: rings every reader's doorbell.
+
+    Cheap when nobody is listening -- one ``stat`` of the directory per
+    :meth:`ring` -- so a writer can keep one unconditionally.
+    """
+
+    def __init__(self, header_name: str):
+        self._dir = doorbell_dir(header_name)
+        self._fds: typing.Dict[str, int] = {}
+        self._dir_mtime = None
+        self._last_scan = -float("inf")
+
+    def _rescan(self) -> None:
+        try:
+            mtime = os.stat(self._dir).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        now = time.monotonic()
+        if mtime == self._dir_mtime and now - self._last_scan < RESCAN_INTERVAL:
+            return
+        self._dir_mtime, self._last_scan = mtime, now
+        try:
+            present = set(os.listdir(self._dir)) if mtime is not None else set()
+        except FileNotFoundError:
+            present = set()
+        for name in list(self._fds):
+            if name not in present:
+                self._drop(name, unlink=False)
+        for name in present - self._fds.keys():
+            path = os.path.join(self._dir, name)
+            try:
+                self._fds[name] = os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+            except OSError as exc:
+                if exc.errno == errno.ENXIO:
+                    # No read end: the reader died without cleaning up.
+                    self._unlink(path)
+
+    def _unlink(self, path: str) -> None:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def _drop(self, name: str, unlink: bool) -> None:
+        fd = self._fds.pop(name)
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+        if unlink:
+            self._unlink(os.path.join(self._dir, name))
+
+    def ring(self) -> None:
+        """Wake every reader. Never blocks."""
+        if not AVAILABLE:
+            return
+        self._rescan()
+        for name, fd in list(self._fds.items()):
+            try:
+                os.write(fd, b"\0")
+            except BlockingIOError:
+                # Pipe full: the reader has wakeups pending already.
+                pass
+            except BrokenPipeError:
+                self._drop(name, unlink=True)
+
+    def close(self) -> None:
+        for name in list(self._fds):
+            self._drop(name, unlink=False)
@@ -0,0 +1,73 @@
+"""Get a new segment's pages resident before the writer needs them.
+
+A freshly created segment is backed lazily: each 4 KB page is allocated by a
+fault on its first write. For the ring that means the first lap after every
+(re)allocation pays one fault per page, which shows up as write-latency jitter
+for the first ``buf_dur`` of a session and after every layout change. The
+helpers here move that cost to allocation time; see
+``ShMemCircBuffSettings.prefault``, ``hugepages`` and ``mlock``.
+
+All best-effort: each returns whether it did anything, and none raises for a
+platform or a resource limit that does not allow it.
+"""
+
+import ctypes
+import mmap
+import os
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from .magic_ring import PAGESIZE, _get_libc
+
+
+def _mapping(shm: SharedMemory) -> mmap.mmap:
+    # SharedMemory has no public handle on its mmap, and madvise needs one.
+    return shm._mmap
+
+
+def advise_hugepages(shm: SharedMemory) -> bool:
+    """Ask for transparent huge pages (Linux). Do this before :func:`prefault`.
+
+    Fewer, larger pages mean fewer faults and TLB misses, but for shared memory
+    the kernel only obliges if ``/sys/kernel/mm/transparent_hugepage/shmem_enabled``
+    allows it; the request is harmless when it does not.
+    """
+    if not hasattr(mmap, "MADV_HUGEPAGE"):
+        return False
+    try:
+        _mapping(shm).madvise(mmap.MADV_HUGEPAGE)
+    except OSError:
+        return False
+    return True
+
+
+def prefault(shm: SharedMemory) -> bool:
+    """Touch every page with a write, so none faults later.
+
+    A read would not do: reading an untouched shared page maps the shared zero
+    page, and the first real write still faults. Overwrites one byte per page,
+    so only use it on a segment whose contents are not yet meaningful.
+    """
+    touch = np.frombuffer(shm.buf, dtype=np.uint8)
+    touch[::PAGESIZE] = 0
+    del touch
+    return True
+
+
+def lock(shm: SharedMemory) -> bool:
+    """``mlock`` the segment, so it is never paged out (POSIX).
+
+    Fails -- returning False -- past ``RLIMIT_MEMLOCK`` (``ulimit -l``) without
+    CAP_IPC_LOCK, which is the common case for an unprivileged process with a
+    large ring.
+    """
+    if os.name != "posix":
+        return False
+    libc = _get_libc()
+    view = np.frombuffer(shm.buf, dtype=np.uint8)
+    address, size = view.ctypes.data, view.nbytes
+    del view
+    libc.mlock.restype = ctypes.c_int
+    libc.mlock.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+    return libc.mlock(address, size) == 0
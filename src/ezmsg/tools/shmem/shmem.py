@@ -13,35 +13,89 @@ Additionally, the node has a convenience handle to the metadata via
 
 Upon receiving a data message, its metadata is checked, and if it does not match the shmem metadata
  (which will always be true for the first message) then the node first updates the metadata, then it (re-)creates
- a shared memory buffer to hold the data, located at shorten_shmem_name(f"{shmem_name}/buffer{buffer_generation}"),
- where `buffer_generation` is an integer that tracks how many times the buffer has been reset. This corresponds to the
- same integer stored in the metadata.
+ a shared memory buffer to hold the data, located at shorten_shmem_name(f"{shmem_name}/buffer{buffer_segment}").
+ `buffer_generation` is an integer that tracks how many times the buffer has been reset; `buffer_segment` names the
+ segment holding the current generation's ring. Both are stored in the metadata. They are usually equal, but segments
+ are pooled (see `_SegmentPool`): a new layout that fits in the current or a recently retired segment reuses it
+ rather than creating another, so a producer flipping between a few layouts does not churn /dev/shm.
 
 The other half must monitor the metadata shared memory to see if it changes, and if it does then it must recreate
 the data shared memory buffer reader at the new location.
 
+Writes into the ring are bracketed by the header's `write_seq` counter, seqlock-style: it goes odd before the first
+sample is stored and back to even after `samples_written` is advanced. Nothing blocks on it -- the writer never waits
+for readers. It lets a reader take a consistent snapshot of the count (retry while odd or changed), and, after it has
+copied a slice out of the ring, re-snapshot to learn whether the writer lapped into that slice during the copy and by
+how many samples. `samples_written` is monotonic for the life of a buffer generation, so positions and losses on the
+reader side are plain integer arithmetic.
+
+A change of `buf_dur` alone does not start the stream over. The writer copies the newest samples that fit into a ring
+of the new length, then publishes it as the next generation with `continues_previous` set. Sample numbering and the
+time records carry on from the last generation, and `valid_from` moves up to the first sample carried over. A reader
+that mapped the last generation can keep its position instead of starting again.
+
 Finally, there is a third piece of shared memory carrying everything about the AxisArray that does not fit in the
 fixed-size metadata header: the non-buffered coordinate axes (e.g. a `ch` axis holding per-channel bank/elec/label),
-axis units, and the message `attrs`. It lives at shorten_shmem_name(f"{shmem_name}/meta{meta_generation}") and is
-republished -- under a fresh generation, following the same pattern as the data buffer -- only when that metadata
-actually changes, which for a typical stream means once per session. See the .aux_meta module for the wire format.
+axis units, and the message `attrs`. It lives at shorten_shmem_name(f"{shmem_name}/meta{aux_segment}") and is
+republished -- under a fresh `meta_generation` -- only when that metadata actually changes, which for a typical stream
+means once per session. The segment is page-rounded and rewritten in place while the new blob fits, bracketed by the
+header's `aux_seq` counter exactly as ring writes are by `write_seq`. See the .aux_meta module for the wire format.
+
+Since .aux_meta keeps only the static descriptors of the buffered axis, its position along the stream -- where each
+sample falls in time -- travels in a fourth segment beside the ring, at
+shorten_shmem_name(f"{shmem_name}/time{time_segment}"), created, replaced and pooled with the ring itself. Its contents
+depend on the axis (see `ShmemArrMeta.time_mode`): for a LinearAxis, a small ring of (sample_index, offset, n_samples)
+records, one per message, from which any sample's time is the nearest preceding record's offset plus gain per sample;
+for a CoordinateAxis, whose samples need not be evenly spaced, a ring of per-sample timestamps slot-for-slot with the
+data. Both are updated inside the same write_seq section as the data they describe.
+
+With `lod_factors` set, the node also keeps one min/max envelope of the stream per factor (see .lod). Each is a full
+shmem link of its own -- header, ring, metadata, timestamps -- at `lod_shmem_name(shmem_name, factor)`, written by a
+child ShMemCircBuff that this node feeds directly; the factors are listed in this node's header for readers to find.
+
+With `shards` set, the channels -- the first non-buffered axis -- are split into contiguous groups, each written by a
+child ShMemCircBuff to a full link of its own at `shard_shmem_name(shmem_name, i)`, whose metadata carries its slice of
+the channel axis. This node then keeps no ring: its header (`n_shards`, `shard_bounds`) and metadata describe the whole
+stream and index the shards, so a worker that owns a channel range maps only that shard.
+
+Readers announce themselves in the header's `readers` slots: each EZShmMirror claims one on connect and, on every
+read, stamps it with a heartbeat and the position of its slowest cursor. The writer never writes the slots; it reads
+them to report the slowest reader's lag (`ShMemCircBuff.reader_lag`) and, with `idle_timeout` set, to stop copying
+while no reader has stamped its slot recently. An idle writer still counts the samples it skips in samples_written,
+so indices stay monotonic, and moves the header's `valid_from` up past them -- readers treat everything below
+valid_from as lost. A reader that arrives (or wakes) later therefore starts cleanly at the first sample written
+after its heartbeat was seen, never at stale or zeroed slots.
+
+The same positions let the writer hold back for its slowest live reader instead of lapping it; see `OverflowPolicy`.
+Samples it drops as a result are counted in the header's `samples_dropped` and `messages_dropped`, and never enter
+samples_written, so a reader's indices stay contiguous over what it was given.
 """
 
+import ast
 import asyncio
 import base64
+import collections
+import concurrent.futures
 import ctypes
+import dataclasses
 import hashlib
 import multiprocessing.connection
 import time
 import typing
+from enum import Enum
 from multiprocessing.shared_memory import SharedMemory
 
 import ezmsg.core as ez
 import numpy as np
 import numpy.typing as npt
-from ezmsg.util.messages.axisarray import AxisArray, AxisBase
+from ezmsg.util.messages.axisarray import AxisArray, AxisBase, CoordinateAxis, LinearAxis
+from ezmsg.util.messages.util import replace
 
+from . import pages
 from .aux_meta import attrs_equal, axes_equal, encode_aux
+from .lod import METRIC_AXIS, METRIC_LABELS, MinMaxDecimator
+from .magic_ring import PAGESIZE, page_aligned_frames
+from .notify import Ringer
 
 UINT64_SIZE = 8
 BYTEORDER = "little"
@@ -54,6 +108,47 @@ def to_bytes(data: typing.Any) -> bytes:
         return np.int64(data).to_bytes(UINT64_SIZE, BYTEORDER, signed=False)
 
 
+def _dtype_plain(dtype: np.dtype) -> typing.Any:
+    if dtype.subdtype is not None:
+        base, shape = dtype.subdtype
+        return (_dtype_plain(base), shape)
+    if dtype.names is None:
+        return dtype.str
+    return {
+        "names": list(dtype.names),
+        "formats": [_dtype_plain(dtype.fields[name][0]) for name in dtype.names],
+        "offsets": [dtype.fields[name][1] for name in dtype.names],
+        "itemsize": dtype.itemsize,
+    }
+
+
+def dtype_descr(dtype: np.dtype) -> str:
+    """``dtype`` as text that :func:`dtype_from_descr` restores in full, for a shared header.
+
+    A structured dtype travels as a dict literal of its field names, formats,
+    offsets and itemsize -- unlike dtype.descr, which turns padding into
+    unnamed void fields -- and anything else as dtype.str, which keeps byte
+    order and datetime units.
+    """
+    if dtype.hasobject:
+        raise ValueError(f"dtype {dtype} holds Python objects, which cannot be shared")
+    return repr(_dtype_plain(dtype)) if dtype.names is not None else dtype.str
+
+
+def dtype_from_descr(descr: str) -> np.dtype:
+    return np.dtype(ast.literal_eval(descr) if descr.startswith("{") else descr)
+
+
+def lod_shmem_name(shmem_name: str, factor: int) -> str:
+    """The shmem_name under which the level-of-detail ring at ``factor`` is published."""
+    return f"{shmem_name}/lod{factor}"
+
+
+def shard_shmem_name(shmem_name: str, index: int) -> str:
+    """The shmem_name under which shard ``index`` of a sharded link is published."""
+    return f"{shmem_name}/shard{index}"
+
+
 def shorten_shmem_name(long_name: str) -> str:
     """
     Convert a potentially long shared memory name to a shorter, fixed-length name.
@@ -77,6 +172,9 @@ def shorten_shmem_name(long_name: str) -> str:
 
 
 MAXKEYLEN = 1024
+# Room for ShmemArrMeta.dtype's descriptor: a dtype.str such as "<f8" or
+# "<M8[ns]", or a structured dtype's fields (see dtype_descr).
+MAXDTYPELEN = 1024
 
 # Sentinel at offset 0 of every metadata segment ("EZMS"). Distinguishes one of
 # our headers from an unrelated segment that happens to collide on a name, and
@@ -91,7 +189,53 @@ SHMEM_META_MAGIC = 0x455A4D53
 # cost more than it is worth. What we do owe is a loud failure rather than a
 # quiet one, so the reader validates the magic and version up front and raises
 # instead of misreading a header it does not understand.
-SHMEM_META_STRUCT_VERSION = 1
+SHMEM_META_STRUCT_VERSION = 13
+
+# The header's per-message fields get a cache line to themselves. 64 bytes covers
+# x86-64 and most ARM cores; Apple silicon's 128-byte lines would still see the
+# hot line share with its neighbour, which is no worse than no padding at all.
+CACHE_LINE = 64
+
+# ShmemArrMeta.time_mode values.
+TIME_MODE_NONE = 0
+TIME_MODE_CHUNKS = 1
+TIME_MODE_SAMPLES = 2
+
+# One record per message written along a LinearAxis: where it starts in the ring
+# (as a samples_written count), its axis offset, and its length.
+TIME_RECORD_DTYPE = np.dtype([("sample", "<u8"), ("offset", "<f8"), ("n", "<u8")])
+
+# Most records a chunk time ring holds. A record per ring frame would guarantee
+# one for every sample still held, but costs more than the data for narrow
+# streams; past this, samples older than the oldest record are timed by
+# extrapolating back from it, which is exact unless the stream jumped.
+TIME_RECORDS_MAX = 4096
+
+# ShmemArrMeta.layout values: how the ring is laid out in memory. Either way
+# it is addressed as (frames, *frame_shape); see map_ring.
+LAYOUT_FRAME_MAJOR = 0
+LAYOUT_CHANNEL_MAJOR = 1
+
+# Room in the header's lod_factors list.
+MAX_LOD_LEVELS = 8
+
+# Room in the header's shard_bounds list.
+MAX_SHARDS = 64
+
+# Room in the header's readers list. A mirror that finds none free still reads,
+# but the writer cannot see it.
+MAX_READERS = 16
+# A slot whose heartbeat is older than this may be claimed by a new reader: its
+# owner exited without releasing it, or has not read in a very long time.
+READER_SLOT_STALE = 10.0
+# How recent a heartbeat must be for reader_lag to count the reader, when the
+# writer has no idle_timeout of its own to go by.
+READER_LIVE_WINDOW = 2.0
+
+# How often a writer blocked by OverflowPolicy.BLOCK rechecks its readers'
+# positions, and how often queued messages are retried when none arrive.
+BLOCK_POLL_INTERVAL = 0.001
+QUEUE_DRAIN_INTERVAL = 0.01
 
 
 class ShmemVersionError(RuntimeError):
@@ -101,6 +245,22 @@ class ShmemVersionError(RuntimeError):
     """
 
 
+class ReaderSlot(ctypes.Structure):
+    """One attached reader's entry in ShmemArrMeta.readers. Written only by that reader."""
+
+    _pack_ = 1
+    _fields_ = [
+        # 0 = free. Otherwise the owner's pid in the high half and random bits
+        # in the low, so two mirrors in one process differ.
+        ("token", ctypes.c_uint64),
+        # time.time() of the owner's last read. Wall clock, not monotonic: it
+        # is compared across processes.
+        ("heartbeat", ctypes.c_double),
+        # Absolute index of the next sample the owner's slowest cursor will read.
+        ("position", ctypes.c_uint64),
+    ]
+
+
 class ShmemArrMeta(ctypes.Structure):
     """
     Structure containing the metadata describing the separate shmem buffer.
@@ -121,25 +281,85 @@ class ShmemArrMeta(ctypes.Structure):
 
     _pack_ = 1
     _fields_ = [
+        # -- Line 0: identity and stream description. Written on (re)configure.
         # magic and struct_version lead so a reader can validate the layout
         # before it trusts a single field that follows.
         ("magic", ctypes.c_uint32),
         ("struct_version", ctypes.c_uint32),
         ("bvalid", ctypes.c_bool),
-        ("dtype", ctypes.c_char),
         ("srate", ctypes.c_double),
         ("ndim", ctypes.c_uint32),
-        ("shape", ctypes.c_uint32 * 64),
+        ("_pad0", ctypes.c_byte * (CACHE_LINE - 21)),
+        # -- Line 1: the only fields written per message, alone on their line so
+        # that the writer's stores do not invalidate the line a reader polls for
+        # everything else (and vice versa).
+        # Sequence counter guarding samples_written and the ring contents it
+        # describes. Odd while the writer is mid-update; bumped to the next even
+        # value once the update is complete. See ShMemCircBuff._begin_write.
+        ("write_seq", ctypes.c_uint64),
+        # Total samples written since this buffer generation began. Monotonic;
+        # the write position is samples_written % shape[0], and a reader's loss
+        # is plain subtraction against its own count.
+        ("samples_written", ctypes.c_uint64),
         ("buffer_generation", ctypes.c_uint32),
-        ("wrap_counter", ctypes.c_uint64),
+        # Total records written to a TIME_MODE_CHUNKS time ring this generation;
+        # the next goes in slot chunks_written % time_records.
+        ("chunks_written", ctypes.c_uint64),
+        # Samples below this index are not in the ring: the writer was idle, or
+        # the ring was resized (see module docstring). Otherwise 0.
+        ("valid_from", ctypes.c_uint64),
+        ("_pad1", ctypes.c_byte * (CACHE_LINE - 36)),
+        # -- Cold: read on (re)connect or rarely written.
+        ("shape", ctypes.c_uint32 * 64),
         ("_key_bytes", ctypes.c_byte * MAXKEYLEN),
         ("_key_len", ctypes.c_uint32),
-        ("write_index", ctypes.c_uint64),
+        # The ring's dtype; see the dtype property.
+        ("_dtype_bytes", ctypes.c_byte * MAXDTYPELEN),
+        ("_dtype_len", ctypes.c_uint32),
         # 0 = no metadata blob published yet. Otherwise names the segment at
         # shorten_shmem_name(f"{shmem_name}/meta{meta_generation}").
         ("meta_generation", ctypes.c_uint32),
         # Exact length of the blob; the segment itself is page-rounded.
         ("aux_nbytes", ctypes.c_uint32),
+        # What the time segment beside the ring holds: TIME_MODE_NONE (there is
+        # none), TIME_MODE_CHUNKS (time_records TIME_RECORD_DTYPE records) or
+        # TIME_MODE_SAMPLES (one float64 per ring frame).
+        ("time_mode", ctypes.c_uint32),
+        ("time_records", ctypes.c_uint32),
+        # Decimation factors of the min/max rings published beside this one, in
+        # ascending order, zero-terminated. See lod_shmem_name.
+        ("lod_factors", ctypes.c_uint32 * MAX_LOD_LEVELS),
+        # Name the segments holding the current ring, time ring and metadata blob
+        # (see module docstring). Pooling means these need not track the
+        # generations.
+        ("buffer_segment", ctypes.c_uint32),
+        ("time_segment", ctypes.c_uint32),
+        ("aux_segment", ctypes.c_uint32),
+        # write_seq's counterpart for the metadata blob, which is rewritten in
+        # place: odd while the writer is changing aux_segment, the blob, or
+        # aux_nbytes and meta_generation.
+        ("aux_seq", ctypes.c_uint32),
+        # Attached readers (see module docstring), claimed and stamped by them.
+        ("readers", ReaderSlot * MAX_READERS),
+        # Totals since the header was created, of what OverflowPolicy QUEUE and
+        # DROP discarded rather than lap a reader. Written only on a drop.
+        ("samples_dropped", ctypes.c_uint64),
+        ("messages_dropped", ctypes.c_uint64),
+        # How an integer ring's values map back to the stream's: value = raw *
+        # storage_scale + storage_offset. 1 and 0 for a floating-point ring.
+        ("storage_scale", ctypes.c_double),
+        ("storage_offset", ctypes.c_double),
+        # LAYOUT_FRAME_MAJOR or LAYOUT_CHANNEL_MAJOR.
+        ("layout", ctypes.c_uint32),
+        # 0, or the number of shards holding this stream's data (see module
+        # docstring). Shard i holds channels [shard_bounds[i], shard_bounds[i + 1]),
+        # all zero until the first message sets them.
+        ("n_shards", ctypes.c_uint32),
+        ("shard_bounds", ctypes.c_uint32 * (MAX_SHARDS + 1)),
+        # 1 if this buffer generation was resized from the one before it, whose
+        # samples_written count it continues (see module docstring); 0 if it
+        # started over from zero.
+        ("continues_previous", ctypes.c_uint32),
     ]
 
     @property
@@ -152,12 +372,226 @@ class ShmemArrMeta(ctypes.Structure):
         self._key_len = min(len(key_bytes), MAXKEYLEN)
         ctypes.memmove(self._key_bytes, key_bytes[: self._key_len], self._key_len)
 
+    @property
+    def dtype(self) -> np.dtype:
+        """The ring's dtype, in full: byte order, datetime units and structured fields included."""
+        return dtype_from_descr(ctypes.string_at(self._dtype_bytes, self._dtype_len).decode("ascii"))
+
+    @dtype.setter
+    def dtype(self, value: npt.DTypeLike) -> None:
+        value = np.dtype(value)
+        descr = dtype_descr(value).encode("ascii")
+        if len(descr) > MAXDTYPELEN:
+            raise ValueError(f"dtype {value} needs a {len(descr)}-byte descriptor; the header holds {MAXDTYPELEN}")
+        self._dtype_len = len(descr)
+        ctypes.memmove(self._dtype_bytes, descr, len(descr))
+
+
+class OverflowPolicy(str, Enum):
+    """What ShMemCircBuff does with a message that would overwrite samples a live reader has not read.
+
+    Only readers that have read recently count (see ShMemCircBuff.reader_lag),
+    so a reader that hangs or exits holds the writer back for a few seconds at
+    most. A layout change starts a new buffer generation regardless.
+    """
+
+    # Lap the reader, which learns of it as lost samples. The default: the
+    # writer never waits on anyone.
+    OVERWRITE = "overwrite"
+    # Await, in on_message, until the reader has made room. Backpressure
+    # reaches upstream through ezmsg; nothing is lost.
+    BLOCK = "block"
+    # Hold the message in a queue of up to queue_len and write it once there is
+    # room, dropping (and counting) only when the queue is full.
+    QUEUE = "queue"
+    # Drop the message, and count it in the header.
+    DROP = "drop"
+
+
+def map_ring(meta: ShmemArrMeta, buf: memoryview) -> npt.NDArray:
+    """The ring in ``buf`` as ``meta`` describes it, addressed (frames, *frame_shape) whatever its layout.
+
+    A LAYOUT_CHANNEL_MAJOR ring is stored (*frame_shape, frames) -- each
+    channel's history contiguous -- and returned as a transposed view, so code
+    that slices frames off the front works on either.
+    """
+    shape = tuple(meta.shape[: meta.ndim])
+    if meta.layout == LAYOUT_CHANNEL_MAJOR:
+        return np.moveaxis(np.ndarray(shape[1:] + shape[:1], dtype=meta.dtype, buffer=buf), -1, 0)
+    return np.ndarray(shape, dtype=meta.dtype, buffer=buf)
+
 
 class ShMemCircBuffSettings(ez.Settings):
     shmem_name: typing.Optional[str]
     buf_dur: float
     conn: typing.Optional[multiprocessing.connection.Connection] = None
     axis: str = "time"
+    # Wake readers blocked in EZShmMirror.wait after every write (see .notify).
+    # Costs one stat() per message while nobody is waiting.
+    notify: bool = True
+    # Round the ring's length up so its byte size is a whole number of pages,
+    # which lets EZShmMirror(double_map=True) serve wrapped reads as views (see
+    # .magic_ring). Adds at most a page's worth of frames.
+    page_align: bool = False
+    # Publish where each sample falls along the buffered axis, beside the ring
+    # (see module docstring), for EZShmMirror.timestamps.
+    timestamps: bool = True
+    # Also publish min/max envelopes of the stream decimated by each of these
+    # factors (e.g. (10, 100, 1000)), each as its own shmem link at
+    # lod_shmem_name(shmem_name, factor), so a plot zoomed out over a fast
+    # stream can read one bucket per pixel instead of every sample. A factor
+    # that is a multiple of a smaller one is reduced from that level's output
+    # rather than from the raw samples.
+    lod_factors: typing.Tuple[int, ...] = ()
+    # Make the ring's pages resident when it is allocated rather than on the
+    # first lap's writes (see .pages): touch every page, ask for transparent
+    # huge pages first, and/or mlock it. Each trades allocation time (and, for
+    # mlock, unswappable memory) for write latency that is flat from the first
+    # sample.
+    prefault: bool = False
+    hugepages: bool = False
+    mlock: bool = False
+    # Stop copying messages into the ring while no reader has read within this
+    # many seconds, for taps deployed "just in case". The header is still kept
+    # current, so a reader can attach at any time; it sees the stream from the
+    # first message after it did. None always copies.
+    idle_timeout: typing.Optional[float] = None
+    # See OverflowPolicy. The LOD rings follow the same policy, except that
+    # they are written synchronously and so never block.
+    overflow: OverflowPolicy = OverflowPolicy.OVERWRITE
+    # Most messages OverflowPolicy.QUEUE holds.
+    queue_len: int = 64
+    # Write each message -- the copy into the ring and everything around it --
+    # on a dedicated thread, so a large copy does not hold up other subscribers
+    # on this unit's event loop. NumPy releases the GIL for the copy. Messages
+    # still go into the ring in order, and each is published (write_seq,
+    # samples_written, the doorbell) only once its copy is complete. Costs a
+    # thread hop per message, which only pays off for large messages.
+    threaded_copy: bool = False
+    # Store samples in the ring as this dtype rather than the message's, e.g.
+    # "float32" or "float16" to halve or quarter the ring's size and the bytes
+    # moved per message. An integer dtype such as "int16" quantizes: the ring
+    # holds round((value - storage_offset) / storage_scale), clipped to the
+    # dtype's range, and the header publishes scale and offset for readers (see
+    # EZShmMirror's rescale). None stores the message's dtype as is.
+    storage_dtype: typing.Optional[str] = None
+    storage_scale: typing.Optional[float] = None
+    storage_offset: float = 0.0
+    # Lay the ring out channel by channel -- each channel's history contiguous
+    # -- instead of frame by frame, so reading a few channels over a long
+    # window (EZShmMirror.read's channels) touches only their memory. Writes
+    # scatter each frame across the channels instead, and the ring cannot be
+    # double-mapped.
+    channel_major: bool = False
+    # Split the channels -- the first non-buffered axis -- into this many
+    # contiguous groups, each published as a link of its own at
+    # shard_shmem_name(shmem_name, i) with every other setting as here, so
+    # consumers owning a channel range each map only theirs (see
+    # EZShmMirror.open_shard). This link then keeps no ring of its own. Values
+    # below 2 do not shard.
+    shards: int = 1
+
+
+def store_wrapped(ring: npt.NDArray, index: int, values: npt.NDArray) -> None:
+    """Store ``values`` in ``ring`` from slot ``index``, wrapping past the end. No more than the ring holds."""
+    n = values.shape[0]
+    assert n <= ring.shape[0], f"{n} values do not fit in a ring of {ring.shape[0]}"
+    n_first = min(n, ring.shape[0] - index)
+    ring[index : index + n_first] = values[:n_first]
+    if n > n_first:
+        ring[: n - n_first] = values[n_first:]
+
+
+def _page_round(nbytes: int) -> int:
+    return max(PAGESIZE, -(-nbytes // PAGESIZE) * PAGESIZE)
+
+
+class _SegmentPool:
+    """Shared memory segments of one kind, kept for reuse across buffer generations.
+
+    Creating and unlinking a segment costs syscalls, page faults on first touch
+    and, with a resource tracker, a round trip to it -- milliseconds, in the
+    writer's event loop, per layout change. A producer that toggles channel
+    selection changes layout back and forth between a few sizes, so instead of
+    unlinking a retired segment we keep a couple, and hand one back out whenever
+    the new layout fits.
+
+    Headroom: new segments are HEADROOM times larger than asked, so a modest
+    growth still fits. Slack: a segment more than MAX_SLACK times larger than
+    needed is not reused, so a stream that shrinks for good does not keep its
+    largest allocation forever.
+    """
+
+    HEADROOM = 1.25
+    MAX_SLACK = 4.0
+    MAX_SPARE = 2
+
+    def __init__(self, base_name: str):
+        self.base_name = base_name
+        self._spare: typing.List[typing.Tuple[int, SharedMemory]] = []
+
+    def acquire(self, nbytes: int, new_id: int, purpose: str) -> typing.Tuple[int, SharedMemory]:
+        """A segment of at least ``nbytes``: a spare that fits, or a new one named with ``new_id``."""
+        fits = [entry for entry in self._spare if nbytes <= entry[1].size <= _page_round(int(nbytes * self.MAX_SLACK))]
+        if fits:
+            entry = min(fits, key=lambda e: e[1].size)
+            self._spare.remove(entry)
+            ez.logger.info(f"Reusing {entry[1].size}-byte segment {entry[1].name} for {purpose}.")
+            return entry
+        size = _page_round(int(nbytes * self.HEADROOM))
+        return new_id, _persist_create_shmem(shorten_shmem_name(self.base_name + str(new_id)), size, purpose=purpose)
+
+    def release(self, segment_id: int, shm: SharedMemory) -> None:
+        """Return a segment nobody in this process references any more."""
+        self._spare.append((segment_id, shm))
+        while len(self._spare) > self.MAX_SPARE:
+            _unlink_shmem(self._spare.pop(0)[1])
+
+    def clear(self) -> None:
+        for _, shm in self._spare:
+            _unlink_shmem(shm)
+        self._spare = []
+
+
+def _unlink_shmem(shm: SharedMemory) -> None:
+    shm.close()
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+class _IntervalEstimator:
+    """The sample interval of a CoordinateAxis stream, kept up to date in O(1) per message.
+
+    Sizing a ring needs a rate, and a coordinate axis does not state one. Taking
+    the median of ``np.diff`` over each message's timestamps rescans all of them
+    on every message; instead each message contributes one mean interval, from
+    the previous message's last timestamp to its own, and the estimate is the
+    median of the last few -- robust to the occasional pause the same way the
+    per-sample median was.
+    """
+
+    WINDOW = 32
+
+    def __init__(self):
+        self._intervals: typing.Deque[float] = collections.deque(maxlen=self.WINDOW)
+        self._last_t: typing.Optional[float] = None
+
+    def observe(self, t: npt.NDArray) -> None:
+        if not len(t):
+            return
+        if self._last_t is None:
+            span, steps = t[-1] - t[0], len(t) - 1
+        else:
+            span, steps = t[-1] - self._last_t, len(t)
+        if steps > 0 and span > 0:
+            self._intervals.append(float(span) / steps)
+        self._last_t = float(t[-1])
+
+    @property
+    def rate(self) -> typing.Optional[float]:
+        return 1 / float(np.median(self._intervals)) if self._intervals else None
 
 
 class ShMemCircBuffState(ez.State):
@@ -165,7 +599,20 @@ class ShMemCircBuffState(ez.State):
     meta_struct: typing.Optional[ShmemArrMeta] = None
     buffer_shmem: typing.Optional[SharedMemory] = None
     buffer_arr: typing.Optional[npt.NDArray] = None
+    # The time segment and its contents as an array; see TIME_MODE_*.
+    time_shmem: typing.Optional[SharedMemory] = None
+    time_arr: typing.Optional[npt.NDArray] = None
+    # Retired ring and time segments, for reuse by later generations.
+    buffer_pool: typing.Optional[_SegmentPool] = None
+    time_pool: typing.Optional[_SegmentPool] = None
     meta_hash: int = -1
+    # (dtype, frame shape, key, gain) of the message the buffer was last laid
+    # out for; a message that matches skips _update_meta_if_needed's work. The
+    # gain is None for a CoordinateAxis, whose rate is estimated once per
+    # buffer generation rather than compared per message.
+    fingerprint: typing.Optional[tuple] = None
+    # Rate of a CoordinateAxis stream, for sizing its ring.
+    interval_estimator: typing.Optional[_IntervalEstimator] = None
     # Segment holding the serialized static metadata (see .aux_meta).
     aux_shmem: typing.Optional[SharedMemory] = None
     # The (dims, axes, attrs, key) we last encoded, held by reference for the
@@ -176,6 +623,38 @@ class ShMemCircBuffState(ez.State):
     last_aux_blob: typing.Optional[bytes] = None
     # attrs keys dropped as non-plain, remembered so we warn once, not per message.
     warned_dropped_attrs: typing.Optional[frozenset] = None
+    # Whether we have said that SETTINGS.mlock failed, so we say it once.
+    warned_mlock: bool = False
+    # Until when a reader is known to be live, from the newest heartbeat at the
+    # last scan of the readers list; no rescan is needed before then.
+    readers_live_until: float = 0.0
+    # Messages OverflowPolicy.QUEUE is holding for lack of room, oldest first.
+    overflow_queue: typing.Optional[typing.Deque[AxisArray]] = None
+    # Whether we have said that messages are being dropped, so we say it once.
+    warned_dropped: bool = False
+    # The single writer thread for SETTINGS.threaded_copy, created on first use.
+    # One worker, so messages are written in the order they were submitted.
+    copy_executor: typing.Optional[concurrent.futures.ThreadPoolExecutor] = None
+    # Rings the doorbells of waiting readers; None when SETTINGS.notify is off.
+    ringer: typing.Optional[Ringer] = None
+    # One _LodLevel per SETTINGS.lod_factors, in ascending order of factor.
+    lod_levels: typing.Optional[list] = None
+    # One child ShMemCircBuff per shard; empty when not sharding.
+    shard_sinks: typing.Optional[list] = None
+    # (channel count, source channel axis, bounds, per-shard channel axes) as
+    # last computed, so a message with the same channels reuses them -- which
+    # also keeps each shard's metadata check an identity compare.
+    shard_layout: typing.Optional[tuple] = None
+
+
+class _LodLevel(typing.NamedTuple):
+    factor: int
+    sink: "ShMemCircBuff"
+    decimator: MinMaxDecimator
+    # Index of the level this one reduces further, or None for the raw samples.
+    source: typing.Optional[int]
+    # Reused in every message, so the child's metadata check stays an identity compare.
+    metric_axis: CoordinateAxis
 
 
 def _persist_create_shmem(name: str, size: int, purpose: str = "") -> SharedMemory:
@@ -232,18 +711,45 @@ class ShMemCircBuff(ez.Unit):
         #  Even then, the meta_struct will be invalid until we receive
         #  a data packet.
         self._reset_meta()
+        self._reset_lods()
+        self._reset_shards()
 
     @ez.subscriber(INPUT_SETTINGS)
     def on_settings(self, msg: ShMemCircBuffSettings) -> None:
+        # Everything below rebuilds what the writer thread may be writing into.
+        self._join_writer()
         b_reset_meta = msg.shmem_name != self.SETTINGS.shmem_name
-        b_reset_buff = msg.buf_dur != self.SETTINGS.buf_dur
-        b_reset_buff = b_reset_buff or msg.axis != self.SETTINGS.axis
+        b_resize = msg.buf_dur != self.SETTINGS.buf_dur
+        b_reset_buff = msg.axis != self.SETTINGS.axis
+        b_reset_buff = b_reset_buff or msg.timestamps != self.SETTINGS.timestamps
+        storage = ("storage_dtype", "storage_scale", "storage_offset", "channel_major", "shards")
+        b_reset_buff = b_reset_buff or any(getattr(msg, f) != getattr(self.SETTINGS, f) for f in storage)
+        b_reset_lods = b_reset_meta or b_reset_buff or msg.lod_factors != self.SETTINGS.lod_factors
+        child_fields = ("notify", "page_align", "prefault", "hugepages", "mlock", "idle_timeout")
+        child_fields += ("overflow", "queue_len")
+        b_reset_lods = b_reset_lods or any(getattr(msg, f) != getattr(self.SETTINGS, f) for f in child_fields)
         self.apply_settings(msg)
 
+        if b_resize and not (b_reset_buff or b_reset_meta or b_reset_lods):
+            # Only the duration changed: keep what history fits, here and in the
+            # children, rather than blanking every reader.
+            for sink in [level.sink for level in self.STATE.lod_levels or []] + (self.STATE.shard_sinks or []):
+                sink.on_settings(dataclasses.replace(sink.SETTINGS, buf_dur=msg.buf_dur))
+            if not self._resize_buffer():
+                # No ring yet; the next message lays one out at the new length.
+                self.STATE.meta_hash = -1
+                self.STATE.fingerprint = None
+        elif b_resize:
+            b_reset_buff = True
+
         if b_reset_buff or b_reset_meta:
             # First we destroy the data buffer, because it is no
             #  longer valid with the new settings.
             self._cleanup_buffer()
+            # Forget its description too, or a message that matches it would not
+            # rebuild it.
+            self.STATE.meta_hash = -1
+            self.STATE.fingerprint = None
             # It will be recreated with the next data packet.
 
         if b_reset_meta:
@@ -252,9 +758,27 @@ class ShMemCircBuff(ez.Unit):
             # Then we reset the metadata to the new name.
             self._reset_meta(reset_generation=False)
 
+        elif msg.notify != (self.STATE.ringer is not None):
+            if self.STATE.ringer is not None:
+                self.STATE.ringer.close()
+            self.STATE.ringer = Ringer(shorten_shmem_name(self.SETTINGS.shmem_name)) if msg.notify else None
+
+        if b_reset_lods:
+            self._cleanup_lods()
+            self._reset_lods()
+            # Shards take every setting, so rebuild them on any change that
+            # could matter to them.
+            self._cleanup_shards()
+            self._reset_shards()
+
         # Do not reset the buffer. We will wait for a new data packet.
 
     async def shutdown(self) -> None:
+        if self.STATE.copy_executor is not None:
+            self.STATE.copy_executor.shutdown(wait=True)
+            self.STATE.copy_executor = None
+        self._cleanup_shards()
+        self._cleanup_lods()
         self._cleanup_buffer()
         self._cleanup_aux()
         self._cleanup_meta()
@@ -273,6 +797,9 @@ class ShMemCircBuff(ez.Unit):
 
         self._cleanup_aux()
         self.STATE.meta_struct = None
+        if self.STATE.ringer is not None:
+            self.STATE.ringer.close()
+            self.STATE.ringer = None
 
         if self.STATE.meta_shmem is not None:
             self.STATE.meta_shmem.close()
@@ -326,6 +853,175 @@ class ShMemCircBuff(ez.Unit):
             del self.STATE.buffer_shmem
         self.STATE.buffer_shmem = None
 
+        self.STATE.time_arr = None
+        if self.STATE.time_shmem is not None:
+            self.STATE.time_shmem.close()
+            try:
+                self.STATE.time_shmem.unlink()
+            except FileNotFoundError:
+                pass
+            del self.STATE.time_shmem
+        self.STATE.time_shmem = None
+
+        # Spares are named after shmem_name, so they go too.
+        for pool in (self.STATE.buffer_pool, self.STATE.time_pool):
+            if pool is not None:
+                pool.clear()
+        self.STATE.buffer_pool = None
+        self.STATE.time_pool = None
+
+    def _retire_segments(self) -> None:
+        """Hand the current ring and time segments back to their pools, for the next generation to reuse."""
+        self.STATE.buffer_arr = None
+        self.STATE.time_arr = None
+        if self.STATE.buffer_shmem is not None:
+            self.STATE.buffer_pool.release(self.STATE.meta_struct.buffer_segment, self.STATE.buffer_shmem)
+            self.STATE.buffer_shmem = None
+        if self.STATE.time_shmem is not None:
+            self.STATE.time_pool.release(self.STATE.meta_struct.time_segment, self.STATE.time_shmem)
+            self.STATE.time_shmem = None
+
+    def _reset_lods(self) -> None:
+        """Create a child sink per SETTINGS.lod_factors and list the factors in the header."""
+        # When sharding, each shard keeps its own levels instead.
+        factors = [] if self.SETTINGS.shards > 1 else sorted(set(int(f) for f in self.SETTINGS.lod_factors))
+        if any(f < 2 for f in factors) or len(factors) > MAX_LOD_LEVELS:
+            raise ValueError(f"lod_factors must be at most {MAX_LOD_LEVELS} integers >= 2, got {factors}")
+        levels = []
+        for factor in factors:
+            # Cascade from the largest smaller level that divides this one.
+            source = next((i for i in reversed(range(len(levels))) if factor % levels[i].factor == 0), None)
+            step = factor if source is None else factor // levels[source].factor
+            sink = ShMemCircBuff(
+                ShMemCircBuffSettings(
+                    shmem_name=lod_shmem_name(self.SETTINGS.shmem_name, factor),
+                    buf_dur=self.SETTINGS.buf_dur,
+                    axis=self.SETTINGS.axis,
+                    notify=self.SETTINGS.notify,
+                    page_align=self.SETTINGS.page_align,
+                    timestamps=self.SETTINGS.timestamps,
+                    prefault=self.SETTINGS.prefault,
+                    hugepages=self.SETTINGS.hugepages,
+                    mlock=self.SETTINGS.mlock,
+                    idle_timeout=self.SETTINGS.idle_timeout,
+                    overflow=self.SETTINGS.overflow,
+                    queue_len=self.SETTINGS.queue_len,
+                    storage_dtype=self.SETTINGS.storage_dtype,
+                    storage_scale=self.SETTINGS.storage_scale,
+                    storage_offset=self.SETTINGS.storage_offset,
+                    channel_major=self.SETTINGS.channel_major,
+                )
+            )
+            # The child is never run as a Unit -- we call its writer directly --
+            # so it needs the STATE that running it would have created.
+            sink._instantiate_state()
+            sink._reset_meta()
+            metric = CoordinateAxis(data=np.array(METRIC_LABELS), dims=[METRIC_AXIS])
+            levels.append(_LodLevel(factor, sink, MinMaxDecimator(step), source, metric))
+        self.STATE.lod_levels = levels
+
+        if self.STATE.meta_struct is not None:
+            self.STATE.meta_struct.lod_factors[:] = factors + [0] * (MAX_LOD_LEVELS - len(factors))
+
+    def _cleanup_lods(self) -> None:
+        for level in self.STATE.lod_levels or []:
+            level.sink._cleanup_buffer()
+            level.sink._cleanup_aux()
+            level.sink._cleanup_meta()
+        self.STATE.lod_levels = None
+        if self.STATE.meta_struct is not None:
+            self.STATE.meta_struct.lod_factors[:] = [0] * MAX_LOD_LEVELS
+
+    def _reset_shards(self) -> None:
+        """Create a child sink per shard if SETTINGS.shards calls for them, and list them in the header."""
+        n_shards = self.SETTINGS.shards
+        if n_shards > MAX_SHARDS:
+            raise ValueError(f"shards must be at most {MAX_SHARDS}, got {n_shards}")
+        sinks = []
+        for index in range(n_shards if n_shards > 1 else 0):
+            sink = ShMemCircBuff(
+                dataclasses.replace(
+                    self.SETTINGS, shmem_name=shard_shmem_name(self.SETTINGS.shmem_name, index), shards=1, conn=None
+                )
+            )
+            # Never run as a Unit; see _reset_lods.
+            sink._instantiate_state()
+            sink._reset_meta()
+            sink._reset_lods()
+            sinks.append(sink)
+        self.STATE.shard_sinks = sinks
+        self.STATE.shard_layout = None
+        if self.STATE.meta_struct is not None:
+            self.STATE.meta_struct.n_shards = len(sinks)
+            self.STATE.meta_struct.shard_bounds[:] = [0] * (MAX_SHARDS + 1)
+
+    def _cleanup_shards(self) -> None:
+        for sink in self.STATE.shard_sinks or []:
+            sink._cleanup_lods()
+            sink._cleanup_buffer()
+            sink._cleanup_aux()
+            sink._cleanup_meta()
+        self.STATE.shard_sinks = None
+        self.STATE.shard_layout = None
+        if self.STATE.meta_struct is not None:
+            self.STATE.meta_struct.n_shards = 0
+
+    @staticmethod
+    def _slice_axis(axis: typing.Optional[AxisBase], start: int, stop: int) -> typing.Optional[AxisBase]:
+        """``axis``, describing channels, cut down to channels ``start`` to ``stop``."""
+        if axis is None:
+            return None
+        if hasattr(axis, "data"):
+            return CoordinateAxis(data=axis.data[start:stop], dims=axis.dims, unit=axis.unit)
+        return LinearAxis(gain=axis.gain, offset=axis.offset + start * axis.gain, unit=axis.unit)
+
+    def _write_shards(self, msg: AxisArray, data: npt.NDArray) -> None:
+        """Hand each shard its channels of this message, buffered axis first."""
+        if data.ndim < 2:
+            raise ValueError(f"sharding needs a channel axis beside {self.SETTINGS.axis!r}; got dims {msg.dims}")
+        sinks = self.STATE.shard_sinks
+        dims = [self.SETTINGS.axis] + [d for d in msg.dims if d != self.SETTINGS.axis]
+        ch_axis = msg.axes.get(dims[1])
+        n_ch = data.shape[1]
+        layout = self.STATE.shard_layout
+        if layout is None or layout[0] != n_ch or layout[1] is not ch_axis:
+            bounds = [i * n_ch // len(sinks) for i in range(len(sinks) + 1)]
+            sub_axes = [self._slice_axis(ch_axis, lo, hi) for lo, hi in zip(bounds, bounds[1:])]
+            layout = self.STATE.shard_layout = (n_ch, ch_axis, bounds, sub_axes)
+            self.STATE.meta_struct.shard_bounds[: len(bounds)] = bounds
+        _, _, bounds, sub_axes = layout
+        for sink, lo, hi, sub_axis in zip(sinks, bounds, bounds[1:], sub_axes):
+            if hi == lo:
+                # More shards than channels.
+                continue
+            axes = msg.axes if sub_axis is None else {**msg.axes, dims[1]: sub_axis}
+            sink._write_message(AxisArray(data[:, lo:hi], dims=dims, axes=axes, attrs=msg.attrs, key=msg.key))
+
+    def _write_lods(self, msg: AxisArray, data: npt.NDArray) -> None:
+        """Feed this message's samples, buffered axis first, through the decimation cascade."""
+        if not self.STATE.lod_levels:
+            return
+        axis = msg.axes[self.SETTINGS.axis]
+        if hasattr(axis, "data"):
+            t = np.asarray(axis.data, dtype=np.float64)
+        else:
+            t = axis.offset + np.arange(data.shape[0]) * axis.gain
+        dims = [self.SETTINGS.axis] + [d for d in msg.dims if d != self.SETTINGS.axis] + [METRIC_AXIS]
+        outputs = []
+        for level in self.STATE.lod_levels:
+            lo, hi, lt = (data, data, t) if level.source is None else outputs[level.source]
+            lo, hi, lt = level.decimator.push(lo, hi, lt)
+            outputs.append((lo, hi, lt))
+            if not lo.shape[0]:
+                continue
+            if hasattr(axis, "data"):
+                lod_axis = CoordinateAxis(data=lt, dims=[self.SETTINGS.axis], unit=axis.unit)
+            else:
+                lod_axis = LinearAxis(gain=axis.gain * level.factor, offset=float(lt[0]), unit=axis.unit)
+            axes = {**msg.axes, self.SETTINGS.axis: lod_axis, METRIC_AXIS: level.metric_axis}
+            lod_msg = AxisArray(np.stack((lo, hi), axis=-1), dims=dims, axes=axes, attrs=msg.attrs, key=msg.key)
+            level.sink._write_message(lod_msg)
+
     def _reset_meta(self, reset_generation: bool = True) -> None:
         """
         Crete the metadata shared memory object.
@@ -352,6 +1048,11 @@ class ShMemCircBuff(ez.Unit):
         self.STATE.meta_struct.aux_nbytes = 0
         if reset_generation:
             self.STATE.meta_struct.buffer_generation = -1
+        factors = [level.factor for level in self.STATE.lod_levels or []]
+        self.STATE.meta_struct.lod_factors[:] = factors + [0] * (MAX_LOD_LEVELS - len(factors))
+        self.STATE.meta_struct.n_shards = len(self.STATE.shard_sinks or [])
+        if self.SETTINGS.notify:
+            self.STATE.ringer = Ringer(short_name)
         # We will wait for a data packet before we modify the remaining fields.
 
     def _update_aux_if_needed(self, msg: AxisArray) -> bool:
@@ -368,7 +1069,8 @@ class ShMemCircBuff(ez.Unit):
         2. Encode, and compare the bytes to what is published. This absorbs
            producers that rebuild equal metadata every message -- they cost an
            encode, but never a republish, so a reader is never woken for nothing.
-        3. Allocate a new generation's segment and point the header at it.
+        3. Publish a new generation: rewritten in place while the blob fits the
+           page-rounded segment, in a new segment when it does not.
 
         Returns True if a new generation was published.
         """
@@ -379,7 +1081,7 @@ class ShMemCircBuff(ez.Unit):
             if (
                 msg.key == last_key
                 and msg.dims == last_dims
-                and axes_equal(msg.axes, last_axes)
+                and axes_equal(msg.axes, last_axes, static_axis=self.SETTINGS.axis)
                 and attrs_equal(msg.attrs, last_attrs)
             ):
                 return False
@@ -406,17 +1108,25 @@ class ShMemCircBuff(ez.Unit):
             return False
         self.STATE.last_aux_blob = blob
 
-        self._cleanup_aux_segment()
+        meta = self.STATE.meta_struct
         # 0 means "nothing published", so skip it when the uint32 wraps.
-        generation = (self.STATE.meta_struct.meta_generation + 1) % (2**32) or 1
-        aux_name = shorten_shmem_name(self.SETTINGS.shmem_name + "/meta" + str(generation))
-        self.STATE.aux_shmem = _persist_create_shmem(aux_name, len(blob), purpose=f"stream metadata gen {generation}")
+        generation = (meta.meta_generation + 1) % (2**32) or 1
+        # Everything a reader consults -- which segment, its contents, their
+        # length and generation -- changes inside one aux_seq section, so a
+        # reader that saw it even and unchanged across its copy has one whole
+        # blob.
+        meta.aux_seq += 1
+        if self.STATE.aux_shmem is None or self.STATE.aux_shmem.size < len(blob):
+            self._cleanup_aux_segment()
+            aux_name = shorten_shmem_name(self.SETTINGS.shmem_name + "/meta" + str(generation))
+            self.STATE.aux_shmem = _persist_create_shmem(
+                aux_name, _page_round(len(blob)), purpose=f"stream metadata gen {generation}"
+            )
+            meta.aux_segment = generation
         self.STATE.aux_shmem.buf[: len(blob)] = blob
-
-        # Order matters: the segment is fully written before the header names it,
-        # so a reader never sees a generation it cannot completely read.
-        self.STATE.meta_struct.aux_nbytes = len(blob)
-        self.STATE.meta_struct.meta_generation = generation
+        meta.aux_nbytes = len(blob)
+        meta.meta_generation = generation
+        meta.aux_seq += 1
 
         if self.SETTINGS.conn is not None:
             self.SETTINGS.conn.send("aux updated")
@@ -433,6 +1143,28 @@ class ShMemCircBuff(ez.Unit):
             del self.STATE.aux_shmem
         self.STATE.aux_shmem = None
 
+    def _begin_write(self) -> None:
+        """Open a write_seq critical section: the counter goes odd.
+
+        Must precede the first store into the ring, so a reader that copied any
+        of the slots we are about to touch sees the counter move when it checks
+        afterwards.
+        """
+        self.STATE.meta_struct.write_seq += 1
+
+    def _end_write(self) -> None:
+        """Close the critical section: the counter goes back to even.
+
+        Must follow the last store -- data and indices both -- so a reader that
+        sees an even value knows samples_written agrees with the ring.
+        """
+        self.STATE.meta_struct.write_seq += 1
+
+    def _notify(self) -> None:
+        """Wake readers blocked waiting for data. Call after _end_write."""
+        if self.STATE.ringer is not None:
+            self.STATE.ringer.ring()
+
     def _n_frames_for_axis(self, axis: AxisBase) -> int:
         """
         Utility function to calculate the number of frames to allocate for the buffer.
@@ -443,52 +1175,99 @@ class ShMemCircBuff(ez.Unit):
         Returns: number of frames we should buffer based on the axis and settings.
         """
         if hasattr(axis, "data"):
-            fs = 1 / np.median(np.diff(axis.data)) if len(axis.data) > 1 else 100.0
+            fs = self.STATE.interval_estimator.rate or 100.0
         else:
             fs = 1 / axis.gain
         return int(np.ceil(self.SETTINGS.buf_dur * fs))
 
-    def _get_msg_meta(self, msg: AxisArray) -> typing.Tuple[bytes, float, int, typing.Tuple[int, ...]]:
+    def _time_mode(self, axis: AxisBase) -> int:
+        if not self.SETTINGS.timestamps:
+            return TIME_MODE_NONE
+        return TIME_MODE_SAMPLES if hasattr(axis, "data") else TIME_MODE_CHUNKS
+
+    def _storage_dtype(self, msg_dtype: np.dtype) -> np.dtype:
+        """The ring's dtype for messages of ``msg_dtype``: SETTINGS.storage_dtype, validated, if set."""
+        if self.SETTINGS.storage_dtype is None:
+            return msg_dtype
+        dtype = np.dtype(self.SETTINGS.storage_dtype)
+        if dtype.kind not in "fiu":
+            raise ValueError(f"storage_dtype must be a floating-point or integer dtype, got {dtype}")
+        if dtype.kind in "iu" and not self.SETTINGS.storage_scale:
+            raise ValueError(f"storage_dtype {dtype} quantizes, so it needs a nonzero storage_scale")
+        return dtype
+
+    def _quantize(self, data: npt.NDArray) -> npt.NDArray:
+        """``data`` as an integer ring stores it (see SETTINGS.storage_dtype).
+
+        Floating-point storage needs nothing here: storing into the ring casts.
+        """
+        if self.STATE.buffer_arr.dtype.kind not in "iu":
+            return data
+        info = np.iinfo(self.STATE.buffer_arr.dtype)
+        scaled = (data - self.SETTINGS.storage_offset) * (1.0 / self.SETTINGS.storage_scale)
+        np.rint(scaled, out=scaled)
+        return np.clip(scaled, info.min, info.max, out=scaled)
+
+    def _get_msg_meta(
+        self, msg: AxisArray, data: npt.NDArray
+    ) -> typing.Tuple[np.dtype, float, int, typing.Tuple[int, ...]]:
         """
         Utility function to extract relevant metadata from the incoming message.
 
         Args:
             msg: The incoming AxisArray message.
+            data: Its data with the buffered axis moved first, as on_message already has it.
 
         Returns:
             A tuple of metadata extracted from the message.
             msg_dtype, msg_srate, n_frames, frame_shape
         """
-        ax_idx = msg.get_axis_idx(self.SETTINGS.axis)
         axis = msg.axes[self.SETTINGS.axis]
         n_frames = self._n_frames_for_axis(axis)
-        frame_shape = msg.data.shape[:ax_idx] + msg.data.shape[ax_idx + 1 :]
-        data = np.moveaxis(msg.data, ax_idx, 0)
-        msg_dtype = data.dtype.char.encode("utf8")
+        frame_shape = data.shape[1:]
+        dtype = self._storage_dtype(data.dtype)
+        if self.SETTINGS.page_align:
+            n_frames = page_aligned_frames(n_frames, int(np.prod(frame_shape)) * dtype.itemsize)
+        msg_dtype = dtype
         msg_srate = 1 / axis.gain if hasattr(axis, "gain") else 0.0
         return msg_dtype, msg_srate, n_frames, frame_shape
 
-    def _update_meta_if_needed(self, msg: AxisArray) -> bool:
+    @staticmethod
+    def _layout_hash(
+        dtype: np.dtype, srate: float, n_frames: int, frame_shape: typing.Tuple[int, ...], key: str
+    ) -> int:
+        return hash((dtype, srate, n_frames) + tuple(frame_shape) + (key,))
+
+    def _update_meta_if_needed(self, msg: AxisArray, data: npt.NDArray) -> bool:
         """
         Update the metadata structure if the incoming message has different metadata.
 
+        Runs on every message, so it first compares a fingerprint of what
+        decides the layout -- a tuple of values the message already holds -- and
+        only when that changed derives the full metadata and its hash.
+
         Args:
             msg: The incoming AxisArray message.
+            data: Its data with the buffered axis moved first.
 
         Returns: True if the metadata was updated, False otherwise.
         """
+        axis = msg.axes[self.SETTINGS.axis]
+        if hasattr(axis, "data"):
+            if self.STATE.interval_estimator is None:
+                self.STATE.interval_estimator = _IntervalEstimator()
+            self.STATE.interval_estimator.observe(axis.data)
+            fingerprint = (data.dtype, data.shape[1:], msg.key, None)
+        else:
+            fingerprint = (data.dtype, data.shape[1:], msg.key, axis.gain)
+        if fingerprint == self.STATE.fingerprint:
+            return False
+        self.STATE.fingerprint = fingerprint
+
         # Extract the metadata from the incoming message
-        msg_dtype, msg_srate, n_frames, frame_shape = self._get_msg_meta(msg)
+        msg_dtype, msg_srate, n_frames, frame_shape = self._get_msg_meta(msg, data)
         # Get its hash for quick comparison, and we will reuse the hash.
-        new_hash = hash(
-            (
-                msg_dtype,
-                msg_srate,
-                n_frames,
-            )
-            + frame_shape
-            + (msg.key,)
-        )
+        new_hash = self._layout_hash(msg_dtype, msg_srate, n_frames, frame_shape, msg.key)
         b_update = self.STATE.meta_hash != new_hash
         if b_update:
             if self.SETTINGS.conn is not None:
@@ -500,8 +1279,15 @@ class ShMemCircBuff(ez.Unit):
             self.STATE.meta_struct.ndim = 1 + len(frame_shape)
             self.STATE.meta_struct.shape[: self.STATE.meta_struct.ndim] = (n_frames,) + frame_shape
             self.STATE.meta_struct.key = msg.key
-            self.STATE.meta_struct.write_index = 0
-            self.STATE.meta_struct.wrap_counter = 0
+            self.STATE.meta_struct.time_mode = self._time_mode(msg.axes[self.SETTINGS.axis])
+            quantized = msg_dtype.kind in "iu" and self.SETTINGS.storage_dtype is not None
+            self.STATE.meta_struct.storage_scale = self.SETTINGS.storage_scale if quantized else 1.0
+            self.STATE.meta_struct.storage_offset = self.SETTINGS.storage_offset if quantized else 0.0
+            self._begin_write()
+            self.STATE.meta_struct.samples_written = 0
+            self.STATE.meta_struct.chunks_written = 0
+            self.STATE.meta_struct.valid_from = 0
+            self._end_write()
             self.STATE.meta_hash = new_hash
 
             if self.SETTINGS.conn is not None:
@@ -516,28 +1302,254 @@ class ShMemCircBuff(ez.Unit):
             msg: The incoming AxisArray message.
         """
         self.STATE.meta_struct.buffer_generation += 1
-        msg_dtype, msg_srate, n_frames, frame_shape = self._get_msg_meta(msg)
-        buff_size = int(n_frames * np.prod(frame_shape) * msg.data.itemsize)
-        buff_shm_name = self.SETTINGS.shmem_name + "/buffer" + str(self.STATE.meta_struct.buffer_generation)
-        short_name = shorten_shmem_name(buff_shm_name)
-        self.STATE.buffer_shmem = _persist_create_shmem(
-            short_name,
+        # As laid out by _update_meta_if_needed.
+        n_frames, *frame_shape = self.STATE.meta_struct.shape[: self.STATE.meta_struct.ndim]
+        frame_shape = tuple(frame_shape)
+        dtype = self.STATE.meta_struct.dtype
+        buff_size = int(n_frames * np.prod(frame_shape) * dtype.itemsize)
+        if self.STATE.buffer_pool is None:
+            self.STATE.buffer_pool = _SegmentPool(self.SETTINGS.shmem_name + "/buffer")
+            self.STATE.time_pool = _SegmentPool(self.SETTINGS.shmem_name + "/time")
+        self._retire_segments()
+        generation = self.STATE.meta_struct.buffer_generation
+        segment, self.STATE.buffer_shmem = self.STATE.buffer_pool.acquire(
             buff_size,
-            purpose=f"data ring gen {self.STATE.meta_struct.buffer_generation} "
-            f"({'x'.join(str(d) for d in (n_frames,) + frame_shape)})",
+            generation,
+            purpose=f"data ring gen {generation} ({'x'.join(str(d) for d in (n_frames,) + frame_shape)})",
         )
-        self.STATE.buffer_arr = np.ndarray(
-            self.STATE.meta_struct.shape[: self.STATE.meta_struct.ndim],
-            dtype=np.dtype(self.STATE.meta_struct.dtype.decode("utf8")),
-            buffer=self.STATE.buffer_shmem.buf[:],
-        )
-        self.STATE.meta_struct.write_index = 0
-        self.STATE.meta_struct.wrap_counter = 0
+        self.STATE.meta_struct.buffer_segment = segment
+        self._prepare_pages(self.STATE.buffer_shmem)
+        self.STATE.meta_struct.layout = LAYOUT_CHANNEL_MAJOR if self.SETTINGS.channel_major else LAYOUT_FRAME_MAJOR
+        self.STATE.buffer_arr = map_ring(self.STATE.meta_struct, self.STATE.buffer_shmem.buf[:])
+        self._reset_time_ring(n_frames)
+        self._begin_write()
+        self.STATE.meta_struct.continues_previous = 0
+        self.STATE.meta_struct.samples_written = 0
+        self.STATE.meta_struct.chunks_written = 0
+        self.STATE.meta_struct.valid_from = 0
+        self._end_write()
         self.STATE.meta_struct.bvalid = True
+        self._notify()
+        # A new stream layout starts the envelopes over too.
+        for level in self.STATE.lod_levels or []:
+            level.decimator.reset()
 
         if self.SETTINGS.conn is not None:
             self.SETTINGS.conn.send("buffer reset")
 
+    def _resize_buffer(self) -> bool:
+        """Move the ring to a new generation sized for SETTINGS.buf_dur, carrying the newest samples over.
+
+        Sample numbering continues across the change, so a reader keeps its
+        position and loses only what the new ring is too short to hold. Returns
+        False, doing nothing, if there is no ring yet.
+        """
+        meta = self.STATE.meta_struct
+        if meta is None or not meta.bvalid or self.STATE.buffer_arr is None:
+            return False
+        old_ring = self.STATE.buffer_arr
+        frame_shape = old_ring.shape[1:]
+        fs = float(meta.srate) or (self.STATE.interval_estimator.rate if self.STATE.interval_estimator else None)
+        n_frames = int(np.ceil(self.SETTINGS.buf_dur * (fs or 100.0)))
+        if self.SETTINGS.page_align:
+            n_frames = page_aligned_frames(n_frames, int(np.prod(frame_shape)) * meta.dtype.itemsize)
+        if n_frames == old_ring.shape[0]:
+            return True
+
+        # Stage the new generation in full before publishing it. Its segments
+        # are acquired before the old ones are retired, so the pool cannot hand
+        # back a segment readers are still mapping.
+        staged = ShmemArrMeta.from_buffer_copy(meta)
+        staged.shape[0] = n_frames
+        staged.buffer_generation = meta.buffer_generation + 1
+        nbytes = int(n_frames * np.prod(frame_shape) * meta.dtype.itemsize)
+        buffer_segment, buffer_shmem = self.STATE.buffer_pool.acquire(
+            nbytes,
+            staged.buffer_generation,
+            purpose=f"data ring gen {staged.buffer_generation} (resized to {n_frames} frames)",
+        )
+        self._prepare_pages(buffer_shmem)
+        ring = map_ring(staged, buffer_shmem.buf[:])
+        total = int(meta.samples_written)
+        keep = min(total - max(0, total - old_ring.shape[0], int(meta.valid_from)), n_frames)
+        kept = np.arange(total - keep, total)
+        # Same slots as the writer would have used: absolute index % capacity.
+        ring[kept % n_frames] = np.take(old_ring, kept, axis=0, mode="wrap")
+
+        time_segment, time_shmem, time_arr = 0, None, None
+        if meta.time_mode != TIME_MODE_NONE:
+            old_time = self.STATE.time_arr
+            if meta.time_mode == TIME_MODE_CHUNKS:
+                staged.time_records = min(n_frames, TIME_RECORDS_MAX)
+                n_chunks = int(meta.chunks_written)
+                kept = np.arange(n_chunks - min(n_chunks, old_time.shape[0], staged.time_records), n_chunks)
+            else:
+                staged.time_records = n_frames
+            time_segment, time_shmem = self.STATE.time_pool.acquire(
+                staged.time_records * old_time.dtype.itemsize,
+                staged.buffer_generation,
+                purpose=f"time ring gen {staged.buffer_generation} (resized to {staged.time_records} records)",
+            )
+            self._prepare_pages(time_shmem)
+            time_arr = np.ndarray((staged.time_records,), dtype=old_time.dtype, buffer=time_shmem.buf[:])
+            time_arr[kept % staged.time_records] = np.take(old_time, kept, mode="wrap")
+
+        # Publish: shape and generation move together inside one write_seq
+        # section, so no reader pairs a count with the wrong ring.
+        retiring = (int(meta.buffer_segment), int(meta.time_segment))
+        self._begin_write()
+        meta.shape[0] = n_frames
+        meta.time_records = staged.time_records
+        meta.buffer_segment = buffer_segment
+        meta.time_segment = time_segment
+        meta.continues_previous = 1
+        meta.buffer_generation = staged.buffer_generation
+        # A grown ring is not full yet: nothing before the kept samples is readable.
+        meta.valid_from = total - keep
+        self._end_write()
+        self.STATE.buffer_arr = self.STATE.time_arr = None
+        self.STATE.buffer_pool.release(retiring[0], self.STATE.buffer_shmem)
+        if self.STATE.time_shmem is not None:
+            self.STATE.time_pool.release(retiring[1], self.STATE.time_shmem)
+        self.STATE.buffer_shmem, self.STATE.buffer_arr = buffer_shmem, ring
+        self.STATE.time_shmem, self.STATE.time_arr = time_shmem, time_arr
+        self.STATE.meta_hash = self._layout_hash(meta.dtype, float(meta.srate), n_frames, frame_shape, meta.key)
+        self._notify()
+
+        if self.SETTINGS.conn is not None:
+            self.SETTINGS.conn.send("buffer resized")
+        return True
+
+    def _reset_time_ring(self, n_frames: int) -> None:
+        """Create the time segment for the current buffer generation, if time_mode calls for one."""
+        mode = self.STATE.meta_struct.time_mode
+        if mode == TIME_MODE_CHUNKS:
+            n_records = min(n_frames, TIME_RECORDS_MAX)
+            dtype = TIME_RECORD_DTYPE
+        elif mode == TIME_MODE_SAMPLES:
+            n_records = n_frames
+            dtype = np.dtype("<f8")
+        else:
+            self.STATE.meta_struct.time_records = 0
+            return
+        self.STATE.meta_struct.time_records = n_records
+        generation = self.STATE.meta_struct.buffer_generation
+        segment, self.STATE.time_shmem = self.STATE.time_pool.acquire(
+            n_records * dtype.itemsize,
+            generation,
+            purpose=f"time ring gen {generation} ({n_records} {'records' if mode == TIME_MODE_CHUNKS else 'samples'})",
+        )
+        self.STATE.meta_struct.time_segment = segment
+        self._prepare_pages(self.STATE.time_shmem)
+        self.STATE.time_arr = np.ndarray((n_records,), dtype=dtype, buffer=self.STATE.time_shmem.buf[:])
+
+    def _prepare_pages(self, shm: SharedMemory) -> None:
+        """Apply SETTINGS.hugepages, prefault and mlock to a segment about to become the ring."""
+        if self.SETTINGS.hugepages:
+            pages.advise_hugepages(shm)
+        if self.SETTINGS.prefault:
+            pages.prefault(shm)
+        if self.SETTINGS.mlock and not pages.lock(shm) and not self.STATE.warned_mlock:
+            self.STATE.warned_mlock = True
+            ez.logger.warning(
+                f"ShMemCircBuff could not mlock its {shm.size}-byte ring; it stays pageable. "
+                "Raise RLIMIT_MEMLOCK (ulimit -l) or grant CAP_IPC_LOCK to allow it."
+            )
+
+    def _readers_idle(self) -> bool:
+        """Whether SETTINGS.idle_timeout applies: no reader has read within it.
+
+        Scans the readers list only once the last live heartbeat it found has
+        expired, so a writer with a live reader pays a clock read per message.
+        """
+        if self.SETTINGS.idle_timeout is None:
+            return False
+        now = time.time()
+        if now < self.STATE.readers_live_until:
+            return False
+        heartbeats = [slot.heartbeat for slot in self.STATE.meta_struct.readers if slot.token]
+        self.STATE.readers_live_until = max(heartbeats, default=0.0) + self.SETTINGS.idle_timeout
+        return now >= self.STATE.readers_live_until
+
+    def reader_lag(self) -> typing.Optional[int]:
+        """Samples written that the slowest live reader has yet to read, or None if no reader is live.
+
+        Live means it read within idle_timeout, or READER_LIVE_WINDOW if that is
+        not set. A reader's position is as of its last read, so a reader
+        keeping up shows the samples written since then, not zero.
+        """
+        meta = self.STATE.meta_struct
+        if meta is None:
+            return None
+        window = self.SETTINGS.idle_timeout if self.SETTINGS.idle_timeout is not None else READER_LIVE_WINDOW
+        oldest_live = time.time() - window
+        positions = [slot.position for slot in meta.readers if slot.token and slot.heartbeat >= oldest_live]
+        if not positions:
+            return None
+        return max(0, int(meta.samples_written) - int(min(positions)))
+
+    def _has_room(self, n_samples: int) -> bool:
+        """Whether ``n_samples`` can be written without lapping the slowest live reader.
+
+        A message longer than the ring fits once that reader has read everything;
+        only its newest samples are then kept (see _write_now).
+        When sharding, the message must fit in every shard.
+        """
+        if self.STATE.shard_sinks:
+            return all(sink._has_room(n_samples) for sink in self.STATE.shard_sinks)
+        if self.STATE.buffer_arr is None:
+            return True
+        lag = self.reader_lag()
+        capacity = self.STATE.buffer_arr.shape[0]
+        return lag is None or min(n_samples, capacity) <= capacity - lag
+
+    async def _wait_for_room(self, msg: AxisArray) -> None:
+        """OverflowPolicy.BLOCK: await until ``msg`` fits in the current ring."""
+        if not isinstance(msg, AxisArray) or self.SETTINGS.axis not in msg.dims:
+            return
+        n_samples = msg.data.shape[msg.get_axis_idx(self.SETTINGS.axis)]
+        while not self._has_room(n_samples):
+            await asyncio.sleep(BLOCK_POLL_INTERVAL)
+
+    def _drop(self, n_samples: int) -> None:
+        """Count a message OverflowPolicy QUEUE or DROP could not write."""
+        self.STATE.meta_struct.samples_dropped += n_samples
+        self.STATE.meta_struct.messages_dropped += 1
+        if not self.STATE.warned_dropped:
+            self.STATE.warned_dropped = True
+            ez.logger.warning(
+                f"ShMemCircBuff {self.SETTINGS.shmem_name!r} is dropping messages its readers have no room for "
+                f"(overflow={OverflowPolicy(self.SETTINGS.overflow).value}); see the header's samples_dropped."
+            )
+
+    def _drain_queue(self) -> None:
+        """Write out queued messages, oldest first, for as long as they fit."""
+        queue = self.STATE.overflow_queue
+        while queue and self._write_now(queue[0]):
+            queue.popleft()
+
+    def _drain_queues(self) -> None:
+        """_drain_queue here and in the LOD and shard children, which have no task of their own to do it."""
+        if self.STATE.overflow_queue:
+            self._drain_queue()
+        for sink in [level.sink for level in self.STATE.lod_levels or []] + (self.STATE.shard_sinks or []):
+            sink._drain_queues()
+
+    def _store_time(self, axis: AxisBase, n_samples: int) -> None:
+        """Record where this message's samples fall. Call inside the write_seq section."""
+        meta = self.STATE.meta_struct
+        if meta.time_mode == TIME_MODE_CHUNKS:
+            record = self.STATE.time_arr[meta.chunks_written % meta.time_records]
+            record["sample"] = meta.samples_written
+            record["offset"] = axis.offset
+            record["n"] = n_samples
+            meta.chunks_written += 1
+        elif meta.time_mode == TIME_MODE_SAMPLES:
+            # Only as many as there are records, like the samples themselves.
+            times = np.asarray(axis.data, dtype=np.float64)[-meta.time_records :]
+            index = (meta.samples_written + n_samples - times.shape[0]) % meta.time_records
+            store_wrapped(self.STATE.time_arr, index, times)
+
     @ez.task
     async def check_continue(self):
         while True:
@@ -552,8 +1564,41 @@ class ShMemCircBuff(ez.Unit):
                 await asyncio.sleep(0.05)
         raise ez.NormalTermination
 
+    @ez.task
+    async def drain_overflow(self):
+        """Write out messages OverflowPolicy.QUEUE is holding as readers make room, whether or not more arrive."""
+        while True:
+            await asyncio.sleep(QUEUE_DRAIN_INTERVAL)
+            if self.SETTINGS.overflow == OverflowPolicy.QUEUE:
+                await self._run_writer(self._drain_queues)
+
     @ez.subscriber(INPUT_SIGNAL, zero_copy=True)
     async def on_message(self, msg: AxisArray):
+        if self.SETTINGS.overflow == OverflowPolicy.BLOCK:
+            await self._wait_for_room(msg)
+        await self._run_writer(self._write_message, msg)
+
+    async def _run_writer(self, fn: typing.Callable, *args) -> None:
+        """Call ``fn(*args)`` here, or on the writer thread with SETTINGS.threaded_copy.
+
+        Awaited either way, so a zero-copy message stays ours until it is in the
+        ring, and so the next message is not started before this one is done.
+        """
+        if not self.SETTINGS.threaded_copy:
+            fn(*args)
+            return
+        if self.STATE.copy_executor is None:
+            self.STATE.copy_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="ShMemCircBuff"
+            )
+        await asyncio.get_running_loop().run_in_executor(self.STATE.copy_executor, fn, *args)
+
+    def _join_writer(self) -> None:
+        """Block until the writer thread (if any) has finished everything submitted to it."""
+        if self.STATE.copy_executor is not None:
+            self.STATE.copy_executor.submit(lambda: None).result()
+
+    def _write_message(self, msg: AxisArray) -> None:
         # Sanity check the input
         if not isinstance(msg, AxisArray):
             return
@@ -561,11 +1606,33 @@ class ShMemCircBuff(ez.Unit):
         if self.SETTINGS.axis not in msg.dims:
             return
 
+        policy = self.SETTINGS.overflow
+        if policy == OverflowPolicy.QUEUE:
+            if self.STATE.overflow_queue is None:
+                self.STATE.overflow_queue = collections.deque()
+            # Behind anything already queued, to keep the stream in order.
+            self._drain_queue()
+            if not self.STATE.overflow_queue and self._write_now(msg):
+                return
+            if len(self.STATE.overflow_queue) < self.SETTINGS.queue_len:
+                # on_message receives zero-copy: the data is only ours until it
+                # returns, and a queued message outlives it.
+                self.STATE.overflow_queue.append(replace(msg, data=msg.data.copy()))
+            else:
+                self._drop(msg.data.shape[msg.get_axis_idx(self.SETTINGS.axis)])
+        elif not self._write_now(msg):
+            self._drop(msg.data.shape[msg.get_axis_idx(self.SETTINGS.axis)])
+
+    def _write_now(self, msg: AxisArray) -> bool:
+        """Write ``msg`` to the ring, unless OverflowPolicy QUEUE or DROP says there is no room for it.
+
+        Returns whether it was written (or skipped by an idle writer).
+        """
         ax_idx = msg.get_axis_idx(self.SETTINGS.axis)
         data = np.moveaxis(msg.data, ax_idx, 0)
 
         # Check if we need to update the metadata, and if so, reset the buffer.
-        if self._update_meta_if_needed(msg):
+        if self._update_meta_if_needed(msg, data) and not self.STATE.shard_sinks:
             self._reset_buffer(msg)
 
         # Independently of the buffer: republish the static metadata if it moved.
@@ -574,15 +1641,41 @@ class ShMemCircBuff(ez.Unit):
         # (e.g. dtype change) with the channel identities untouched.
         self._update_aux_if_needed(msg)
 
+        if self.STATE.shard_sinks:
+            # The shards hold the data, each under its own overflow policy; this
+            # link only describes the stream and indexes them.
+            self._write_shards(msg, data)
+            return True
+
         n_samples = data.shape[0]
-        write_stop = self.STATE.meta_struct.write_index + n_samples
-
-        if write_stop > self.STATE.buffer_arr.shape[0]:
-            overflow = write_stop - self.STATE.buffer_arr.shape[0]
-            self.STATE.buffer_arr[self.STATE.meta_struct.write_index :] = data[: n_samples - overflow]
-            self.STATE.buffer_arr[:overflow] = data[n_samples - overflow :]
-            self.STATE.meta_struct.write_index = overflow
-            self.STATE.meta_struct.wrap_counter += 1
-        else:
-            self.STATE.buffer_arr[self.STATE.meta_struct.write_index : write_stop] = data[:]
-            self.STATE.meta_struct.write_index = write_stop
+        if self.SETTINGS.overflow in (OverflowPolicy.QUEUE, OverflowPolicy.DROP) and not self._has_room(n_samples):
+            return False
+        if self._readers_idle():
+            # Nobody to copy for. Count the samples all the same, and mark them
+            # unreadable, so a reader arriving later starts after them.
+            self._begin_write()
+            self.STATE.meta_struct.samples_written += n_samples
+            self.STATE.meta_struct.valid_from = self.STATE.meta_struct.samples_written
+            self._end_write()
+            # Still ring: a reader blocked in wait() has no heartbeat until it wakes.
+            self._notify()
+            self._write_lods(msg, data)
+            return True
+
+        # A message longer than the ring leaves only its newest samples in it,
+        # though samples_written still counts them all.
+        capacity = self.STATE.buffer_arr.shape[0]
+        kept = data[-capacity:]
+        write_index = (self.STATE.meta_struct.samples_written + n_samples - kept.shape[0]) % capacity
+
+        # Outside the write_seq section, which should last no longer than the copy.
+        values = self._quantize(kept)
+        self._begin_write()
+        store_wrapped(self.STATE.buffer_arr, write_index, values)
+        self._store_time(msg.axes[self.SETTINGS.axis], n_samples)
+        self.STATE.meta_struct.samples_written += n_samples
+        self._end_write()
+        self._notify()
+
+        self._write_lods(msg, data)
+        return True
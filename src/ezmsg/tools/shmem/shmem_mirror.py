@@ -7,28 +7,111 @@ Besides the sample data, the mirror exposes the source AxisArray's static metada
 axis naming each channel), axis units, and `attrs` -- via the `axes`, `attrs`, and `dims` properties. These are plain
 dicts rather than ezmsg objects; see .aux_meta for why. They read None until the writer publishes, and update in place
 if it ever republishes, so poll them (or register_metadata_callback) rather than reading once.
+
+Where each sample falls along the buffered axis comes from the time segment beside the ring (see .shmem):
+`timestamps(start_sample, n)` for absolute indices, or a cursor's `last_timestamps()` for what it just returned.
+
+Each mirror holds a slot in the writer's reader registry while connected (see .shmem), refreshed by every read. A
+writer with `idle_timeout` stops copying when those refreshes stop, so a mirror that goes quiet for longer than that
+finds the samples written meanwhile lost, exactly as if it had been lapped.
 """
 
+import asyncio
 import copy
+import os
+import random
 import time
 import typing
+import weakref
 from multiprocessing.shared_memory import SharedMemory
 
 import numpy as np
 import numpy.typing as npt
 
+from . import magic_ring, notify
 from .aux_meta import decode_aux
+from .notify import Doorbell
 from .shmem import (
+    LAYOUT_CHANNEL_MAJOR,
+    READER_SLOT_STALE,
     SHMEM_META_MAGIC,
     SHMEM_META_STRUCT_VERSION,
+    TIME_MODE_CHUNKS,
+    TIME_MODE_SAMPLES,
+    TIME_RECORD_DTYPE,
     ShmemArrMeta,
     ShMemCircBuffState,
     ShmemVersionError,
+    lod_shmem_name,
+    map_ring,
+    shard_shmem_name,
     shorten_shmem_name,
 )
 
 CONNECT_RETRY_INTERVAL = 0.5
 
+# How long a reader waits on an odd write_seq before concluding the writer died
+# mid-write. A live writer holds it odd for the length of one memcpy.
+SEQLOCK_TIMEOUT = 0.1
+
+# How often wait() checks the ring where there are no doorbells (see .notify).
+POLL_INTERVAL = 0.005
+# The longest a single doorbell wait blocks before re-checking the header. Only
+# matters if a ring is missed outright -- e.g. the writer restarted and has not
+# listed the doorbell directory yet.
+WAIT_SLICE = 1.0
+
+
+def seqlock_read(meta: typing.Any, read: typing.Callable[[typing.Any], tuple]) -> typing.Optional[tuple]:
+    """``read(meta)``, retried until no write overlapped it, for any header with a ``write_seq`` counter.
+
+    See EZShmMirror._snapshot. Returns None if the counter stays odd for
+    SEQLOCK_TIMEOUT.
+    """
+    deadline = None
+    while True:
+        seq = meta.write_seq
+        if not seq & 1:
+            result = read(meta)
+            if meta.write_seq == seq:
+                return result
+        if deadline is None:
+            deadline = time.monotonic() + SEQLOCK_TIMEOUT
+        elif time.monotonic() > deadline:
+            return None
+        # Yield, in case the writer is a thread in this process.
+        time.sleep(0)
+
+
+class ReadResult(typing.NamedTuple):
+    """What :meth:`EZShmMirror.read_into` did."""
+
+    n: int
+    """Samples written to the front of the destination."""
+
+    overflow: bool
+    """Whether any samples were lost since the previous read."""
+
+    n_lost: int
+    """How many: lapped before the read, plus any torn during it."""
+
+
+class SamplesUnavailableError(IndexError):
+    """Some of the samples asked of :meth:`EZShmMirror.read` are not in the ring.
+
+    Either the writer has already overwritten them -- before the read, or while
+    it was copying -- or it has not written them yet.
+    """
+
+    def __init__(self, start: int, n: int, available: range):
+        self.start = start
+        self.n = n
+        self.available = available
+        """Absolute indices the ring held when the read gave up."""
+        super().__init__(
+            f"samples [{start}, {start + n}) requested; the ring holds [{available.start}, {available.stop})"
+        )
+
 
 class EZShmMirror:
     """
@@ -41,18 +124,53 @@ class EZShmMirror:
     must try the connection -- sometimes repeatedly while handling connection errors.
     """
 
-    def __init__(self, shmem_name: typing.Optional[str] = None):
+    def __init__(self, shmem_name: typing.Optional[str] = None, double_map: bool = False, rescale: bool = False):
+        """
+        Args:
+            shmem_name: The name given to the ShMemCircBuff. None connects to nothing.
+            double_map: Map the ring twice, back to back (see .magic_ring), so that
+              reads which wrap around its end are still zero-copy views. Needs a
+              POSIX platform and a ring written with ``page_align``; otherwise the
+              mirror says so once and falls back to copying wrapped reads.
+            rescale: If the writer quantizes (an integer ``storage_dtype``), return
+              reads as float32 ``raw * scale + offset`` -- always copies -- rather
+              than the stored integers. ``read_into`` rescales during its copy.
+              No effect on a floating-point ring.
+        """
         self._mirror_state: ShMemCircBuffState = ShMemCircBuffState()
         self._shmem_name: typing.Optional[str] = None
         self._change_callback: typing.Optional[typing.Callable] = None
         self._metadata_callback: typing.Optional[typing.Callable] = None
         self._last_meta: typing.Optional[ShmemArrMeta] = None
-        self._read_index = 0  # Used by auto_view
+        # The mirror's own auto_view/read_into/wait go through an unnamed
+        # cursor; cursor() hands out named ones sharing everything else.
+        self._default_cursor = ReadCursor(self)
+        self._cursors: typing.Dict[str, ReadCursor] = {}
+        # False once creating a doorbell has failed; see .notify.
+        self._doorbell_ok = notify.AVAILABLE
+        self._double_map = double_map
+        self._warned_double_map = False
+        self._mapping: typing.Optional[magic_ring.DoubleMapping] = None
+        self._retired_mappings: typing.List[magic_ring.DoubleMapping] = []
+        # The ring as (2 * capacity, ...) when double-mapped, else None.
+        self._ring2: typing.Optional[npt.NDArray] = None
+        # The time segment (see .shmem) and its contents, if the writer keeps one.
+        self._time_shmem: typing.Optional[SharedMemory] = None
+        self._time_arr: typing.Optional[npt.NDArray] = None
+        self._rescale = rescale
+        # (scale, offset) to apply to reads, when rescale is on and the ring is quantized.
+        self._quant: typing.Optional[typing.Tuple[float, float]] = None
         self._last_connect_try = -np.inf
         # Decoded static metadata (see .aux_meta) and the generation it came
         # from. 0 means we have not read one; the writer never publishes gen 0.
         self._aux: typing.Optional[dict] = None
         self._aux_generation: int = 0
+        # The aux_segment the held metadata segment is.
+        self._aux_segment: typing.Optional[int] = None
+        # Our entry in the header's readers list, and the token that marks it ours.
+        self._reader_slot: typing.Optional[int] = None
+        self._reader_token = (os.getpid() << 32) | random.getrandbits(32) or 1
+        self._warned_readers_full = False
         # If shmem_name is None then this will simply not connect to anything.
         self.connect(shmem_name)
 
@@ -62,6 +180,7 @@ class EZShmMirror:
     def disconnect(self):
         self._cleanup_buffer()
         self._cleanup_meta()
+        self._close_doorbells()
         self._shmem_name = None
 
     @property
@@ -76,7 +195,43 @@ class EZShmMirror:
 
     @property
     def write_index(self) -> typing.Optional[int]:
-        return self._mirror_state.meta_struct.write_index
+        """Where the writer will store its next sample, as a ring index."""
+        meta = self._mirror_state.meta_struct
+        if meta is None or meta.ndim == 0 or meta.shape[0] == 0:
+            return None
+        return int(meta.samples_written) % int(meta.shape[0])
+
+    @property
+    def samples_written(self) -> typing.Optional[int]:
+        """Total samples written since the current buffer generation began, held or not."""
+        snap = None if self._mirror_state.meta_struct is None else self._snapshot()
+        return None if snap is None else snap[1]
+
+    @property
+    def quantization(self) -> typing.Optional[typing.Tuple[float, float]]:
+        """``(scale, offset)`` if the ring holds quantized integers (value = raw * scale + offset), else None."""
+        meta = self._mirror_state.meta_struct
+        if meta is None or not meta.bvalid or meta.dtype.kind not in "iu":
+            return None
+        return float(meta.storage_scale), float(meta.storage_offset)
+
+    def rescale(self, raw: npt.NDArray) -> npt.NDArray:
+        """Raw samples of a quantized ring as the values they stand for, in float32. Unchanged if not quantized."""
+        quant = self.quantization
+        if quant is None:
+            return raw
+        return (raw * np.float32(quant[0]) + np.float32(quant[1])).astype(np.float32, copy=False)
+
+    @property
+    def samples_dropped(self) -> typing.Optional[int]:
+        """Samples the writer has dropped rather than overwrite unread ones (see .shmem.OverflowPolicy).
+
+        They were never written, so they leave no gap in the indices and are not
+        counted in :attr:`n_lost`; compare this before and after a recording to
+        know it is complete.
+        """
+        meta = self._mirror_state.meta_struct
+        return None if meta is None else int(meta.samples_dropped)
 
     @property
     def connected(self) -> bool:
@@ -148,6 +303,7 @@ class EZShmMirror:
         self._mirror_state.aux_shmem = None
         self._aux = None
         self._aux_generation = 0
+        self._aux_segment = None
 
     def _refresh_aux(self) -> None:
         """Attach to and decode the metadata segment if the writer bumped it.
@@ -165,38 +321,50 @@ class EZShmMirror:
         if generation == 0 or generation == self._aux_generation:
             return
 
-        nbytes = int(meta.aux_nbytes)
-        aux_name = shorten_shmem_name(self._shmem_name + "/meta" + str(generation))
-        try:
-            shm = SharedMemory(aux_name, create=False)
-        except FileNotFoundError:
-            # The writer has moved on to a newer generation and unlinked this
-            # one. Leave the old decode in place; the next poll picks up the new
-            # generation.
+        # The writer rewrites the blob in place while it fits, so copy it out
+        # under aux_seq (see _seqlock_read), following it to a new segment if
+        # the writer moved it there.
+        deadline = time.monotonic() + SEQLOCK_TIMEOUT
+        while True:
+            seq = meta.aux_seq
+            if not seq & 1:
+                segment, generation, nbytes = int(meta.aux_segment), int(meta.meta_generation), int(meta.aux_nbytes)
+                if segment != self._aux_segment and not self._open_aux(segment):
+                    # Already replaced by a newer one; the next poll follows it.
+                    return
+                blob = bytes(self._mirror_state.aux_shmem.buf[:nbytes])
+                if meta.aux_seq == seq:
+                    break
+            if time.monotonic() > deadline:
+                return
+            time.sleep(0)
+        if generation == 0:
             return
 
-        try:
-            payload = decode_aux(bytes(shm.buf[:nbytes]))
-        except ValueError:
-            shm.close()
-            raise
+        self._aux = decode_aux(blob)
+        self._aux_generation = generation
+
+        if self._metadata_callback is not None:
+            self._metadata_callback()
 
-        # Only now release the previous segment, so a decode failure above
-        # leaves the last good metadata intact.
+    def _open_aux(self, segment: int) -> bool:
+        """Swap the held metadata segment for the one named ``segment``."""
+        try:
+            shm = SharedMemory(shorten_shmem_name(self._shmem_name + "/meta" + str(segment)), create=False)
+        except FileNotFoundError:
+            return False
         if self._mirror_state.aux_shmem is not None:
             try:
                 self._mirror_state.aux_shmem.close()
             except Exception as e:
                 print(f"Error closing metadata segment: {e}")
         self._mirror_state.aux_shmem = shm
-        self._aux = payload
-        self._aux_generation = generation
-
-        if self._metadata_callback is not None:
-            self._metadata_callback()
+        self._aux_segment = segment
+        return True
 
     def _cleanup_meta(self):
         self._cleanup_aux()
+        self._release_reader_slot()
         if self._mirror_state.meta_shmem is not None:
             del self._mirror_state.meta_struct
         self._mirror_state.meta_struct = None
@@ -209,13 +377,21 @@ class EZShmMirror:
                 print(f"Error closing meta: {e}")
             del self._mirror_state.meta_shmem
         self._mirror_state.meta_shmem = None
-        self._read_index = 0
+        self._reset_cursors()
 
-    def _cleanup_buffer(self):
+    def _cleanup_buffer(self, keep_cursors: bool = False):
         if self._mirror_state.buffer_arr is not None:
             del self._mirror_state.buffer_arr
         self._mirror_state.buffer_arr = None
 
+        self._ring2 = None
+        if self._mapping is not None:
+            self._retired_mappings.append(self._mapping)
+            self._mapping = None
+        # A mapping a caller still holds views into cannot be released yet; try
+        # again on every cleanup until it can.
+        self._retired_mappings = [m for m in self._retired_mappings if not m.close()]
+
         if self._mirror_state.buffer_shmem is not None:
             # Note: Uncommenting the following does not eliminate the resource_tracker warnings.
             try:
@@ -224,7 +400,17 @@ class EZShmMirror:
                 print(f"Error closing buffer: {e}")
             del self._mirror_state.buffer_shmem
         self._mirror_state.buffer_shmem = None
-        self._read_index = 0
+
+        self._time_arr = None
+        self._quant = None
+        if self._time_shmem is not None:
+            try:
+                self._time_shmem.close()
+            except Exception as e:
+                print(f"Error closing time ring: {e}")
+        self._time_shmem = None
+        if not keep_cursors:
+            self._reset_cursors()
 
     def register_change_callback(self, callback: typing.Callable) -> None:
         self._change_callback = callback
@@ -243,6 +429,57 @@ class EZShmMirror:
             self._mirror_state.meta_shmem = None
             return
         self._validate_header()
+        self._claim_reader_slot()
+
+    # ---- Reader registry (see .shmem) ------------------------------------------
+
+    def _claim_reader_slot(self) -> None:
+        """Take a free (or abandoned) slot in the header's readers list and stamp it.
+
+        There is no atomic claim: two mirrors connecting in the same instant can
+        pick the same slot. The cost is only that the writer counts them as one
+        reader, and each re-claims if it finds the other's token there.
+        """
+        meta = self._mirror_state.meta_struct
+        if meta is None:
+            return
+        stale = time.time() - READER_SLOT_STALE
+        for i, slot in enumerate(meta.readers):
+            if not slot.token or slot.heartbeat < stale:
+                slot.token = self._reader_token
+                self._reader_slot = i
+                self._touch()
+                return
+        self._reader_slot = None
+        if not self._warned_readers_full:
+            self._warned_readers_full = True
+            print(
+                f"Shmem {self._shmem_name!r} has no free reader slot; reading anyway, but the writer cannot see this "
+                "reader, and one with idle_timeout set may not copy for it."
+            )
+
+    def _release_reader_slot(self) -> None:
+        meta = self._mirror_state.meta_struct
+        if self._reader_slot is not None and meta is not None:
+            slot = meta.readers[self._reader_slot]
+            if slot.token == self._reader_token:
+                slot.token = 0
+        self._reader_slot = None
+
+    def _touch(self) -> None:
+        """Stamp our slot: a heartbeat now, and the position of our slowest cursor."""
+        meta = self._mirror_state.meta_struct
+        if self._reader_slot is None:
+            return
+        slot = meta.readers[self._reader_slot]
+        if slot.token != self._reader_token:
+            # Taken over while we were quiet for READER_SLOT_STALE.
+            self._claim_reader_slot()
+            return
+        positions = [c._read_pos for c in self._all_cursors() if c._read_pos is not None]
+        # A mirror used only for random access is never behind.
+        slot.position = min(positions) if positions else meta.samples_written
+        slot.heartbeat = time.time()
 
     def _validate_header(self) -> None:
         """Reject a header this build cannot read, before trusting any field.
@@ -282,21 +519,31 @@ class EZShmMirror:
         if self._mirror_state.buffer_shmem is not None:
             # We might enter here if input data changed shape or dtype,
             #  meaning we are reconnecting to the same _name_ but different layout.
-            self._cleanup_buffer()
+            # A generation resized from the one we held continues its sample
+            #  count, so our cursors' positions still hold.
+            meta = self._mirror_state.meta_struct
+            continues = (
+                meta is not None
+                and self._last_meta is not None
+                and meta.continues_previous
+                and meta.buffer_generation == (self._last_meta.buffer_generation + 1) & 0xFFFFFFFF
+            )
+            self._cleanup_buffer(keep_cursors=bool(continues))
 
         if self._mirror_state.meta_struct is None or not self._mirror_state.meta_struct.bvalid:
             # Cannot connect to buffer without valid meta.
             return False
 
         try:
-            buff_name = self._shmem_name + "/buffer" + str(self._mirror_state.meta_struct.buffer_generation)
+            buff_name = self._shmem_name + "/buffer" + str(self._mirror_state.meta_struct.buffer_segment)
             short_name = shorten_shmem_name(buff_name)
             self._mirror_state.buffer_shmem = SharedMemory(short_name, create=False)
-            self._mirror_state.buffer_arr = np.ndarray(
-                self._mirror_state.meta_struct.shape[: self._mirror_state.meta_struct.ndim],
-                dtype=np.dtype(self._mirror_state.meta_struct.dtype),
-                buffer=self._mirror_state.buffer_shmem.buf[:],
-            )
+            meta = self._mirror_state.meta_struct
+            self._mirror_state.buffer_arr = map_ring(meta, self._mirror_state.buffer_shmem.buf[:])
+            if self._double_map:
+                self._map_twice()
+            self._connect_time()
+            self._quant = self.quantization if self._rescale else None
             self._last_meta = self.meta  # Copy
             if self._change_callback is not None:
                 self._change_callback()
@@ -311,11 +558,121 @@ class EZShmMirror:
             print("DEBUG!")
         return False
 
+    def _connect_time(self) -> None:
+        meta = self._mirror_state.meta_struct
+        if meta.time_mode == TIME_MODE_CHUNKS:
+            dtype = TIME_RECORD_DTYPE
+        elif meta.time_mode == TIME_MODE_SAMPLES:
+            dtype = np.dtype("<f8")
+        else:
+            return
+        name = shorten_shmem_name(self._shmem_name + "/time" + str(meta.time_segment))
+        try:
+            self._time_shmem = SharedMemory(name, create=False)
+        except FileNotFoundError:
+            # Rebuilt again already; the next read reconnects everything.
+            return
+        self._time_arr = np.ndarray((int(meta.time_records),), dtype=dtype, buffer=self._time_shmem.buf[:])
+
+    def _map_twice(self) -> None:
+        """Give the ring a second, adjacent mapping (see .magic_ring), if it can have one."""
+        meta = self._mirror_state.meta_struct
+        nbytes = self._mirror_state.buffer_arr.nbytes
+        if meta.layout == LAYOUT_CHANNEL_MAJOR:
+            # Each channel wraps separately; no single second mapping makes that contiguous.
+            if not self._warned_double_map:
+                self._warned_double_map = True
+                print(f"Not double-mapping shmem {self._shmem_name!r}: its ring is channel-major.")
+            return
+        if not magic_ring.supported() or nbytes % magic_ring.PAGESIZE:
+            if not self._warned_double_map:
+                self._warned_double_map = True
+                print(
+                    f"Not double-mapping shmem {self._shmem_name!r}: "
+                    + (
+                        "unsupported on this platform."
+                        if not magic_ring.supported()
+                        else f"its ring is {nbytes} bytes, not a multiple of the {magic_ring.PAGESIZE}-byte page "
+                        "(set page_align on the ShMemCircBuff)."
+                    )
+                    + " Wrapped reads will be copied."
+                )
+            return
+        try:
+            # SharedMemory keeps its descriptor open on POSIX; reusing it saves
+            # resolving the segment's name to a path, which differs per platform.
+            self._mapping = magic_ring.DoubleMapping(self._mirror_state.buffer_shmem._fd, nbytes)
+        except OSError as e:
+            print(f"Error double-mapping buffer, wrapped reads will be copied: {e}")
+            return
+        self._ring2 = self._mapping.array(meta.dtype, meta.shape[1 : meta.ndim])
+
+    @property
+    def double_mapped(self) -> bool:
+        """Whether reads that wrap are served as views (see ``double_map``)."""
+        return self._ring2 is not None
+
+    # ---- Level-of-detail rings (see ShMemCircBuffSettings.lod_factors) -------
+
+    @property
+    def lod_factors(self) -> typing.List[int]:
+        """Decimation factors of the min/max rings the writer publishes, ascending. Empty if none."""
+        meta = self._mirror_state.meta_struct
+        if meta is None:
+            return []
+        return [int(f) for f in meta.lod_factors if f]
+
+    def pick_lod(self, samples_per_pixel: float) -> typing.Optional[int]:
+        """The coarsest published factor that still gives at least one bucket per pixel, or None for the raw ring."""
+        usable = [f for f in self.lod_factors if f <= samples_per_pixel]
+        return usable[-1] if usable else None
+
+    def open_lod(self, factor: int, **kwargs) -> "EZShmMirror":
+        """A new mirror of the min/max ring at ``factor``. ``kwargs`` go to its constructor.
+
+        Its frames carry a trailing ``metric`` axis labelled ``("min", "max")``,
+        which :func:`ezmsg.tools.plot.describe.metric_axis` reads as an
+        envelope, and its sample rate is this stream's divided by ``factor``.
+        """
+        return EZShmMirror(lod_shmem_name(self._shmem_name, factor), **kwargs)
+
+    # ---- Shards (see ShMemCircBuffSettings.shards) ---------------------------
+
+    @property
+    def shard_channels(self) -> typing.List[typing.Tuple[int, int]]:
+        """The ``[start, stop)`` channel range each shard holds, by shard index.
+
+        Empty if the stream is not sharded, or until its first message.
+        """
+        meta = self._mirror_state.meta_struct
+        if meta is None or not meta.n_shards:
+            return []
+        bounds = [int(b) for b in meta.shard_bounds[: meta.n_shards + 1]]
+        if not bounds[-1]:
+            return []
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def shard_of(self, channel: int) -> typing.Optional[int]:
+        """The index of the shard holding ``channel``, or None if there is none."""
+        for index, (start, stop) in enumerate(self.shard_channels):
+            if start <= channel < stop:
+                return index
+        return None
+
+    def open_shard(self, index: int, **kwargs) -> "EZShmMirror":
+        """A new mirror of shard ``index``. ``kwargs`` go to its constructor.
+
+        It reads like any link: its frames hold only the shard's channels, and
+        its :attr:`axes` describe just those.
+        """
+        return EZShmMirror(shard_shmem_name(self._shmem_name, index), **kwargs)
+
     def connect(self, name: str) -> None:
         if self._shmem_name is None or self._shmem_name != name:
             # Clear connection
             self._cleanup_buffer()
             self._cleanup_meta()
+            self._close_doorbells()
 
         self._shmem_name = name
 
@@ -334,83 +691,720 @@ class EZShmMirror:
 
         self._last_connect_try = time.time()
 
-    def auto_view(self, n: typing.Optional[int] = None) -> typing.Tuple[npt.NDArray, bool]:
+    def _ensure_buffer(self) -> bool:
+        """(Re)connect as needed. True once we hold a valid, current buffer."""
         if self._mirror_state.meta_struct is None:
             self.connect(self._shmem_name)
+        if self._mirror_state.meta_struct is not None:
+            # Every read comes through here, so this is the heartbeat.
+            self._touch()
 
-        # Poll the metadata here too, so a consumer that only ever calls
-        # auto_view still gets its metadata callback fired.
+        # Poll the metadata here too, so a consumer that only ever reads
+        # samples still gets its metadata callback fired.
         self._refresh_aux()
 
         if self._mirror_state.meta_struct is None or not self._mirror_state.meta_struct.bvalid:
             # Still not connected
             #  or we are connected but the buffer data is invalid.
-            return np.array([[]]), False
+            return False
 
-        b_connected = True
         # Determine if we need to reset the buffer
         if (
             self._last_meta is None
             or self._mirror_state.meta_struct.buffer_generation != self._last_meta.buffer_generation
             or self._mirror_state.buffer_arr is None
         ):
-            b_connected = self._reset_buffer()
+            return self._reset_buffer()
+        return True
 
-        if not b_connected:
-            # We STILL aren't connected.
-            return np.array([[]]), False
+    def _seqlock_read(self, read: typing.Callable[[ShmemArrMeta], tuple]) -> typing.Optional[tuple]:
+        """:func:`seqlock_read` on this link's header. See :meth:`_snapshot`."""
+        return seqlock_read(self._mirror_state.meta_struct, read)
 
-        # -- From here, we should know we have a good connection to a valid buffer -- #
+    def _snapshot(self) -> typing.Optional[typing.Tuple[int, int, int]]:
+        """A consistent ``(buffer_generation, samples written, oldest held)`` from the header.
 
-        wrapped_since_last_read = self._mirror_state.meta_struct.wrap_counter - self._last_meta.wrap_counter
-        b_overflow = wrapped_since_last_read > 1 or (
-            wrapped_since_last_read == 1 and self._mirror_state.meta_struct.write_index >= self._read_index
-        )
+        The writer brackets every ring update with ``write_seq`` (see .shmem), so
+        a read of the indices taken while the counter was even and unchanged is
+        one the writer was not halfway through. The generation is part of the
+        snapshot so that a count is never paired with the wrong buffer.
 
-        if b_overflow:
-            # In case of overflow, start reading from the oldest available data
-            self._read_index = (self._mirror_state.meta_struct.write_index + 1) % self._mirror_state.meta_struct.shape[
-                0
-            ]
-            self._last_meta.wrap_counter = self._mirror_state.meta_struct.wrap_counter
-
-        # Calculate how many samples are available
-        n_available = 0
-        if self._mirror_state.buffer_arr is not None:
-            if self._mirror_state.meta_struct.write_index >= self._read_index:
-                n_available = self._mirror_state.meta_struct.write_index - self._read_index
-            else:
-                n_available = (
-                    self._mirror_state.meta_struct.shape[0]
-                    - self._read_index
-                    + self._mirror_state.meta_struct.write_index
-                )
+        The ring holds absolute indices ``[oldest, written)``: the last
+        capacity's worth, less any the writer skipped while idle (valid_from).
 
-        if n_available <= 1 or (n is not None and n_available < n):
-            # Not enough samples available.
-            # Return a null-slice of the buffer. This provides correct dimensions.
-            return self._mirror_state.buffer_arr[:0], b_overflow
+        Returns None if the counter stays odd for SEQLOCK_TIMEOUT -- a writer
+        that died mid-write -- so a reader can never hang here.
+        """
 
-        # We have enough samples.
-        if n is None:
-            n = n_available
+        def read(meta: ShmemArrMeta) -> typing.Tuple[int, int, int]:
+            # Inside the section: a resize changes the capacity with the generation.
+            capacity = int(meta.shape[0])
+            total = int(meta.samples_written)
+            return int(meta.buffer_generation), total, max(0, total - capacity, int(meta.valid_from))
+
+        return self._seqlock_read(read)
+
+    def _n_overwritten(self, generation: int, start: int, n: int) -> int:
+        """How many of the ``n`` samples from absolute index ``start`` the writer has since overwritten.
+
+        Overwriting proceeds from the oldest slot forward, so the casualties are
+        always a prefix of the slice. Call it *after* copying: a count of zero
+        then means the copy is intact.
+        """
+        snap = self._snapshot()
+        if snap is None or snap[0] != generation:
+            # The buffer was rebuilt (or the writer is wedged): nothing we read
+            # can be vouched for.
+            return n
+        return int(min(n, max(0, snap[2] - start)))
+
+    # ---- Consuming reads -------------------------------------------------------
+
+    def cursor(self, name: str) -> "ReadCursor":
+        """The read cursor called ``name``, created on first use.
+
+        Each cursor has its own position, loss accounting and doorbell, and
+        shares everything else -- the mappings, connection polling, header
+        validation and decoded metadata -- with this mirror and its other
+        cursors. Use one per consumer (a plot, a recorder, a feature extractor)
+        instead of one mirror each.
+        """
+        if name not in self._cursors:
+            self._cursors[name] = ReadCursor(self)
+        return self._cursors[name]
 
-        if (self._read_index + n) <= self._mirror_state.meta_struct.shape[0]:
+    def remove_cursor(self, name: str) -> None:
+        """Forget the cursor called ``name`` and release its doorbell."""
+        cursor = self._cursors.pop(name, None)
+        if cursor is not None:
+            cursor._close_doorbell()
+
+    def _all_cursors(self) -> typing.List["ReadCursor"]:
+        return [self._default_cursor, *self._cursors.values()]
+
+    def _reset_cursors(self) -> None:
+        # Positions are only meaningful within one buffer generation.
+        for cursor in self._all_cursors():
+            cursor._reset()
+
+    def _close_doorbells(self) -> None:
+        for cursor in self._all_cursors():
+            cursor._close_doorbell()
+
+    def check_last_read(self) -> int:
+        """:meth:`ReadCursor.check_last_read` on the mirror's own cursor."""
+        return self._default_cursor.check_last_read()
+
+    @property
+    def n_lost(self) -> int:
+        """:attr:`ReadCursor.n_lost` of the mirror's own cursor."""
+        return self._default_cursor.n_lost
+
+    def auto_view(self, n: typing.Optional[int] = None, copy: bool = False) -> typing.Tuple[npt.NDArray, bool]:
+        """:meth:`ReadCursor.auto_view` on the mirror's own cursor."""
+        return self._default_cursor.auto_view(n, copy)
+
+    def read_into(self, out: npt.NDArray, axes: typing.Optional[typing.Sequence[int]] = None) -> ReadResult:
+        """:meth:`ReadCursor.read_into` on the mirror's own cursor."""
+        return self._default_cursor.read_into(out, axes)
+
+    def last_timestamps(self) -> typing.Optional[npt.NDArray]:
+        """:meth:`ReadCursor.last_timestamps` on the mirror's own cursor."""
+        return self._default_cursor.last_timestamps()
+
+    def wait(self, n: int = 1, timeout: typing.Optional[float] = None) -> bool:
+        """:meth:`ReadCursor.wait` on the mirror's own cursor."""
+        return self._default_cursor.wait(n, timeout)
+
+    async def wait_async(self, n: int = 1, timeout: typing.Optional[float] = None) -> bool:
+        """:meth:`ReadCursor.wait_async` on the mirror's own cursor."""
+        return await self._default_cursor.wait_async(n, timeout)
+
+    def __aiter__(self) -> typing.AsyncIterator[npt.NDArray]:
+        """``async for chunk in mirror``: see :meth:`ReadCursor.__aiter__`."""
+        return self._default_cursor.__aiter__()
+
+    # ---- Shared by cursors and random access ---------------------------------
+
+    def _window(
+        self, start: int, n: int, copy: bool, channels: typing.Optional[typing.Sequence[int]] = None
+    ) -> typing.Tuple[npt.NDArray, bool]:
+        """The ``n`` samples from absolute index ``start``, and whether that is a copy.
+
+        A view where the ring allows one; a copy if it wraps (and is not
+        double-mapped), ``copy`` is True, it is rescaled, or ``channels`` picks
+        out a subset of the first frame axis. Not validated: see
+        :meth:`_n_overwritten`.
+        """
+        if channels is None:
+            result, copied = self._raw_window(start, n, copy and self._quant is None)
+        else:
+            result, copied = self._channel_window(start, n, channels), True
+        if self._quant is not None:
+            # The arithmetic is the copy.
+            scale, offset = self._quant
+            return (result * np.float32(scale) + np.float32(offset)).astype(np.float32, copy=False), True
+        return result, copied
+
+    def _channel_window(self, start: int, n: int, channels: typing.Sequence[int]) -> npt.NDArray:
+        """A copy of ``channels`` over the ``n`` samples from ``start``.
+
+        Gathered with time as the innermost index, so from a channel-major ring
+        (see ShMemCircBuffSettings.channel_major) each channel is one contiguous
+        run and the other channels are never touched.
+        """
+        capacity = int(self._mirror_state.meta_struct.shape[0])
+        read_index = start % capacity
+        # (*frame_shape, capacity): free, and the storage order of a channel-major ring.
+        by_channel = np.moveaxis(self._mirror_state.buffer_arr, 0, -1)
+        channels = list(channels)
+        if read_index + n <= capacity:
+            result = by_channel[channels, ..., read_index : read_index + n]
+        else:
+            n_after_wrap = n - (capacity - read_index)
+            result = np.concatenate(
+                (by_channel[channels, ..., read_index:], by_channel[channels, ..., :n_after_wrap]), axis=-1
+            )
+        return np.moveaxis(result, -1, 0)
+
+    def _raw_window(self, start: int, n: int, copy: bool) -> typing.Tuple[npt.NDArray, bool]:
+        capacity = int(self._mirror_state.meta_struct.shape[0])
+        read_index = start % capacity
+        if self._ring2 is not None:
+            # Double-mapped: every window is contiguous.
+            result = self._ring2[read_index : read_index + n]
+        elif (read_index + n) <= capacity:
             # Return a contiguous chunk
-            t_slice = np.s_[max(0, self._read_index) : self._read_index + n]
-            result = self._mirror_state.buffer_arr[t_slice, :]
+            result = self._mirror_state.buffer_arr[read_index : read_index + n]
         else:
             # Split read into two chunks
-            n_after_wrap = n - (self._mirror_state.meta_struct.shape[0] - self._read_index)
+            n_after_wrap = n - (capacity - read_index)
             result = np.concatenate(
                 (
-                    self._mirror_state.buffer_arr[self._read_index :],
+                    self._mirror_state.buffer_arr[read_index:],
                     self._mirror_state.buffer_arr[:n_after_wrap],
                 ),
                 axis=0,
             )
+            return result, True
+        return (result.copy(), True) if copy else (result, False)
+
+    # ---- Random access by absolute sample index ------------------------------
+    #
+    # Unlike auto_view and read_into, these do not move the mirror's cursor, so
+    # any number of consumers in one process can share a single mirror (and its
+    # mappings) while each keeps its own position as a plain integer. Indices
+    # count samples since the buffer generation began -- see samples_written --
+    # and restart from 0 whenever the writer rebuilds the buffer.
+
+    @property
+    def oldest_sample(self) -> typing.Optional[int]:
+        """Absolute index of the oldest sample the ring still holds, or None if unconnected."""
+        if not self._ensure_buffer():
+            return None
+        snap = self._snapshot()
+        if snap is None:
+            return None
+        return snap[2]
+
+    def read(
+        self, start_sample: int, n: int, copy: bool = True, channels: typing.Optional[typing.Sequence[int]] = None
+    ) -> npt.NDArray:
+        """The ``n`` samples beginning at absolute index ``start_sample``.
+
+        Raises :class:`SamplesUnavailableError` if any of them has already been
+        overwritten, is overwritten while being copied, or has not been written
+        yet (including when the mirror is not connected).
 
-        self._read_index = (self._read_index + n) % self._mirror_state.meta_struct.shape[0]
-        self._last_meta.wrap_counter = self._mirror_state.meta_struct.wrap_counter
+        With ``copy=False`` the result is a view when the range does not wrap
+        (or the mirror is double-mapped), and a view cannot be vouched for until
+        the caller has copied out of it: afterwards, ``start_sample >=
+        oldest_sample`` confirms the copy is intact.
 
+        ``channels`` selects indices along the first non-buffered axis, and
+        always copies; it is cheapest on a ``channel_major`` ring, where only
+        the selected channels' memory is read.
+        """
+        if not self._ensure_buffer():
+            raise SamplesUnavailableError(start_sample, n, range(0))
+        snap = self._snapshot()
+        if snap is None or snap[0] != self._last_meta.buffer_generation:
+            raise SamplesUnavailableError(start_sample, n, range(0))
+        generation, total, oldest = snap
+        if n < 0 or start_sample < oldest or start_sample + n > total:
+            raise SamplesUnavailableError(start_sample, n, range(oldest, total))
+
+        result, copied = self._window(start_sample, n, copy, channels)
+        if copied and self._n_overwritten(generation, start_sample, n):
+            snap = self._snapshot()
+            raise SamplesUnavailableError(start_sample, n, range(0) if snap is None else range(snap[2], snap[1]))
+        return result
+
+    def timestamps(self, start_sample: int, n: int) -> typing.Optional[npt.NDArray]:
+        """Where samples ``start_sample`` to ``start_sample + n`` fall along the buffered axis, as float64.
+
+        For a LinearAxis this is each sample's nearest preceding chunk record
+        (see .shmem) plus the axis gain per sample since, computed for all of
+        them at once. Samples older than the oldest record still held are
+        extrapolated back from it, and samples not yet written forward from the
+        newest. For a CoordinateAxis the writer's own per-sample values are
+        returned; any the writer has overwritten (or not yet written) are NaN.
+
+        None if the writer publishes no timestamps (``ShMemCircBuff(timestamps=
+        False)``), or has not written any since connecting.
+        """
+        if not self._ensure_buffer() or self._time_arr is None:
+            return None
+        meta = self._mirror_state.meta_struct
+        generation = self._last_meta.buffer_generation
+        indices = np.arange(start_sample, start_sample + n, dtype=np.int64)
+
+        if meta.time_mode == TIME_MODE_SAMPLES:
+            before = self._snapshot()
+            if before is None or before[0] != generation:
+                return None
+            capacity = self._time_arr.shape[0]
+            times = self._time_arr[indices % capacity]  # Fancy indexing copies.
+            # As for the data: re-snapshot after the copy to find what it missed.
+            after = self._snapshot()
+            if after is None or after[0] != generation:
+                return None
+            times[(indices < after[2]) | (indices >= before[1])] = np.nan
+            return times
+
+        records = self._time_records()
+        if records is None:
+            return None
+        first = records["sample"].astype(np.int64)
+        which = np.maximum(np.searchsorted(first, indices, side="right") - 1, 0)
+        gain = 1.0 / meta.srate
+        return records["offset"][which] + (indices - first[which]) * gain
+
+    def _time_records(self) -> typing.Optional[npt.NDArray]:
+        """A copy of the TIME_MODE_CHUNKS records still held, oldest first, or None if there are none."""
+        generation = self._last_meta.buffer_generation
+        n_records = self._time_arr.shape[0]
+        snap = self._seqlock_read(lambda m: (int(m.buffer_generation), int(m.chunks_written)))
+        if snap is None or snap[0] != generation or snap[1] == 0:
+            return None
+        k = snap[1]
+        held = min(k, n_records)
+        records = self._time_arr[np.arange(k - held, k) % n_records]  # Fancy indexing copies.
+        # Drop any the writer replaced while we copied: they lead, as with samples.
+        snap = self._seqlock_read(lambda m: (int(m.buffer_generation), int(m.chunks_written)))
+        if snap is None or snap[0] != generation:
+            return None
+        records = records[max(0, snap[1] - n_records - (k - held)) :]
+        return records if records.size else None
+
+    def sample_index(self, t: float) -> typing.Optional[int]:
+        """Absolute index of the first sample at or after time ``t``.
+
+        A binary search over the time segment (see .shmem): over the chunk
+        records for a LinearAxis, then one step of arithmetic within the chunk;
+        over the per-sample timestamps in place for a CoordinateAxis.
+
+        The answer may not be a sample the ring holds: past the newest sample
+        it is one not yet written, and if ``t`` precedes everything the ring
+        still holds it is below :attr:`oldest_sample` -- either way,
+        :meth:`read` of it raises. None if there are no timestamps.
+        """
+        if not self._ensure_buffer() or self._time_arr is None:
+            return None
+        meta = self._mirror_state.meta_struct
+
+        if meta.time_mode == TIME_MODE_SAMPLES:
+            generation = self._last_meta.buffer_generation
+            capacity = self._time_arr.shape[0]
+            while True:
+                snap = self._snapshot()
+                if snap is None or snap[0] != generation:
+                    return None
+                _, total, oldest = snap
+                # The held samples are two sorted runs of the ring: from the
+                # oldest slot to the end, then from slot 0. Search each in place.
+                head = self._time_arr[oldest % capacity : min(capacity, oldest % capacity + total - oldest)]
+                tail = self._time_arr[: total - oldest - head.shape[0]]
+                if head.shape[0] and t <= head[-1]:
+                    index = oldest + int(np.searchsorted(head, t, side="left"))
+                else:
+                    index = oldest + head.shape[0] + int(np.searchsorted(tail, t, side="left"))
+                # Whatever we searched must not have been overwritten meanwhile.
+                if not self._n_overwritten(generation, oldest, total - oldest):
+                    break
+            if index == oldest and oldest > 0:
+                # Some overwritten sample may have been the first at or after t.
+                index = oldest - 1
+            return index
+
+        records = self._time_records()
+        if records is None:
+            return None
+        first = records["sample"].astype(np.int64)
+        r = max(int(np.searchsorted(records["offset"], t, side="right")) - 1, 0)
+        # Tolerate t landing a rounding error past a sample's own time.
+        index = int(first[r] + np.ceil((t - records["offset"][r]) * meta.srate - 1e-9))
+        if r + 1 < len(first):
+            # t fell in a gap after this chunk: the next chunk's first sample.
+            index = min(index, int(first[r + 1]))
+        return index
+
+    def read_between(self, t0: float, t1: float, copy: bool = False) -> typing.Tuple[npt.NDArray, int]:
+        """The samples timed in ``[t0, t1)``, and the absolute index of the first.
+
+        A view where possible -- see :meth:`read` for what that entails -- since
+        an epoch cut around an event is often reduced straight away. Raises
+        :class:`SamplesUnavailableError` if any part of the range has been
+        overwritten or not yet written, rather than returning a partial epoch.
+        Raises ``LookupError`` if the writer publishes no timestamps.
+        """
+        start = self.sample_index(t0)
+        stop = self.sample_index(t1)
+        if start is None or stop is None:
+            raise LookupError(f"shmem {self._shmem_name!r} has no timestamps to search")
+        return self.read(start, max(0, stop - start), copy=copy), start
+
+    def latest(
+        self, n: int, copy: bool = True, channels: typing.Optional[typing.Sequence[int]] = None
+    ) -> typing.Tuple[npt.NDArray, int]:
+        """The most recent ``n`` samples, and the absolute index of the first.
+
+        Returns fewer than ``n`` if fewer have been written (none, if the mirror
+        is not connected). Samples overwritten during the copy are dropped from
+        the front, as by :meth:`auto_view`, and the index adjusted to match.
+        ``copy=False`` returns a view where possible, and ``channels`` selects
+        channels, both as for :meth:`read`.
+        """
+        if not self._ensure_buffer():
+            return np.array([[]]), 0
+        snap = self._snapshot()
+        if snap is None or snap[0] != self._last_meta.buffer_generation:
+            return self._mirror_state.buffer_arr[:0], 0
+        generation, total, oldest = snap
+        n = max(0, min(n, total - oldest))
+        start = total - n
+
+        result, copied = self._window(start, n, copy, channels)
+        if copied:
+            n_torn = self._n_overwritten(generation, start, n)
+            result = result[n_torn:]
+            start += n_torn
+        return result, start
+
+    @staticmethod
+    def _copy_frames(dst: npt.NDArray, src: npt.NDArray, axes: typing.Optional[typing.Sequence[int]]) -> None:
+        if axes is not None:
+            src = src.transpose((0,) + tuple(a + 1 for a in axes))
+        if src.shape[1:] != dst.shape[1:]:
+            src = src.reshape(dst.shape)
+        np.copyto(dst, src, casting="unsafe")
+
+
+class ReadCursor:
+    """One consumer's position in an :class:`EZShmMirror`'s ring.
+
+    Get one from :meth:`EZShmMirror.cursor`. Reads through a cursor consume
+    from its own position and count its own losses; the mapping and metadata
+    underneath belong to the mirror, so a cursor is only usable while its
+    mirror is alive.
+    """
+
+    def __init__(self, mirror: EZShmMirror):
+        # A proxy, so the mirror's default cursor does not keep it alive.
+        self._mirror = weakref.proxy(mirror)
+        # Position as an absolute count of samples since the buffer generation
+        # began. None until the first read after (re)connecting.
+        self._read_pos: typing.Optional[int] = None
+        # (buffer_generation, start, n) of the slice auto_view last returned,
+        # for check_last_read.
+        self._last_read: typing.Optional[typing.Tuple[int, int, int]] = None
+        self._n_lost = 0
+        # (start, n) of the samples the last read actually returned, after any
+        # torn ones were dropped, for last_timestamps.
+        self._last_span: typing.Optional[typing.Tuple[int, int]] = None
+        # Created on the first wait(); see .notify.
+        self._doorbell: typing.Optional[Doorbell] = None
+
+    def _reset(self) -> None:
+        self._read_pos = None
+        self._last_read = None
+        self._last_span = None
+
+    def check_last_read(self) -> int:
+        """How many leading samples of the last :meth:`auto_view` result have been overwritten since.
+
+        ``auto_view`` returns a view into the ring when it can, and a view is
+        only as good as the moment you look at it. Copy what you need, *then*
+        call this: zero means the copy is intact; a positive ``k`` means the
+        first ``k`` rows of the copy are torn and should be discarded.
+        """
+        if self._last_read is None or self._mirror._mirror_state.meta_struct is None:
+            return 0
+        return self._mirror._n_overwritten(*self._last_read)
+
+    @property
+    def n_lost(self) -> int:
+        """Samples the most recent :meth:`auto_view` skipped or discarded.
+
+        Counts both samples the writer lapped before the read began, and -- for
+        a read that copied -- leading samples it overwrote during the copy.
+        """
+        return self._n_lost
+
+    def _advance_past_overflow(self) -> typing.Optional[typing.Tuple[int, int, bool]]:
+        """Snapshot the header and bring the cursor back inside the ring.
+
+        Returns ``(generation, n_available, b_overflow)``, having added any
+        samples the writer lapped to :attr:`n_lost`; or None if there is no
+        usable snapshot (a wedged writer, or the buffer was rebuilt since
+        _ensure_buffer -- the next call reconnects).
+        """
+        snap = self._mirror._snapshot()
+        if snap is None or snap[0] != self._mirror._last_meta.buffer_generation:
+            return None
+        generation, total, oldest = snap
+
+        if self._read_pos is None:
+            # First read since connecting: start from the oldest sample held.
+            self._read_pos = oldest
+
+        b_overflow = self._read_pos < oldest
+        if b_overflow:
+            # In case of overflow -- lapped, or skipped by an idle writer -- start
+            # reading from the oldest available data
+            self._n_lost += oldest - self._read_pos
+            self._read_pos = oldest
+
+        return generation, total - self._read_pos, b_overflow
+
+    def auto_view(self, n: typing.Optional[int] = None, copy: bool = False) -> typing.Tuple[npt.NDArray, bool]:
+        """Return the next ``n`` unread samples (all of them if None), and whether any were lost.
+
+        The result is a view into the ring when the slice does not wrap (or
+        always, if the mirror is ``double_map``-ped), and a fresh array when it
+        does or when ``copy`` is True. A copy is checked for
+        tearing before it is returned: any leading samples the writer overwrote
+        while they were being copied are dropped, and counted in :attr:`n_lost`.
+        A view cannot be checked until the caller has copied it -- see
+        :meth:`check_last_read`.
+        """
+        self._n_lost = 0
+        self._last_span = None
+        if not self._mirror._ensure_buffer():
+            return np.array([[]]), False
+
+        cursor = self._advance_past_overflow()
+        if cursor is None:
+            return self._mirror._mirror_state.buffer_arr[:0], False
+        generation, n_available, b_overflow = cursor
+
+        # An unsized read waits for more than one sample, as it always has.
+        if n_available < (2 if n is None else max(n, 1)):
+            # Not enough samples available.
+            # Return a null-slice of the buffer. This provides correct dimensions.
+            return self._mirror._mirror_state.buffer_arr[:0], b_overflow
+
+        # We have enough samples.
+        if n is None:
+            n = n_available
+
+        start = self._read_pos
+        result, copy = self._mirror._window(start, n, copy)
+        self._read_pos = start + n
+        self._last_read = (generation, start, n)
+
+        if copy:
+            n_torn = self._mirror._n_overwritten(generation, start, n)
+            if n_torn:
+                self._n_lost += n_torn
+                b_overflow = True
+                result = result[n_torn:]
+
+        self._last_span = (start + n - result.shape[0], result.shape[0])
+        # Tell a writer holding back for us (see .shmem.OverflowPolicy) right away.
+        self._mirror._touch()
         return result, b_overflow
+
+    def read_into(self, out: npt.NDArray, axes: typing.Optional[typing.Sequence[int]] = None) -> ReadResult:
+        """Copy the next unread samples into ``out``, a caller-owned array, and consume them.
+
+        The steady-state alternative to :meth:`auto_view` for a reader that
+        converts what it reads anyway: the dtype conversion and any axis
+        rearrangement happen during the one copy out of the ring, so nothing is
+        allocated per call.
+
+        Args:
+            out: Destination, buffered axis first. Up to ``out.shape[0]`` samples
+              are read into ``out[:n]``. Its trailing shape must hold one frame:
+              the ring's frame shape, after ``axes``, or any reshape of it (e.g.
+              with extra dimensions folded into channels). Values are cast to
+              ``out.dtype`` unconditionally.
+            axes: Optional permutation of the *frame* dimensions (0 is the first
+              non-buffered axis), applied before the copy -- e.g. ``(1, 0)`` to
+              move a leading metric axis behind the channels. A reshape on top
+              of a permutation needs a temporary; either alone does not.
+
+        Returns:
+            ``(n, overflow, n_lost)``. A torn copy is detected and its leading
+            samples dropped, exactly as for ``auto_view(copy=True)``, so
+            ``out[:n]`` is always intact.
+        """
+        self._n_lost = 0
+        self._last_span = None
+        if not self._mirror._ensure_buffer():
+            return ReadResult(0, False, 0)
+        cursor = self._advance_past_overflow()
+        if cursor is None:
+            return ReadResult(0, False, 0)
+        generation, n_available, b_overflow = cursor
+
+        n = min(n_available, out.shape[0])
+        if n <= 0:
+            return ReadResult(0, b_overflow, self._n_lost)
+
+        capacity = int(self._mirror._mirror_state.meta_struct.shape[0])
+        start = self._read_pos
+        read_index = start % capacity
+        ring = self._mirror._mirror_state.buffer_arr
+        if self._mirror._ring2 is not None:
+            self._mirror._copy_frames(out[:n], self._mirror._ring2[read_index : read_index + n], axes)
+        else:
+            n_first = min(n, capacity - read_index)
+            self._mirror._copy_frames(out[:n_first], ring[read_index : read_index + n_first], axes)
+            if n > n_first:
+                self._mirror._copy_frames(out[n_first:n], ring[: n - n_first], axes)
+        if self._mirror._quant is not None:
+            scale, offset = self._mirror._quant
+            np.multiply(out[:n], scale, out=out[:n], casting="unsafe")
+            np.add(out[:n], offset, out=out[:n], casting="unsafe")
+
+        self._read_pos = start + n
+        self._last_read = (generation, start, n)
+
+        n_torn = self._mirror._n_overwritten(generation, start, n)
+        if n_torn:
+            out[: n - n_torn] = out[n_torn:n]
+            n -= n_torn
+            self._n_lost += n_torn
+            b_overflow = True
+        self._last_span = (self._read_pos - n, n)
+        self._mirror._touch()
+        return ReadResult(n, b_overflow, self._n_lost)
+
+    def last_timestamps(self) -> typing.Optional[npt.NDArray]:
+        """Timestamps of the rows the last :meth:`auto_view` or :meth:`read_into` returned.
+
+        One per row, aligned with them; see :meth:`EZShmMirror.timestamps`.
+        Call it promptly: a sample's timestamp is overwritten along with it.
+        None if the last read returned nothing, or there are no timestamps.
+        """
+        if self._last_span is None or not self._last_span[1]:
+            return None
+        return self._mirror.timestamps(*self._last_span)
+
+    # ---- Waiting for data -----------------------------------------------
+
+    def _n_unread(self) -> int:
+        """Samples auto_view would return now, without consuming them."""
+        if not self._mirror._ensure_buffer():
+            return 0
+        snap = self._mirror._snapshot()
+        if snap is None or snap[0] != self._mirror._last_meta.buffer_generation:
+            return 0
+        _, total, oldest = snap
+        start = oldest if self._read_pos is None else max(self._read_pos, oldest)
+        return total - start
+
+    def _get_doorbell(self) -> typing.Optional[Doorbell]:
+        """This cursor's doorbell, created on first wait. None means poll."""
+        if self._doorbell is None and self._mirror._doorbell_ok and self._mirror._shmem_name is not None:
+            try:
+                self._doorbell = Doorbell(shorten_shmem_name(self._mirror._shmem_name))
+            except OSError as e:
+                print(f"Could not create a doorbell, falling back to polling: {e}")
+                self._mirror._doorbell_ok = False
+        return self._doorbell
+
+    def _close_doorbell(self) -> None:
+        if self._doorbell is not None:
+            self._doorbell.close()
+            self._doorbell = None
+
+    def _wait_slice(self, deadline: typing.Optional[float]) -> typing.Optional[float]:
+        """How long one blocking wait may last: until the deadline, but never
+        longer than a connection retry while we are still unconnected, and
+        never longer than the polling interval without a doorbell."""
+        limit = WAIT_SLICE
+        if self._doorbell is None:
+            limit = POLL_INTERVAL
+        elif self._mirror._mirror_state.buffer_arr is None:
+            limit = CONNECT_RETRY_INTERVAL
+        if deadline is None:
+            return limit
+        return max(0.0, min(limit, deadline - time.monotonic()))
+
+    def wait(self, n: int = 1, timeout: typing.Optional[float] = None) -> bool:
+        """Block until at least ``n`` unread samples are available to :meth:`auto_view`.
+
+        Sleeps in the kernel between writes when the platform has doorbells (see
+        .notify), so it wakes as soon as the writer publishes and costs nothing
+        while the stream is idle; elsewhere it polls every POLL_INTERVAL.
+
+        Returns False if ``timeout`` seconds pass first. Does not consume
+        anything -- follow it with :meth:`auto_view`.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self._n_unread() >= n:
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            bell = self._get_doorbell()
+            if bell is None:
+                time.sleep(self._wait_slice(deadline))
+            else:
+                bell.wait(self._wait_slice(deadline))
+
+    async def wait_async(self, n: int = 1, timeout: typing.Optional[float] = None) -> bool:
+        """:meth:`wait`, without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self._n_unread() >= n:
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            bell = self._get_doorbell()
+            if bell is None:
+                await asyncio.sleep(self._wait_slice(deadline))
+                continue
+            rung = loop.create_future()
+            loop.add_reader(bell.fileno(), lambda: rung.done() or rung.set_result(None))
+            try:
+                await asyncio.wait_for(rung, self._wait_slice(deadline))
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                loop.remove_reader(bell.fileno())
+            bell.clear()
+
+    async def __aiter__(self) -> typing.AsyncIterator[npt.NDArray]:
+        """``async for chunk in cursor``: each batch of new samples as it arrives.
+
+        Chunks are copies, validated against tearing (see :meth:`auto_view`),
+        since the consumer may hold one across any number of awaits. Check
+        :attr:`n_lost` to learn of samples skipped between chunks. Runs until
+        the mirror is disconnected.
+        """
+        while self._mirror._shmem_name is not None:
+            if not await self.wait_async(timeout=WAIT_SLICE):
+                continue
+            # Sized, because an unsized auto_view holds out for two samples and
+            # the wait above returns on one.
+            n_unread = self._n_unread()
+            chunk, _ = self.auto_view(max(n_unread, 1), copy=True)
+            if chunk.size:
+                yield chunk
+            else:
+                # Nothing readable after all; wait for the writer rather than spin.
+                await self.wait_async(n_unread + 1, timeout=WAIT_SLICE)
@@ -0,0 +1,116 @@
+"""Shared fixtures for the shmem tests."""
+
+import asyncio
+import os
+import typing
+
+import numpy as np
+import pytest
+from ezmsg.util.messages.axisarray import AxisArray, CoordinateAxis
+
+from ezmsg.tools.shmem.shmem import ShMemCircBuff
+from ezmsg.tools.shmem.shmem_mirror import EZShmMirror
+
+FS = 100.0
+N_CH = 3
+BUF_DUR = 1.0  # 100-sample ring
+
+
+def make_msg(start: int, n: int, n_ch: int = N_CH, dtype=np.float64) -> AxisArray:
+    """``n`` samples whose value in every channel is their absolute index."""
+    data = np.repeat(np.arange(start, start + n, dtype=dtype)[:, None], n_ch, axis=1)
+    return AxisArray(
+        data=data,
+        dims=["time", "ch"],
+        axes={"time": AxisArray.TimeAxis(fs=FS, offset=start / FS)},
+        key="ring",
+    )
+
+
+class Link:
+    """A ShMemCircBuff and an EZShmMirror on one name, with the sink driven by hand.
+
+    Calling the sink's handlers directly rather than running a graph makes every
+    interleaving of writes and reads the test's choice.
+    """
+
+    def __init__(self, name: str, buf_dur: float = BUF_DUR, mirror_kwargs: typing.Optional[dict] = None, **settings):
+        self.name = f"{name}{os.getpid()}"
+        self.sink = ShMemCircBuff(self.name, buf_dur, **settings)
+        self.sink._instantiate_state()
+        asyncio.run(self.sink.initialize())
+        self.mirror = EZShmMirror(self.name, **(mirror_kwargs or {}))
+        self.n_written = 0
+
+    def send(self, msg: AxisArray) -> None:
+        asyncio.run(self.sink.on_message(msg))
+
+    def write(self, n: int, **kwargs) -> None:
+        self.send(make_msg(self.n_written, n, **kwargs))
+        self.n_written += n
+
+    def close(self) -> None:
+        self.mirror.disconnect()
+        asyncio.run(self.sink.shutdown())
+
+
+@pytest.fixture
+def make_link(request):
+    """Factory for :class:`Link` s, all closed at teardown."""
+    links = []
+
+    def factory(**settings) -> Link:
+        lnk = Link(f"{request.node.name[:10]}{len(links)}", **settings)
+        links.append(lnk)
+        return lnk
+
+    yield factory
+    for lnk in links:
+        lnk.close()
+
+
+@pytest.fixture
+def link(make_link) -> Link:
+    return make_link()
+
+
+@pytest.fixture
+def make_pair(request):
+    """Factory for ``(sink, mirror)`` pairs of any sink Unit and the class that reads it, all closed at teardown.
+
+    Like :class:`Link`, the sink is never run; tests call its handlers.
+    """
+    pairs = []
+
+    def factory(sink_cls: type, mirror_cls: type, **settings) -> tuple:
+        name = f"{request.node.name[:10]}{len(pairs)}{os.getpid()}"
+        sink = sink_cls(name, **settings)
+        sink._instantiate_state()
+        asyncio.run(sink.initialize())
+        pairs.append((sink, mirror_cls(name)))
+        return pairs[-1]
+
+    yield factory
+    for sink, mirror in pairs:
+        mirror.disconnect()
+        asyncio.run(sink.shutdown())
+
+
+def make_spectrum(n_freqs: int, n_ch: int, t: float, time_axis: bool = False) -> AxisArray:
+    """A ``(freq, ch)`` frame offset by ``t``, with ``attrs["t"] = t``; led by a one-sample ``time`` axis if asked."""
+    data = np.arange(n_freqs * n_ch, dtype=np.float32).reshape(n_freqs, n_ch) + t
+    dims = ["freq", "ch"]
+    axes = {
+        "freq": AxisArray.LinearAxis(gain=0.5, offset=1.0, unit="Hz"),
+        "ch": CoordinateAxis(data=np.array([f"ch{i}" for i in range(n_ch)]), dims=["ch"]),
+    }
+    if time_axis:
+        data, dims = data[None], ["time"] + dims
+        axes["time"] = AxisArray.TimeAxis(fs=10.0, offset=t)
+    return AxisArray(data, dims=dims, axes=axes, attrs={"t": t}, key="psd")
+
+
+@pytest.fixture
+def spectrum() -> typing.Callable[..., AxisArray]:
+    """:func:`make_spectrum`, for the tests to build frames with."""
+    return make_spectrum
@@ -157,6 +157,14 @@ def test_axes_equal_detects_real_changes():
     assert not axes_equal(a.axes, {k: v for k, v in a.axes.items() if k != "ch"})
 
 
+def test_axes_equal_ignores_the_buffered_axis_position():
+    a, b = make_msg(offset=0.0), make_msg(offset=1.5)
+    assert not axes_equal(a.axes, b.axes)
+    assert axes_equal(a.axes, b.axes, static_axis="time")
+    slower = replace(b, axes={**b.axes, "time": AxisArray.TimeAxis(fs=500.0, offset=1.5)})
+    assert not axes_equal(a.axes, slower.axes, static_axis="time")
+
+
 def test_attrs_equal_tolerates_array_values():
     """dict == would raise on an ndarray value; identity comparison must not."""
     arr = np.arange(4)
@@ -434,3 +442,21 @@ def test_reader_rejects_a_foreign_header_loudly():
     finally:
         shm.close()
         shm.unlink()
+
+
+def test_republished_metadata_is_rewritten_in_place(link):
+    link.send(make_msg(n_ch=4))
+    assert link.mirror.axes["ch"]["data"]["label"][2] == "elec002"
+    segment = link.mirror.meta.aux_segment
+
+    relabelled = make_ch_axis(4)
+    relabelled.data["label"][2] = "CHANGED"
+    msg = make_msg(n_ch=4)
+    link.send(replace(msg, axes={**msg.axes, "ch": relabelled}))
+    assert link.mirror.axes["ch"]["data"]["label"][2] == "CHANGED"
+    assert link.mirror.meta.aux_segment == segment
+
+    # A blob too big for the page-rounded segment moves to a new one.
+    link.send(make_msg(n_ch=4, notes="x" * 10000))
+    assert link.mirror.attrs["notes"] == "x" * 10000
+    assert link.mirror.meta.aux_segment != segment
@@ -0,0 +1,53 @@
+"""The event ring: EventRing and EventMirror on one name, driven in-process."""
+
+import asyncio
+
+import numpy as np
+from ezmsg.util.messages.axisarray import AxisArray, CoordinateAxis
+
+from ezmsg.tools.shmem.events import EventRing
+from ezmsg.tools.shmem.events_mirror import EventMirror
+
+
+def events(times, values) -> AxisArray:
+    data = np.asarray(values)[:, None]
+    axis = CoordinateAxis(data=np.asarray(times, dtype=float), dims=["time"])
+    return AxisArray(data, dims=["time", "ch"], axes={"time": axis})
+
+
+def test_labels_are_interned_and_read_back(make_pair):
+    sink, mirror = make_pair(EventRing, EventMirror)
+    asyncio.run(sink.on_message(events([0.5, 1.0, 1.5], ["start", "stim", "start"])))
+
+    records, overflow = mirror.read()
+    assert not overflow and records["time"].tolist() == [0.5, 1.0, 1.5]
+    assert records["code"].tolist() == [0, 1, 0]
+    assert mirror.labels(records) == ["start", "stim", "start"]
+    assert sink.STATE.meta_struct.table_used == 2 * 2 + len("start") + len("stim")
+
+    records, _ = mirror.read()
+    assert records.shape[0] == 0
+
+
+def test_numeric_codes_carry_no_label(make_pair):
+    sink, mirror = make_pair(EventRing, EventMirror)
+    asyncio.run(sink.on_message(events([0.1, 0.2], [7, 3])))
+    records, _ = mirror.read()
+    assert records["code"].tolist() == [7, 3] and mirror.labels(records) == [None, None]
+
+
+def test_range_queries_and_laps(make_pair):
+    sink, mirror = make_pair(EventRing, EventMirror, capacity=100)
+    for start in range(0, 250, 50):
+        t = np.arange(start, start + 50) / 100.0
+        asyncio.run(sink.on_message(events(t, np.arange(start, start + 50))))
+
+    assert mirror.between(1.60, 1.65)["code"].tolist() == [160, 161, 162, 163, 164]
+    assert mirror.between(0.0, 1.52)["code"].tolist() == [150, 151]  # older ones overwritten
+    assert mirror.between(3.0, 4.0).shape[0] == 0
+
+    records, overflow = mirror.read(10)
+    assert records["code"].tolist() == list(range(150, 160)) and not overflow
+    asyncio.run(sink.on_message(events(np.arange(250, 350) / 100.0, np.arange(250, 350))))
+    records, overflow = mirror.read()
+    assert overflow and mirror.n_lost == 90 and records["code"][0] == 250
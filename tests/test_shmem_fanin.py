@@ -0,0 +1,55 @@
+"""ShMemFanIn: several inputs merged along ch into one link, read back through EZShmMirror."""
+
+import asyncio
+
+import numpy as np
+import pytest
+from ezmsg.util.messages.axisarray import AxisArray, CoordinateAxis
+
+from ezmsg.tools.shmem.fanin import FanInAlign, ShMemFanIn
+from ezmsg.tools.shmem.shmem_mirror import EZShmMirror
+
+FS = 100.0
+
+
+def headstage(start: int, n: int, n_ch: int, base: float) -> AxisArray:
+    """``n`` samples from ``start``; channel ``c`` holds ``base + 100 * c`` plus the sample index."""
+    data = np.arange(start, start + n, dtype=float)[:, None] + base + 100.0 * np.arange(n_ch)
+    return AxisArray(
+        data,
+        dims=["time", "ch"],
+        axes={
+            "time": AxisArray.TimeAxis(fs=FS, offset=start / FS),
+            "ch": CoordinateAxis(data=np.array([f"ch{i}" for i in range(n_ch)]), dims=["ch"]),
+        },
+        key="rec",
+    )
+
+
+def test_inputs_are_merged_by_sample_index(make_pair):
+    sink, mirror = make_pair(ShMemFanIn, EZShmMirror, buf_dur=1.0)
+    asyncio.run(sink.on_input_0(headstage(0, 10, 2, 0.0)))
+    asyncio.run(sink.on_input_1(headstage(0, 6, 3, 1000.0)))
+    chunk, _ = mirror.auto_view()
+    assert chunk.shape == (6, 5)
+
+    asyncio.run(sink.on_input_1(headstage(6, 4, 3, 1000.0)))
+    chunk, _ = mirror.auto_view()
+    assert chunk.shape == (4, 5)
+    expected = np.arange(6, 10, dtype=float)[:, None] + np.array([0, 100, 1000, 1100, 1200])
+    np.testing.assert_array_equal(chunk, expected)
+    # Both headstages have a "ch0", so every label says which input it came from.
+    assert list(mirror.axes["ch"]["data"]) == ["0:ch0", "0:ch1", "1:ch0", "1:ch1", "1:ch2"]
+
+
+def test_time_alignment_drops_samples_without_a_partner(make_pair):
+    sink, mirror = make_pair(ShMemFanIn, EZShmMirror, buf_dur=1.0, align=FanInAlign.TIME)
+    # Input 1 starts three samples late.
+    asyncio.run(sink.on_input_0(headstage(0, 10, 2, 0.0)))
+    asyncio.run(sink.on_input_1(headstage(3, 10, 2, 1000.0)))
+
+    chunk, _ = mirror.auto_view()
+    assert chunk.shape == (7, 4)
+    np.testing.assert_array_equal(chunk[:, 0], np.arange(3, 10))
+    np.testing.assert_array_equal(chunk[:, 2], 1000.0 + np.arange(3, 10))
+    assert mirror.timestamps(0, 1)[0] == pytest.approx(3 / FS)
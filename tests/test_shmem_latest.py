@@ -0,0 +1,49 @@
+"""The latest-frame publisher: ShMemLatest and LatestMirror on one name, driven in-process."""
+
+import asyncio
+
+import numpy as np
+
+from ezmsg.tools.shmem.latest import ShMemLatest
+from ezmsg.tools.shmem.latest_mirror import LatestMirror
+
+
+def test_the_newest_frame_wins(make_pair, spectrum):
+    sink, mirror = make_pair(ShMemLatest, LatestMirror)
+    assert mirror.latest() is None
+    for t in range(5):
+        asyncio.run(sink.on_message(spectrum(6, 2, float(t), time_axis=True)))
+
+    msg = mirror.latest()
+    np.testing.assert_array_equal(msg.data, spectrum(6, 2, 4.0, time_axis=True).data)
+    assert msg.dims == ["time", "freq", "ch"] and msg.key == "psd" and msg.attrs == {"t": 4.0}
+    assert msg.axes["time"].offset == 4.0 and msg.axes["time"].gain == 0.1
+    assert msg.axes["freq"].gain == 0.5 and list(msg.axes["ch"].data) == ["ch0", "ch1"]
+    assert not np.shares_memory(msg.data, mirror._slots)  # a copy
+    assert mirror.frames_published == 5
+
+
+def test_poll_returns_each_frame_at_most_once(make_pair, spectrum):
+    sink, mirror = make_pair(ShMemLatest, LatestMirror, n_slots=2)
+    asyncio.run(sink.on_message(spectrum(4, 3, 0.0, time_axis=True)))
+    assert mirror.poll().axes["time"].offset == 0.0
+    assert mirror.poll() is None
+    assert not mirror.wait(timeout=0.05)
+
+    asyncio.run(sink.on_message(spectrum(4, 3, 1.0, time_axis=True)))
+    asyncio.run(sink.on_message(spectrum(4, 3, 2.0, time_axis=True)))
+    assert mirror.wait(timeout=0.05)
+    # The frame in between is never replayed.
+    assert mirror.poll().axes["time"].offset == 2.0
+    assert mirror.poll() is None
+
+
+def test_a_new_shape_starts_a_new_generation(make_pair, spectrum):
+    sink, mirror = make_pair(ShMemLatest, LatestMirror)
+    asyncio.run(sink.on_message(spectrum(4, 2, 0.0, time_axis=True)))
+    assert mirror.latest().data.shape == (1, 4, 2)
+
+    asyncio.run(sink.on_message(spectrum(8, 3, 1.0, time_axis=True)))
+    msg = mirror.latest()
+    assert msg.data.shape == (1, 8, 3) and list(msg.axes["ch"].data) == ["ch0", "ch1", "ch2"]
+    assert mirror.frames_published == 1
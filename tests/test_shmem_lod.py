@@ -0,0 +1,67 @@
+"""Level-of-detail min/max rings published beside the raw ring."""
+
+import numpy as np
+import pytest
+
+from ezmsg.tools.plot.describe import metric_axis
+from ezmsg.tools.shmem.lod import MinMaxDecimator
+
+FS = 100.0
+
+
+def test_decimation_does_not_depend_on_chunking():
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal((1000, 3))
+    t = np.arange(1000) / FS
+
+    whole = MinMaxDecimator(7).push(x, x, t)
+
+    dec = MinMaxDecimator(7)
+    parts = [dec.push(x[i:j], x[i:j], t[i:j]) for i, j in zip([0, 3, 4, 250, 600], [3, 4, 250, 600, 1000])]
+    for got, expected in zip((np.concatenate(p) for p in zip(*parts)), whole):
+        np.testing.assert_array_equal(got, expected)
+
+    lo, hi, bt = whole
+    assert lo.shape == (142, 3)
+    np.testing.assert_array_equal(lo[5], x[35:42].min(axis=0))
+    np.testing.assert_array_equal(hi[5], x[35:42].max(axis=0))
+    np.testing.assert_array_equal(bt, t[:994:7])
+
+
+def test_a_time_only_stream_carries_buckets_across_messages():
+    x = np.arange(10, dtype=float)
+    t = np.arange(10) / FS
+    dec = MinMaxDecimator(4)
+    parts = [dec.push(x[i:j], x[i:j], t[i:j]) for i, j in [(0, 3), (3, 6), (6, 10)]]
+    lo, hi, _ = (np.concatenate(p) for p in zip(*parts))
+    np.testing.assert_array_equal(lo, [0.0, 4.0])
+    np.testing.assert_array_equal(hi, [3.0, 7.0])
+
+
+def test_factor_must_decimate():
+    with pytest.raises(ValueError):
+        MinMaxDecimator(1)
+
+
+def test_levels_are_published_as_envelopes(make_link):
+    link = make_link(buf_dur=10.0, lod_factors=(100, 10))
+    for _ in range(30):
+        link.write(37)  # not a multiple of either factor
+    assert link.mirror.lod_factors == [10, 100]
+    assert link.mirror.pick_lod(50) == 10 and link.mirror.pick_lod(5) is None
+
+    for factor in (10, 100):
+        lod = link.mirror.open_lod(factor)
+        try:
+            chunk, start = lod.latest(1000)
+            # The level spans the same 10 s as the raw ring, in 1/factor the frames.
+            n_written, capacity = 1110 // factor, 1000 // factor
+            assert (start, chunk.shape) == (n_written - capacity, (capacity, 3, 2))
+            buckets = np.arange(start, n_written) * factor
+            np.testing.assert_array_equal(chunk[:, 0, 0], buckets)
+            np.testing.assert_array_equal(chunk[:, 0, 1], buckets + factor - 1)
+            np.testing.assert_allclose(lod.timestamps(start, capacity), buckets / FS)
+            assert lod.meta.srate == pytest.approx(FS / factor)
+            assert metric_axis(lod.dims, lod.axes).kind == "minmax"
+        finally:
+            lod.disconnect()
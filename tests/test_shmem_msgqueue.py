@@ -0,0 +1,50 @@
+"""The message queue: ShMemMsgQueue and MsgQueueMirror on one name, driven in-process."""
+
+import asyncio
+
+import numpy as np
+from ezmsg.util.messages.axisarray import AxisArray
+
+from ezmsg.tools.shmem.msgqueue import ShMemMsgQueue
+from ezmsg.tools.shmem.msgqueue_mirror import MsgQueueMirror
+
+
+def test_messages_of_any_shape_round_trip(make_pair, spectrum):
+    sink, mirror = make_pair(ShMemMsgQueue, MsgQueueMirror)
+    for n_freqs, n_ch, t in [(4, 2, 0.0), (7, 3, 1.0), (1, 1, 2.0)]:
+        asyncio.run(sink.on_message(spectrum(n_freqs, n_ch, t)))
+
+    for n_freqs, n_ch, t in [(4, 2, 0.0), (7, 3, 1.0), (1, 1, 2.0)]:
+        msg = mirror.read()
+        expected = spectrum(n_freqs, n_ch, t)
+        np.testing.assert_array_equal(msg.data, expected.data)
+        assert msg.dims == ["freq", "ch"] and msg.key == "psd" and msg.attrs == {"t": t}
+        assert msg.axes["freq"].gain == 0.5 and msg.axes["freq"].unit == "Hz"
+        assert list(msg.axes["ch"].data) == list(expected.axes["ch"].data)
+        assert not msg.data.flags.owndata  # a view into the arena
+        assert mirror.check_last_read()
+    assert mirror.read() is None
+
+
+def test_data_is_aligned_after_odd_sized_messages(make_pair):
+    sink, mirror = make_pair(ShMemMsgQueue, MsgQueueMirror, arena_bytes=4096)
+    for n in range(1, 40):
+        asyncio.run(sink.on_message(AxisArray(np.arange(n, dtype=np.float64), dims=["x"], key="k" * (n % 7))))
+        msg = mirror.read()
+        assert msg.data.flags.aligned and msg.data.ctypes.data % 64 == 0
+        np.testing.assert_array_equal(msg.data, np.arange(n))
+        del msg
+
+
+def test_a_lapped_reader_skips_what_was_overwritten(make_pair, spectrum):
+    sink, mirror = make_pair(ShMemMsgQueue, MsgQueueMirror, arena_bytes=4096)
+    asyncio.run(sink.on_message(spectrum(8, 4, 0.0)))
+    first = mirror.read()
+    for t in range(1, 20):
+        asyncio.run(sink.on_message(spectrum(8, 4, float(t))))
+    assert not mirror.check_last_read()
+
+    msg = mirror.read(copy=True)
+    assert mirror.n_lost > 0 and msg.attrs["t"] == 1.0 + mirror.n_lost
+    assert mirror.latest().attrs["t"] == 19.0
+    del first, msg
@@ -0,0 +1,112 @@
+"""Doorbells, and the mirror's blocking and async waits built on them."""
+
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from ezmsg.tools.shmem import notify
+from ezmsg.tools.shmem.notify import Doorbell, Ringer, doorbell_dir
+from ezmsg.tools.shmem.shmem import shorten_shmem_name
+
+needs_fifo = pytest.mark.skipif(not notify.AVAILABLE, reason="no named FIFOs on this platform")
+
+
+@needs_fifo
+def test_every_doorbell_rings():
+    header = shorten_shmem_name(f"bells{os.getpid()}")
+    bells = [Doorbell(header) for _ in range(3)]
+    ringer = Ringer(header)
+    try:
+        assert not any(b.wait(0) for b in bells)
+        ringer.ring()
+        assert all(b.wait(0) for b in bells)
+        # Cleared by the wait that saw it.
+        assert not any(b.wait(0) for b in bells)
+    finally:
+        ringer.close()
+        for b in bells:
+            b.close()
+
+
+@needs_fifo
+def test_abandoned_doorbell_is_reaped():
+    header = shorten_shmem_name(f"stale{os.getpid()}")
+    os.makedirs(doorbell_dir(header), exist_ok=True)
+    # A FIFO nobody has open: what a reader killed mid-wait leaves behind.
+    stale = os.path.join(doorbell_dir(header), "0-deadbeef")
+    os.mkfifo(stale)
+    ringer = Ringer(header)
+    ringer.ring()
+    ringer.close()
+    assert not os.path.exists(stale)
+    os.rmdir(doorbell_dir(header))
+
+
+def test_wait_times_out_on_an_idle_stream(link):
+    link.write(10)
+    link.mirror.auto_view()
+    t0 = time.monotonic()
+    assert not link.mirror.wait(1, timeout=0.2)
+    assert 0.15 < time.monotonic() - t0 < 1.0
+
+
+def test_wait_returns_on_the_write(link):
+    link.write(10)
+    link.mirror.auto_view()
+    link.mirror.wait(1, timeout=0)  # create the doorbell before the writer's next scan
+
+    def later():
+        time.sleep(0.2)
+        link.write(10)
+
+    writer = threading.Thread(target=later)
+    writer.start()
+    t0 = time.monotonic()
+    assert link.mirror.wait(10, timeout=5.0)
+    elapsed = time.monotonic() - t0
+    writer.join()
+    assert elapsed < 1.0
+    chunk, _ = link.mirror.auto_view()
+    assert chunk.shape[0] == 10
+
+
+def test_wait_does_not_consume(link):
+    link.write(10)
+    assert link.mirror.wait(5, timeout=1.0)
+    assert link.mirror.wait(5, timeout=1.0)
+    chunk, _ = link.mirror.auto_view()
+    assert chunk.shape[0] == 10
+
+
+def test_async_iteration(link):
+    async def consume():
+        received = []
+        async for chunk in link.mirror:
+            received.extend(int(v) for v in chunk[:, 0])
+            if len(received) >= 40:
+                break
+        return received
+
+    def produce():
+        for _ in range(4):
+            time.sleep(0.05)
+            link.write(10)
+
+    writer = threading.Thread(target=produce)
+    writer.start()
+    received = asyncio.run(asyncio.wait_for(consume(), timeout=10.0))
+    writer.join()
+    assert received == list(range(40))
+
+
+def test_async_iteration_yields_a_single_sample(link):
+    async def consume():
+        async for chunk in link.mirror:
+            return chunk
+
+    link.write(1)
+    chunk = asyncio.run(asyncio.wait_for(consume(), timeout=1.0))
+    assert chunk.shape[0] == 1
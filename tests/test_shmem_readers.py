@@ -0,0 +1,125 @@
+"""The reader registry in the shmem header: heartbeats, idle gating and lag."""
+
+import asyncio
+import time
+
+import numpy as np
+import pytest
+from ezmsg.util.messages.axisarray import AxisArray
+
+from ezmsg.tools.shmem.shmem_mirror import EZShmMirror
+
+
+def values(chunk) -> list:
+    return [int(v) for v in chunk[:, 0]]
+
+
+def test_idle_writer_skips_copies_and_a_late_reader_starts_clean(make_link):
+    link = make_link(idle_timeout=0.05)
+    link.mirror.disconnect()  # nobody attached
+    link.write(30)
+    assert not link.sink.STATE.buffer_arr.any()
+    assert link.sink.STATE.meta_struct.valid_from == 30
+
+    reader = EZShmMirror(link.name)
+    try:
+        assert reader.oldest_sample == 30
+        link.write(20)
+        chunk, overflow = reader.auto_view()
+        assert values(chunk) == list(range(30, 50)) and not overflow
+    finally:
+        reader.disconnect()
+
+
+def test_a_reader_that_goes_quiet_is_told_what_it_missed(make_link):
+    link = make_link(idle_timeout=0.05)
+    link.write(20)
+    chunk, _ = link.mirror.auto_view()
+    assert values(chunk) == list(range(20))
+
+    time.sleep(0.1)
+    link.write(20)
+    link.write(20)
+    chunk, overflow = link.mirror.auto_view()
+    assert chunk.shape[0] == 0 and overflow and link.mirror.n_lost == 40
+
+    link.write(10)
+    chunk, overflow = link.mirror.auto_view()
+    assert values(chunk) == list(range(60, 70)) and not overflow
+
+
+def test_reader_lag_follows_the_slowest_cursor(link):
+    link.write(50)
+    link.mirror.auto_view()
+    slow = link.mirror.cursor("slow")
+    slow.auto_view(10)
+    link.write(30)
+    link.mirror.wait(1, timeout=0)  # any read call stamps the slot
+    assert link.sink.reader_lag() == 80 - 10
+
+    link.mirror.remove_cursor("slow")
+    link.mirror.wait(1, timeout=0)
+    assert link.sink.reader_lag() == 80 - 50
+
+    link.mirror.disconnect()
+    assert link.sink.reader_lag() is None
+
+
+def test_drop_policy_counts_what_would_lap_a_reader(make_link):
+    link = make_link(overflow="drop")
+    link.write(60)
+    link.mirror.auto_view()
+    link.write(60)
+    link.write(60)  # 60 unread: no room
+    assert link.mirror.samples_dropped == 60
+    assert link.sink.STATE.meta_struct.messages_dropped == 1
+
+    chunk, overflow = link.mirror.auto_view()
+    assert values(chunk) == list(range(60, 120)) and not overflow
+    link.write(20)
+    chunk, overflow = link.mirror.auto_view()
+    assert values(chunk) == list(range(180, 200)) and not overflow
+
+
+def test_queue_policy_writes_held_messages_once_there_is_room(make_link):
+    link = make_link(overflow="queue", queue_len=1)
+    link.write(60)
+    link.write(60)  # queued
+    link.write(60)  # queue full: dropped
+    assert link.mirror.samples_dropped == 60
+
+    chunk, _ = link.mirror.auto_view()
+    assert values(chunk) == list(range(60))
+    link.write(10)
+    chunk, overflow = link.mirror.auto_view()
+    assert values(chunk) == list(range(60, 120)) + list(range(180, 190)) and not overflow
+
+
+def test_block_policy_awaits_the_reader(make_link):
+    link = make_link(overflow="block")
+    link.write(80)
+    data = np.repeat(np.arange(80, 120, dtype=float)[:, None], 3, axis=1)
+    msg = AxisArray(data, dims=["time", "ch"], axes={"time": AxisArray.TimeAxis(fs=100.0, offset=0.8)}, key="ring")
+
+    async def write_while_reading():
+        writer = asyncio.create_task(link.sink.on_message(msg))
+        await asyncio.sleep(0.05)
+        assert not writer.done()
+        link.mirror.auto_view()
+        await asyncio.wait_for(writer, 1.0)
+
+    asyncio.run(write_while_reading())
+    chunk, overflow = link.mirror.auto_view()
+    assert values(chunk) == list(range(80, 120)) and not overflow
+
+
+@pytest.mark.parametrize("policy", ["overwrite", "drop", "queue", "block"])
+def test_a_message_longer_than_the_ring_keeps_its_newest_samples(make_link, policy):
+    link = make_link(overflow=policy)
+    link.write(10)
+    link.mirror.auto_view()
+    link.write(250)  # 2.5 rings, with the reader caught up
+    assert link.mirror.samples_written == 260 and link.mirror.samples_dropped == 0
+
+    chunk, overflow = link.mirror.auto_view()
+    assert values(chunk) == list(range(160, 260)) and overflow
@@ -0,0 +1,386 @@
+"""The ring protocol between ShMemCircBuff and EZShmMirror, driven in-process.
+
+The end-to-end tests in test_shmem_mirror run a real graph, which is the only
+way to see the two halves as separate processes but leaves every interleaving up
+to the scheduler. Here the sink's handlers are called directly (see the ``link``
+fixture in conftest), so each test decides exactly what the writer has done
+between two reads.
+"""
+
+import dataclasses
+
+import numpy as np
+import pytest
+from ezmsg.util.messages.axisarray import AxisArray, CoordinateAxis
+
+from ezmsg.tools.shmem import magic_ring
+from ezmsg.tools.shmem.shmem_mirror import SamplesUnavailableError
+
+
+def values(chunk: np.ndarray) -> list:
+    return [int(v) for v in chunk[:, 0]]
+
+
+def test_reads_are_in_order_across_the_wrap(link):
+    link.write(60)
+    chunk, overflow = link.mirror.auto_view()
+    assert values(chunk) == list(range(60)) and not overflow
+
+    link.write(60)  # wraps: slots 60..99 then 0..19
+    chunk, overflow = link.mirror.auto_view()
+    assert values(chunk) == list(range(60, 120)) and not overflow
+    assert link.mirror.n_lost == 0
+
+
+def test_lapped_reader_reports_exact_loss(link):
+    link.write(10)
+    link.mirror.auto_view()
+    for _ in range(5):
+        link.write(50)  # 2.5 laps of a 100-sample ring
+    chunk, overflow = link.mirror.auto_view()
+    assert overflow
+    assert link.mirror.n_lost == 150
+    assert values(chunk) == list(range(160, 260))
+
+
+def test_view_is_torn_by_a_later_lap(link):
+    link.write(50)
+    view, _ = link.mirror.auto_view()
+    copied = view.copy()
+    assert link.mirror.check_last_read() == 0
+
+    # The writer laps 30 samples into the region the view covers.
+    link.write(80)
+    assert link.mirror.check_last_read() == 30
+    # The copy taken before the lap is still good; the view is not.
+    assert values(copied) == list(range(50))
+    assert values(view[:30]) == list(range(100, 130))
+
+
+def test_wrapped_copy_is_validated(link):
+    link.write(90)
+    link.mirror.auto_view()
+    link.write(20)  # unread slice straddles the end of the ring
+    chunk, overflow = link.mirror.auto_view(copy=True)
+    assert values(chunk) == list(range(90, 110)) and not overflow
+    assert link.mirror.check_last_read() == 0
+
+
+def test_reader_does_not_hang_on_a_wedged_writer(link):
+    link.write(20)
+    # A writer that died between _begin_write and _end_write.
+    link.sink.STATE.meta_struct.write_seq += 1
+    chunk, overflow = link.mirror.auto_view()
+    assert chunk.size == 0 and not overflow
+    link.sink.STATE.meta_struct.write_seq += 1
+    chunk, _ = link.mirror.auto_view()
+    assert values(chunk) == list(range(20))
+
+
+@pytest.mark.parametrize("n_laps", [2, 3])
+def test_loss_counts_whole_laps(link, n_laps):
+    """Two laps between polls and three used to look the same."""
+    link.write(10)
+    link.mirror.auto_view()
+    for _ in range(n_laps * 2):
+        link.write(50)
+    _, overflow = link.mirror.auto_view()
+    assert overflow
+    assert link.mirror.n_lost == n_laps * 100 - 100
+    assert link.mirror.samples_written == 10 + n_laps * 100
+
+
+def test_hot_header_fields_have_their_own_cache_line():
+    from ezmsg.tools.shmem.shmem import CACHE_LINE, ShmemArrMeta
+
+    hot = {"write_seq", "samples_written", "buffer_generation", "chunks_written", "valid_from"}
+    line = ShmemArrMeta.write_seq.offset // CACHE_LINE
+    assert ShmemArrMeta.write_seq.offset % CACHE_LINE == 0
+    for name, _ in ShmemArrMeta._fields_:
+        field = getattr(ShmemArrMeta, name)
+        first, last = field.offset // CACHE_LINE, (field.offset + field.size - 1) // CACHE_LINE
+        if name in hot:
+            assert first == last == line, name
+        elif not name.startswith("_pad"):
+            assert line not in (first, last), name
+
+
+@pytest.mark.skipif(not magic_ring.supported(), reason="double mapping needs POSIX")
+def test_double_mapped_wrap_is_a_view(make_link):
+    link = make_link(page_align=True, mirror_kwargs={"double_map": True})
+    link.write(50)
+    link.mirror.auto_view()
+    capacity = link.mirror.buffer.shape[0]
+    assert link.mirror.buffer.nbytes % magic_ring.PAGESIZE == 0
+
+    while link.n_written < capacity - 10:
+        link.write(min(50, capacity - 10 - link.n_written))
+    link.mirror.auto_view()
+    link.write(30)  # straddles the end of the ring
+    chunk, overflow = link.mirror.auto_view()
+    assert link.mirror.double_mapped
+    assert values(chunk) == list(range(capacity - 10, capacity + 20)) and not overflow
+    assert np.shares_memory(chunk, link.mirror._ring2)
+
+
+def test_unaligned_ring_falls_back_to_copying(make_link, capsys):
+    link = make_link(mirror_kwargs={"double_map": True})
+    link.write(90)
+    link.mirror.auto_view()
+    link.write(20)
+    chunk, _ = link.mirror.auto_view()
+    assert not link.mirror.double_mapped
+    assert values(chunk) == list(range(90, 110))
+    assert "Not double-mapping" in capsys.readouterr().out
+
+
+def test_read_into_converts_in_the_copy(link):
+    out = np.zeros((64, 3), dtype=np.float32)
+    link.write(90)
+    assert link.mirror.read_into(out[:0]).n == 0
+    n, overflow, n_lost = link.mirror.read_into(out)
+    assert (n, overflow, n_lost) == (64, False, 0)
+    assert values(out) == list(range(64))
+
+    link.write(20)  # the remaining 26 unread samples now straddle the wrap
+    n, overflow, _ = link.mirror.read_into(out)
+    assert n == 46 and not overflow
+    assert values(out[:n]) == list(range(64, 110))
+    assert out.dtype == np.float32
+
+
+def test_read_into_reports_loss(link):
+    out = np.zeros((200, 3))
+    link.write(10)
+    link.mirror.read_into(out)
+    for _ in range(4):
+        link.write(50)
+    n, overflow, n_lost = link.mirror.read_into(out)
+    assert overflow and n_lost == 100 and n == 100
+    assert values(out[:n]) == list(range(110, 210))
+
+
+def test_read_into_rearranges_frames(link):
+    # (time, metric, ch): the metric tuple ahead of the channels.
+    data = np.zeros((5, 2, 4))
+    data[:, 0, :] = -np.arange(4)
+    data[:, 1, :] = np.arange(4)
+    msg = AxisArray(data, dims=["time", "metric", "ch"], axes={"time": AxisArray.TimeAxis(fs=100.0)})
+    link.send(msg)
+
+    out = np.zeros((5, 4, 2), dtype=np.float32)
+    assert link.mirror.read_into(out, axes=(1, 0)).n == 5
+    np.testing.assert_array_equal(out[0, :, 0], -np.arange(4))
+    np.testing.assert_array_equal(out[0, :, 1], np.arange(4))
+
+    link.send(msg)
+    flat = np.zeros((5, 8))
+    assert link.mirror.read_into(flat).n == 5
+    np.testing.assert_array_equal(flat[0], data[0].reshape(-1))
+
+
+def test_random_access_reads_by_absolute_index(link):
+    link.write(50)
+    link.write(50)
+    link.write(30)  # ring now holds 30..129
+    mirror = link.mirror
+    assert mirror.oldest_sample == 30
+    assert values(mirror.read(90, 30)) == list(range(90, 120))  # wraps
+    assert values(mirror.read(40, 5, copy=False)) == list(range(40, 45))
+
+    with pytest.raises(SamplesUnavailableError) as err:
+        mirror.read(20, 20)
+    assert err.value.available == range(30, 130)
+    with pytest.raises(SamplesUnavailableError):
+        mirror.read(120, 20)
+
+    chunk, start = mirror.latest(25)
+    assert start == 105 and values(chunk) == list(range(105, 130))
+
+    # None of it moved the consuming cursor.
+    chunk, _ = mirror.auto_view()
+    assert values(chunk) == list(range(30, 130))
+
+
+def test_latest_returns_what_there_is(link):
+    link.write(10)
+    chunk, start = link.mirror.latest(40)
+    assert start == 0 and values(chunk) == list(range(10))
+
+
+def test_cursors_share_a_mirror_but_not_a_position(link):
+    mirror = link.mirror
+    plot, recorder = mirror.cursor("plot"), mirror.cursor("recorder")
+    assert mirror.cursor("plot") is plot
+
+    link.write(30)
+    chunk, _ = plot.auto_view()
+    assert values(chunk) == list(range(30))
+    link.write(30)
+    chunk, _ = plot.auto_view()
+    assert values(chunk) == list(range(30, 60))
+    chunk, _ = recorder.auto_view()
+    assert values(chunk) == list(range(60))
+
+    # The mirror's own cursor is independent of both: its first read starts
+    # at the oldest sample held, with nothing lost.
+    for _ in range(3):
+        link.write(50)
+    chunk, overflow = mirror.auto_view()
+    assert not overflow and values(chunk) == list(range(110, 210))
+    chunk, overflow = plot.auto_view()
+    assert overflow and plot.n_lost == 50
+
+
+def test_cursor_restarts_with_a_new_buffer(link):
+    cursor = link.mirror.cursor("c")
+    link.write(30)
+    cursor.auto_view()
+    # A new frame shape rebuilds the buffer, restarting sample indices.
+    data = np.repeat(np.arange(10.0)[:, None], 5, axis=1)
+    link.send(AxisArray(data, dims=["time", "ch"], axes={"time": AxisArray.TimeAxis(fs=100.0)}))
+    chunk, _ = cursor.auto_view()
+    assert values(chunk) == list(range(10))
+
+
+def test_irregular_coordinate_axis_keeps_its_buffer(link):
+    rng = np.random.default_rng(0)
+    t = np.cumsum(rng.uniform(0.005, 0.015, 500))
+    for i in range(0, 500, 25):
+        msg = AxisArray(
+            np.zeros((25, 2)),
+            dims=["time", "ch"],
+            axes={"time": CoordinateAxis(data=t[i : i + 25], dims=["time"])},
+        )
+        link.send(msg)
+    # Every message's median interval differs; the ring is sized once.
+    assert link.mirror.meta.buffer_generation == 0
+    assert link.sink.STATE.interval_estimator.rate == pytest.approx(100.0, rel=0.1)
+
+
+def test_unchanged_layout_skips_metadata_work(link, monkeypatch):
+    link.write(10)
+
+    def fail(*args):
+        raise AssertionError("metadata recomputed for an unchanged layout")
+
+    monkeypatch.setattr(link.sink, "_get_msg_meta", fail)
+    link.write(10)
+    assert link.mirror.samples_written == 20
+
+
+def test_layout_changes_reuse_the_ring_segment(link):
+    for i, n_ch in enumerate((3, 2, 3, 2)):
+        data = np.full((10, n_ch), float(i))
+        link.send(AxisArray(data, dims=["time", "ch"], axes={"time": AxisArray.TimeAxis(fs=100.0)}))
+
+    meta = link.mirror.meta
+    assert meta.buffer_generation == 3
+    # Toggling between two channel counts never needed a second segment.
+    assert meta.buffer_segment == 0 and meta.time_segment == 0
+    chunk, _ = link.mirror.auto_view()
+    assert chunk.shape == (10, 2) and (chunk == 3).all()
+
+
+def test_ring_can_be_made_resident_up_front(make_link):
+    link = make_link(prefault=True, hugepages=True, mlock=True)
+    link.write(60)
+    link.write(60)
+    chunk, _ = link.mirror.auto_view()
+    assert values(chunk) == list(range(20, 120))
+
+
+def test_threaded_copy_keeps_order(make_link):
+    link = make_link(threaded_copy=True)
+    for _ in range(6):
+        link.write(30)
+    chunk, _ = link.mirror.auto_view()
+    assert values(chunk) == list(range(80, 180))
+    assert link.sink.STATE.copy_executor is not None
+
+
+def test_narrower_storage_dtype(make_link):
+    link = make_link(storage_dtype="float32")
+    link.write(40)
+    chunk, _ = link.mirror.auto_view()
+    assert chunk.dtype == np.float32 and values(chunk) == list(range(40))
+
+
+def test_quantized_storage_is_rescaled_on_request(make_link):
+    link = make_link(storage_dtype="int16", storage_scale=0.5, storage_offset=10.0, mirror_kwargs={"rescale": True})
+    link.write(40)
+    chunk, _ = link.mirror.auto_view()
+    assert chunk.dtype == np.float32 and values(chunk) == list(range(40))
+    assert link.mirror.quantization == (0.5, 10.0)
+    assert link.mirror.buffer[:40, 0].tolist() == [(v - 10) * 2 for v in range(40)]
+
+    link.write(10)
+    out = np.empty((10, 3), dtype=np.float64)
+    n, _, _ = link.mirror.read_into(out)
+    assert n == 10 and values(out) == list(range(40, 50))
+
+
+def test_non_native_byte_order_is_carried_as_is(link):
+    link.write(10, dtype=">f4")
+    chunk, _ = link.mirror.auto_view()
+    assert chunk.dtype == np.dtype(">f4") and values(chunk) == list(range(10))
+
+
+def test_structured_dtype_is_carried_as_is(link):
+    dt = np.dtype([("t", "<M8[ns]"), ("v", ">i2", (2,))])
+    data = np.zeros((5, 3), dtype=dt)
+    data["t"] = np.datetime64("2024-01-01", "ns") + np.arange(5)[:, None]
+    data["v"] = np.arange(5)[:, None, None]
+    link.send(AxisArray(data, dims=["time", "ch"], axes={"time": AxisArray.TimeAxis(fs=100.0)}, key="ring"))
+    chunk, _ = link.mirror.auto_view()
+    assert chunk.dtype == dt and chunk.tobytes() == data.tobytes()
+
+
+def test_padded_structured_dtype_keeps_its_layout(link):
+    dt = np.dtype({"names": ["a", "b"], "formats": ["<i2", "<f8"], "offsets": [0, 8], "itemsize": 16})
+    data = np.zeros((5, 3), dtype=dt)
+    data["a"], data["b"] = np.arange(5)[:, None], np.arange(5)[:, None] / 2
+    link.send(AxisArray(data, dims=["time", "ch"], axes={"time": AxisArray.TimeAxis(fs=100.0)}, key="ring"))
+    chunk, _ = link.mirror.auto_view()
+    assert chunk.dtype == dt and chunk.dtype.names == ("a", "b")
+    np.testing.assert_array_equal(chunk["b"], data["b"])
+
+
+def test_channel_major_ring_reads_channel_subsets(make_link):
+    link = make_link(channel_major=True)
+    for start in (0, 60):  # the second message wraps
+        t = np.arange(start, start + 60)
+        data = t[:, None] * 10.0 + np.arange(3)  # channel c of sample t is 10 t + c
+        axes = {"time": AxisArray.TimeAxis(fs=100.0, offset=start / 100.0)}
+        link.send(AxisArray(data, dims=["time", "ch"], axes=axes, key="ring"))
+
+    chunk, _ = link.mirror.auto_view()
+    assert chunk[:, 1].tolist() == [10.0 * t + 1 for t in range(20, 120)]
+    assert np.moveaxis(link.mirror.buffer, 0, -1).flags.c_contiguous
+
+    subset = link.mirror.read(90, 20, channels=[2, 0])
+    assert subset.shape == (20, 2)
+    np.testing.assert_array_equal(subset, np.arange(90, 110)[:, None] * 10.0 + [2, 0])
+    latest, start = link.mirror.latest(5, channels=[1])
+    assert start == 115 and latest[:, 0].tolist() == [10.0 * t + 1 for t in range(115, 120)]
+
+
+def test_resizing_keeps_the_history_that_fits(link):
+    link.write(80)
+    chunk, _ = link.mirror.auto_view(60)
+    generation = link.mirror.meta.buffer_generation
+
+    link.sink.on_settings(dataclasses.replace(link.sink.SETTINGS, buf_dur=0.5))  # 50-sample ring
+    chunk, overflow = link.mirror.auto_view()
+    assert link.mirror.meta.buffer_generation == generation + 1
+    assert values(chunk) == list(range(60, 80)) and not overflow
+    assert link.mirror.oldest_sample == 30
+
+    link.write(40)
+    link.sink.on_settings(dataclasses.replace(link.sink.SETTINGS, buf_dur=2.0))
+    assert link.mirror.oldest_sample == 70
+    np.testing.assert_allclose(link.mirror.timestamps(70, 3), [0.70, 0.71, 0.72])
+    link.write(150)
+    chunk, overflow = link.mirror.auto_view()
+    assert values(chunk) == list(range(80, 270)) and not overflow
+    assert values(link.mirror.read(70, 10)) == list(range(70, 80))
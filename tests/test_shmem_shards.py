@@ -0,0 +1,108 @@
+"""Sharded links: channel groups published as separate rings, indexed by the parent."""
+
+import asyncio
+
+import numpy as np
+from ezmsg.util.messages.axisarray import AxisArray, CoordinateAxis
+
+FS = 100.0
+LABELS = np.array([f"ch{i}" for i in range(5)])
+
+
+def make_msg(start: int, n: int) -> AxisArray:
+    """``n`` samples of five channels, channel ``c`` holding ``1000 * c`` plus the sample index."""
+    data = np.arange(start, start + n, dtype=float)[:, None] + 1000.0 * np.arange(5)
+    return AxisArray(
+        data=data,
+        dims=["time", "ch"],
+        axes={
+            "time": AxisArray.TimeAxis(fs=FS, offset=start / FS),
+            "ch": CoordinateAxis(data=LABELS, dims=["ch"]),
+        },
+        key="ring",
+    )
+
+
+def test_each_shard_holds_its_channels(make_link):
+    link = make_link(shards=2)
+    link.send(make_msg(0, 20))
+    link.send(make_msg(20, 10))
+
+    assert link.mirror.shard_channels == [(0, 2), (2, 5)]
+    assert link.mirror.shard_of(3) == 1 and link.mirror.shard_of(5) is None
+    assert link.sink.STATE.buffer_arr is None  # the parent keeps no ring
+
+    for index, (start, stop) in enumerate(link.mirror.shard_channels):
+        shard = link.mirror.open_shard(index)
+        try:
+            chunk, overflow = shard.auto_view()
+            assert not overflow
+            expected = np.arange(30, dtype=float)[:, None] + 1000.0 * np.arange(start, stop)
+            np.testing.assert_array_equal(chunk, expected)
+            assert list(shard.axes["ch"]["data"]) == list(LABELS[start:stop])
+        finally:
+            shard.disconnect()
+
+
+def test_shards_follow_a_change_in_channel_count(make_link):
+    link = make_link(shards=3)
+    link.send(make_msg(0, 10))
+    assert link.mirror.shard_channels == [(0, 1), (1, 3), (3, 5)]
+
+    msg = make_msg(10, 10)
+    narrow = AxisArray(
+        msg.data[:, :2],
+        dims=msg.dims,
+        axes={**msg.axes, "ch": CoordinateAxis(data=LABELS[:2], dims=["ch"])},
+        key=msg.key,
+    )
+    link.send(narrow)
+    assert link.mirror.shard_channels == [(0, 0), (0, 1), (1, 2)]
+    shard = link.mirror.open_shard(2)
+    try:
+        chunk, _ = shard.auto_view()
+        np.testing.assert_array_equal(chunk[:, 0], np.arange(10, 20) + 1000.0)
+    finally:
+        shard.disconnect()
+
+
+def test_block_policy_awaits_the_shards_readers(make_link):
+    link = make_link(shards=2, overflow="block")
+    link.send(make_msg(0, 80))
+    shard = link.mirror.open_shard(1)
+    try:
+        shard.auto_view(n=10)  # a live reader of shard 1, 70 samples behind
+
+        async def write_while_reading():
+            writer = asyncio.create_task(link.sink.on_message(make_msg(80, 40)))
+            await asyncio.sleep(0.05)
+            assert not writer.done()
+            shard.auto_view()
+            await asyncio.wait_for(writer, 1.0)
+
+        asyncio.run(write_while_reading())
+        chunk, overflow = shard.auto_view()
+        assert chunk.shape[0] == 40 and not overflow
+    finally:
+        shard.disconnect()
+
+
+def test_a_shards_queue_drains_without_more_input(make_link):
+    link = make_link(shards=2, overflow="queue")
+    link.send(make_msg(0, 80))
+    shard = link.mirror.open_shard(0)
+    try:
+        shard.auto_view(n=10)
+        link.send(make_msg(80, 40))  # no room in shard 0: queued there
+        shard.auto_view()
+
+        async def run_drain_task():
+            task = asyncio.create_task(link.sink.drain_overflow())
+            await asyncio.sleep(0.1)
+            task.cancel()
+
+        asyncio.run(run_drain_task())
+        chunk, _ = shard.auto_view()
+        np.testing.assert_array_equal(chunk[:, 0], np.arange(80, 120))
+    finally:
+        shard.disconnect()
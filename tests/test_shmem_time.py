@@ -0,0 +1,106 @@
+"""Timestamps published beside the ring, and read back by EZShmMirror."""
+
+import numpy as np
+import pytest
+from ezmsg.util.messages.axisarray import AxisArray, CoordinateAxis
+
+from ezmsg.tools.shmem.shmem_mirror import SamplesUnavailableError
+
+FS = 100.0
+
+
+def linear_msg(start: int, n: int, offset: float) -> AxisArray:
+    data = np.arange(start, start + n, dtype=float)[:, None]
+    return AxisArray(data, dims=["time", "ch"], axes={"time": AxisArray.TimeAxis(fs=FS, offset=offset)})
+
+
+def coord_msg(times: np.ndarray) -> AxisArray:
+    return AxisArray(
+        np.zeros((len(times), 1)),
+        dims=["time", "ch"],
+        axes={"time": CoordinateAxis(data=np.asarray(times, dtype=float), dims=["time"], unit="s")},
+    )
+
+
+def test_linear_axis_times_follow_each_message(link):
+    link.send(linear_msg(0, 20, offset=5.0))
+    link.send(linear_msg(20, 20, offset=10.0))  # the stream jumped
+    times = link.mirror.timestamps(15, 10)
+    expected = np.r_[5.0 + np.arange(15, 20) / FS, 10.0 + np.arange(5) / FS]
+    np.testing.assert_allclose(times, expected)
+
+
+def test_linear_times_survive_the_records_wrapping(link):
+    # 1-sample messages: more records than the ring has frames.
+    for i in range(250):
+        link.send(linear_msg(i, 1, offset=i / FS))
+    times = link.mirror.timestamps(150, 100)
+    np.testing.assert_allclose(times, np.arange(150, 250) / FS)
+
+
+def test_cursor_reports_times_of_what_it_returned(link):
+    link.write(50)
+    link.write(50)
+    link.write(50)
+    cursor = link.mirror.cursor("c")
+    chunk, _ = cursor.auto_view()
+    np.testing.assert_allclose(cursor.last_timestamps(), chunk[:, 0] / FS)
+
+    out = np.empty((30, 3))
+    n, _, _ = cursor.read_into(out)
+    assert n == 0 and cursor.last_timestamps() is None
+
+
+def test_coordinate_axis_times_are_per_sample(link):
+    # Spacing 1/128 s (exact in binary) gives a 128-sample ring; the jump at
+    # sample 70 is what a LinearAxis could not describe.
+    times = np.arange(150) / 128 + np.where(np.arange(150) >= 70, 3.0, 0.0)
+    for i in range(0, 150, 50):
+        link.send(coord_msg(times[i : i + 50]))
+    got = link.mirror.timestamps(10, 80)
+    # 10..21 have been overwritten; the rest are the writer's own values.
+    assert np.isnan(got[:12]).all()
+    np.testing.assert_array_equal(got[12:], times[22:90])
+    # ...and 150 onwards are not written yet.
+    got = link.mirror.timestamps(140, 20)
+    np.testing.assert_array_equal(got[:10], times[140:])
+    assert np.isnan(got[10:]).all()
+
+
+def test_times_of_a_message_longer_than_the_ring(link):
+    # A 128-sample ring, as above, sent 300 samples at once.
+    times = np.arange(300) / 128
+    link.send(coord_msg(times))
+    np.testing.assert_array_equal(link.mirror.timestamps(172, 128), times[172:])
+
+
+def test_timestamps_can_be_turned_off(make_link):
+    link = make_link(timestamps=False)
+    link.write(10)
+    assert link.mirror.timestamps(0, 10) is None
+
+
+def test_read_between_cuts_by_time(link):
+    link.send(linear_msg(0, 50, offset=0.0))
+    link.send(linear_msg(50, 50, offset=2.0))  # a gap from 0.5 s to 2.0 s
+    chunk, start = link.mirror.read_between(0.2, 2.1)
+    assert start == 20 and chunk[:, 0].tolist() == list(range(20, 60))
+    assert link.mirror.sample_index(1.0) == 50  # in the gap
+
+    link.send(linear_msg(100, 50, offset=2.5))  # 0..49 overwritten
+    with pytest.raises(SamplesUnavailableError):
+        link.mirror.read_between(0.2, 2.1)
+    with pytest.raises(SamplesUnavailableError):
+        link.mirror.read_between(2.9, 3.5)  # not written yet
+
+
+def test_read_between_on_a_coordinate_axis(link):
+    times = np.arange(150) / 128 + np.where(np.arange(150) >= 70, 3.0, 0.0)
+    for i in range(0, 150, 50):
+        link.send(coord_msg(times[i : i + 50]))
+    chunk, start = link.mirror.read_between(times[60], times[80])
+    assert start == 60 and chunk.shape[0] == 20
+    assert link.mirror.sample_index(1.0) == 70  # in the jump
+    # Earlier than anything still held: cannot tell where it starts.
+    with pytest.raises(SamplesUnavailableError):
+        link.mirror.read_between(times[5], times[30])